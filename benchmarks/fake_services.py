@@ -0,0 +1,273 @@
+"""Deterministic local stand-ins for OpenAI, LlamaParse and Cognito.
+
+All three are served from one FastAPI app so a single process can back a
+benchmark run:
+
+    python -m benchmarks.fake_services --port 9100 --chat-latency-ms 400
+
+- OpenAI-compatible API under ``/v1`` (chat completions and embeddings)
+- LlamaParse job API under ``/api`` and ``/api/v1``
+- Cognito identity provider JSON protocol on ``POST /``
+- Cognito user pool JWKS on ``GET /{pool_id}/.well-known/jwks.json``, and
+  ``POST /bench/token`` to mint access tokens signed with that key
+"""
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from cryptography.hazmat.primitives.asymmetric import rsa
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+import jwt
+import uvicorn
+
+EMBEDDING_DIMENSION = 1536
+FAKE_PAGE_COUNT = 5
+
+# Latency profile in milliseconds, overridable from the command line
+LATENCY_MS = {
+    "chat": {"mean": 300, "jitter": 100},
+    "embedding": {"mean": 60, "jitter": 20},
+    "parse": {"mean": 200, "jitter": 50},
+    "cognito": {"mean": 30, "jitter": 10},
+}
+
+app = FastAPI()
+_rng = random.Random(0)
+_parse_jobs = {}
+
+# Signing key of the fake user pool, tokens from /bench/token verify against the JWKS
+_signing_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+SIGNING_KEY_ID = "bench-key"
+
+
+async def simulate_latency(kind: str):
+    profile = LATENCY_MS[kind]
+    delay = profile["mean"] + _rng.uniform(-profile["jitter"], profile["jitter"])
+    await asyncio.sleep(max(delay, 0) / 1000)
+
+
+def estimate_tokens(text: str):
+    return max(1, len(text) // 4)
+
+
+def fake_embedding(text: str):
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.gauss(0, 1) for _ in range(EMBEDDING_DIMENSION)]
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+def fake_chat_answer(prompt: str):
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+    if "Content Text:" in prompt:
+        return json.dumps(
+            {
+                "summary": f"Synthetic summary {digest}.",
+                "topics": ["indoor air quality", "ventilation", "comfort"],
+                "questions": [
+                    "What is the recommended CO2 level?",
+                    "How often should filters be replaced?",
+                ],
+                "named_entities": ["ASHRAE", "WHO"],
+            }
+        )
+    if "generate a short and relevant title" in prompt:
+        return f"Benchmark conversation {digest}"
+    return f"Based on the provided context, the answer is {digest}."
+
+
+# OpenAI compatible endpoints
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    await simulate_latency("chat")
+    prompt = "\n".join(
+        message.get("content") or "" for message in body.get("messages", [])
+    )
+    answer = fake_chat_answer(prompt)
+    prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens(answer)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": answer},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    await simulate_latency("embedding")
+    inputs = body.get("input")
+    inputs = [inputs] if isinstance(inputs, str) else inputs
+    prompt_tokens = sum(estimate_tokens(str(text)) for text in inputs)
+    return {
+        "object": "list",
+        "model": body.get("model"),
+        "data": [
+            {"object": "embedding", "index": index, "embedding": fake_embedding(str(text))}
+            for index, text in enumerate(inputs)
+        ],
+        "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+    }
+
+
+# LlamaParse endpoints
+
+
+def fake_parsed_pages(job_id: str):
+    return [
+        {
+            "page": page,
+            "md": f"# Page {page}\n\nSynthetic markdown for job {job_id}, page {page}. "
+            + "Indoor environmental quality guidance. " * 40,
+        }
+        for page in range(1, FAKE_PAGE_COUNT + 1)
+    ]
+
+
+@app.post("/api/parsing/upload")
+@app.post("/api/v1/parsing/upload")
+async def parsing_upload():
+    await simulate_latency("parse")
+    job_id = uuid.uuid4().hex
+    _parse_jobs[job_id] = fake_parsed_pages(job_id)
+    return {"id": job_id, "status": "PENDING"}
+
+
+@app.get("/api/parsing/job/{job_id}")
+@app.get("/api/v1/parsing/job/{job_id}")
+async def parsing_job_status(job_id: str):
+    status = "SUCCESS" if job_id in _parse_jobs else "ERROR"
+    return {"id": job_id, "status": status}
+
+
+@app.get("/api/parsing/job/{job_id}/result/{result_type}")
+@app.get("/api/v1/parsing/job/{job_id}/result/{result_type}")
+async def parsing_job_result(job_id: str, result_type: str):
+    pages = _parse_jobs.pop(job_id, [])
+    if result_type == "json":
+        return {"pages": pages, "job_metadata": {"job_pages": len(pages)}}
+    return {result_type: "\n\n".join(page["md"] for page in pages)}
+
+
+# Cognito identity provider endpoint
+
+
+def fake_user_attributes(username: str):
+    return [
+        {"Name": "sub", "Value": hashlib.md5(username.encode()).hexdigest()},
+        {"Name": "email", "Value": f"{username}@bench.local"},
+        {"Name": "name", "Value": username.title()},
+        {"Name": "custom:tenantId", "Value": "bench"},
+    ]
+
+
+@app.post("/")
+async def cognito(request: Request):
+    target = request.headers.get("x-amz-target", "").split(".")[-1]
+    body = json.loads(await request.body() or b"{}")
+    await simulate_latency("cognito")
+
+    if target == "GetUser":
+        token = body.get("AccessToken", "")
+        username = token.split("bench-", 1)[-1] or "bench"
+        content = {"Username": username, "UserAttributes": fake_user_attributes(username)}
+    elif target == "AdminGetUser":
+        username = body.get("Username")
+        # Stands in for deleted accounts
+        if username.startswith("deleted-"):
+            return JSONResponse(
+                status_code=400,
+                content={"__type": "UserNotFoundException", "message": username},
+            )
+        content = {
+            "Username": username,
+            "UserAttributes": fake_user_attributes(username),
+            "Enabled": True,
+            "UserStatus": "CONFIRMED",
+        }
+    elif target == "AdminListGroupsForUser":
+        content = {"Groups": [{"GroupName": "admin"}]}
+    else:
+        return JSONResponse(
+            status_code=400,
+            content={"__type": "InvalidParameterException", "message": target},
+        )
+
+    return JSONResponse(content=content, media_type="application/x-amz-json-1.1")
+
+
+@app.get("/{pool_id}/.well-known/jwks.json")
+async def jwks(pool_id: str):
+    public_key = _signing_key.public_key()
+    public_jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(public_key))
+    public_jwk.update({"kid": SIGNING_KEY_ID, "alg": "RS256", "use": "sig"})
+    return {"keys": [public_jwk]}
+
+
+@app.post("/bench/token")
+async def mint_access_token(request: Request):
+    # Same claims as a Cognito access token, the issuer is this server
+    body = json.loads(await request.body() or b"{}")
+    username = body.get("username", "bench")
+    pool_id = body.get("pool_id", "us-east-1_bench")
+    now = int(time.time())
+    claims = {
+        "sub": hashlib.md5(username.encode()).hexdigest(),
+        "username": username,
+        "cognito:groups": body.get("groups", ["admin"]),
+        "iss": f"{str(request.base_url).rstrip('/')}/{pool_id}",
+        "client_id": body.get("client_id", "bench-client"),
+        "token_use": "access",
+        "scope": "aws.cognito.signin.user.admin",
+        "iat": now,
+        "exp": now + int(body.get("expires_in", 3600)),
+    }
+    token = jwt.encode(
+        claims, _signing_key, algorithm="RS256", headers={"kid": SIGNING_KEY_ID}
+    )
+    return {"access_token": token, "expires_in": claims["exp"] - now}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    for kind in LATENCY_MS:
+        parser.add_argument(f"--{kind}-latency-ms", type=float)
+        parser.add_argument(f"--{kind}-jitter-ms", type=float)
+    args = parser.parse_args()
+
+    for kind, profile in LATENCY_MS.items():
+        mean = getattr(args, f"{kind}_latency_ms")
+        jitter = getattr(args, f"{kind}_jitter_ms")
+        profile["mean"] = profile["mean"] if mean is None else mean
+        profile["jitter"] = profile["jitter"] if jitter is None else jitter
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
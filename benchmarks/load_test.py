@@ -0,0 +1,398 @@
+"""Load-test the API against local stand-ins and report per-route latency.
+
+Boots ``benchmarks.fake_services``, the FastAPI app (uvicorn) and the
+ingestion worker in subprocesses, seeds a topic and a parsed document, then
+drives weighted concurrent traffic and prints p50/p95/p99 latency and
+throughput per route.
+
+Postgres is still required (a disposable local instance is enough); Milvus
+runs in-process through Milvus Lite unless ``--milvus-uri`` points elsewhere.
+
+    python -m benchmarks.load_test --concurrency 32 --duration 60 \\
+        --output bench.json --baseline previous-bench.json
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+QUESTIONS = [
+    "What is the recommended indoor CO2 level?",
+    "How often should HVAC filters be replaced?",
+    "What humidity range is comfortable for offices?",
+    "Which standard covers ventilation rates?",
+    "How do I measure PM2.5 indoors?",
+    "What causes sick building syndrome?",
+    "How much fresh air does a meeting room need?",
+    "What is a good temperature for classrooms?",
+    "How does ventilation affect productivity?",
+    "What are volatile organic compounds?",
+]
+
+# Relative weight of each scenario in the traffic mix
+DEFAULT_MIX = {
+    "search-knowledge-base": 70,
+    "get-topics": 10,
+    "get-contents": 15,
+    "parse-contents": 5,
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered)) - 1
+    return ordered[max(0, min(len(ordered) - 1, rank))]
+
+
+def write_config_ini(directory: Path, args):
+    config_path = directory / "config.ini"
+    config_path.write_text(
+        "[Postgres]\n"
+        f"host = {args.pg_host}\n"
+        f"port = {args.pg_port}\n"
+        f"db = {args.pg_db}\n"
+        f"username = {args.pg_user}\n"
+        f"password = {args.pg_password}\n"
+        "\n[Milvus]\n"
+        f"host = {args.milvus_uri or directory / 'milvus_lite.db'}\n"
+        "port = 19530\n"
+    )
+    return config_path
+
+
+def app_environment(args, config_path: Path):
+    fake_url = f"http://127.0.0.1:{args.fake_port}"
+    env = dict(os.environ)
+    env.update(
+        {
+            "ENVIRONMENT": "dev",
+            "KB_CONFIG_PATH": str(config_path),
+            "KB_LLM_SERVICE_URL": f"http://127.0.0.1:{args.app_port}",
+            "OPEN_API_KEY": "bench",
+            "OPENAI_API_BASE": f"{fake_url}/v1",
+            "LLMA_API_KEY": "bench",
+            "LLAMA_CLOUD_BASE_URL": fake_url,
+            "AWS_REGION": "us-east-1",
+            "AWS_ACCESS_KEY_ID": "bench",
+            "AWS_SECRET_ACCESS_KEY": "bench",
+            "COGNITO_POOL_ID": "us-east-1_bench",
+            "COGNITO_ENDPOINT_URL": fake_url,
+            "GOOGLE_API_KEY": "bench",
+            "S3_BUCKET_NAME": "bench-bucket",
+        }
+    )
+    return env
+
+
+def start_process(command, env=None):
+    return subprocess.Popen(command, cwd=REPO_ROOT, env=env)
+
+
+async def wait_until_up(url: str, timeout: float = 60.0, require_ok: bool = False):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                response = await client.get(url)
+                if not require_ok or response.is_success:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+async def mint_token(fake_url: str):
+    # An access token signed by the fake user pool, the app verifies it locally
+    async with httpx.AsyncClient() as client:
+        response = await client.post(
+            f"{fake_url}/bench/token",
+            json={"username": "loadtest", "pool_id": "us-east-1_bench"},
+        )
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+
+async def seed(client: httpx.AsyncClient, fake_url: str):
+    response = await client.post("/create-default-tables-in-ps")
+    response.raise_for_status()
+
+    title = f"Benchmark topic {int(time.time())}"
+    response = await client.post(
+        "/create-topics",
+        json={
+            "title": title,
+            "description": "Seeded by benchmarks.load_test",
+            "level": "l1",
+            "created_by": "bench",
+        },
+    )
+    response.raise_for_status()
+
+    response = await client.post("/get-topics", json={"is_all": True})
+    response.raise_for_status()
+    topic_id = next(
+        topic["id"] for topic in response.json()["data"] if topic["title"] == title
+    )
+
+    response = await client.post(
+        "/create-content",
+        data={
+            "title": title,
+            "description": "Seeded by benchmarks.load_test",
+            "source": f"{fake_url}/bench/document.pdf",
+            "source_info": "benchmark",
+            "tags": "benchmark",
+            "created_by": "bench",
+            "topic_ids": str(topic_id),
+            "level": "l3",
+            "username": "bench",
+        },
+    )
+    response.raise_for_status()
+
+    response = await client.post("/get-contents", json={})
+    response.raise_for_status()
+    content_id = next(
+        content["id"]
+        for content in response.json()["data"]
+        if content["title"] == title
+    )
+
+    # create-content queued the ingestion, search needs the worker to finish it
+    await wait_for_ingestion(client, content_id)
+    return {"topic_id": topic_id, "content_id": content_id}
+
+
+async def wait_for_ingestion(client: httpx.AsyncClient, content_id: int, timeout=120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = await client.get(f"/view-ingestion-job/{content_id}")
+        response.raise_for_status()
+        job = response.json()["data"]
+        if job and job["status"] == "succeeded":
+            return
+        if job and job["status"] == "dead":
+            raise RuntimeError(f"Ingestion of the seeded content failed: {job}")
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"Seeded content was not ingested within {timeout}s")
+
+
+def build_request(scenario: str, rng: random.Random, seeded: dict, fake_url: str):
+    if scenario == "search-knowledge-base":
+        # Popular questions repeat far more often than the long tail
+        question = QUESTIONS[min(int(rng.paretovariate(1.2)) - 1, len(QUESTIONS) - 1)]
+        return "POST", "/search-knowledge-base", {
+            "json": {"search_key": question, "username": f"user{rng.randint(1, 50)}"}
+        }
+    if scenario == "get-topics":
+        return "POST", "/get-topics", {"json": {}}
+    if scenario == "get-contents":
+        return "POST", "/get-contents", {"json": {}}
+    if scenario == "parse-contents":
+        # Queues a re-ingestion, the worker runs it next to the measured traffic
+        return "POST", "/parse-contents", {
+            "data": {"content_id": str(seeded["content_id"])}
+        }
+    raise ValueError(f"Unknown scenario {scenario}")
+
+
+async def run_load(client, mix, seeded, fake_url, concurrency, duration, seed_value):
+    results = {scenario: {"latencies": [], "errors": 0} for scenario in mix}
+    scenarios, weights = list(mix.keys()), list(mix.values())
+    deadline = time.monotonic() + duration
+
+    async def worker(worker_id: int):
+        rng = random.Random(seed_value + worker_id)
+        while time.monotonic() < deadline:
+            scenario = rng.choices(scenarios, weights)[0]
+            method, path, kwargs = build_request(scenario, rng, seeded, fake_url)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            results[scenario]["latencies"].append(elapsed_ms)
+            results[scenario]["errors"] += int(failed)
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    return results, time.monotonic() - started
+
+
+def summarize(results, wall_seconds):
+    report = {}
+    for scenario, data in results.items():
+        latencies = data["latencies"]
+        report[scenario] = {
+            "requests": len(latencies),
+            "errors": data["errors"],
+            "throughput_rps": round(len(latencies) / wall_seconds, 2),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": max(latencies) if latencies else None,
+        }
+    return report
+
+
+def print_report(report):
+    header = f"{'route':<24}{'reqs':>7}{'errs':>6}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}"
+    print(header)
+    print("-" * len(header))
+    for scenario, row in report.items():
+        cells = [
+            f"{row[key]:>9.1f}" if row[key] is not None else f"{'-':>9}"
+            for key in ("p50_ms", "p95_ms", "p99_ms")
+        ]
+        print(
+            f"{scenario:<24}{row['requests']:>7}{row['errors']:>6}"
+            f"{row['throughput_rps']:>8.2f}{''.join(cells)}"
+        )
+
+
+def compare_with_baseline(report, baseline, threshold_pct):
+    regressions = []
+    for scenario, row in report.items():
+        previous = baseline.get(scenario)
+        if not previous or not previous.get("p95_ms") or row["p95_ms"] is None:
+            continue
+        change = (row["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+        if change > threshold_pct:
+            regressions.append(
+                f"{scenario}: p95 {previous['p95_ms']:.1f}ms -> {row['p95_ms']:.1f}ms (+{change:.0f}%)"
+            )
+    return regressions
+
+
+async def main_async(args):
+    fake_url = f"http://127.0.0.1:{args.fake_port}"
+    app_url = args.app_url or f"http://127.0.0.1:{args.app_port}"
+    mix = {scenario: weight for scenario, weight in DEFAULT_MIX.items()}
+    for item in args.mix or []:
+        scenario, weight = item.split("=")
+        mix[scenario] = int(weight)
+    mix = {scenario: weight for scenario, weight in mix.items() if weight > 0}
+
+    processes = []
+    with tempfile.TemporaryDirectory(prefix="kb-bench-") as tmp_dir:
+        try:
+            fake_command = [
+                sys.executable, "-m", "benchmarks.fake_services",
+                "--port", str(args.fake_port),
+            ]
+            if args.chat_latency_ms is not None:
+                fake_command += ["--chat-latency-ms", str(args.chat_latency_ms)]
+            if args.embedding_latency_ms is not None:
+                fake_command += ["--embedding-latency-ms", str(args.embedding_latency_ms)]
+            processes.append(start_process(fake_command))
+            await wait_until_up(f"{fake_url}/docs")
+
+            if not args.app_url:
+                config_path = write_config_ini(Path(tmp_dir), args)
+                processes.append(
+                    start_process(
+                        [
+                            sys.executable, "-m", "uvicorn", "main:app",
+                            "--port", str(args.app_port),
+                            "--workers", str(args.workers),
+                            "--log-level", "warning",
+                        ],
+                        env=app_environment(args, config_path),
+                    )
+                )
+                processes.append(
+                    start_process(
+                        [sys.executable, "worker.py"],
+                        env=app_environment(args, config_path),
+                    )
+                )
+                # Measure warm workers only, /ready is 503 until the warm-up is done
+                await wait_until_up(f"{app_url}/ready", require_ok=True)
+
+            limits = httpx.Limits(max_connections=args.concurrency * 2)
+            async with httpx.AsyncClient(
+                base_url=app_url,
+                headers={"Authorization": f"Bearer {await mint_token(fake_url)}"},
+                timeout=httpx.Timeout(120.0),
+                limits=limits,
+            ) as client:
+                seeded = await seed(client, fake_url)
+                if args.warmup:
+                    await run_load(client, mix, seeded, fake_url, args.concurrency, args.warmup, args.seed)
+                results, wall_seconds = await run_load(
+                    client, mix, seeded, fake_url, args.concurrency, args.duration, args.seed
+                )
+                metrics = (await client.get("/service-metrics")).json()["data"]
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait(timeout=30)
+
+    report = summarize(results, wall_seconds)
+    print_report(report)
+    pool = metrics["postgres_pool"]["async"]
+    print(
+        f"\npostgres pool: {pool['checkouts']} checkouts over "
+        f"{pool['connections_opened']} connections (reuse {pool['reuse_ratio']:.1%})"
+    )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare_with_baseline(report, baseline, args.regression_threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--app-port", type=int, default=9000)
+    parser.add_argument("--app-url", help="benchmark an already running app instead")
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument("--chat-latency-ms", type=float)
+    parser.add_argument("--embedding-latency-ms", type=float)
+    parser.add_argument("--pg-host", default=os.environ.get("BENCH_PG_HOST", "127.0.0.1"))
+    parser.add_argument("--pg-port", default=os.environ.get("BENCH_PG_PORT", "5432"))
+    parser.add_argument("--pg-db", default=os.environ.get("BENCH_PG_DB", "postgres"))
+    parser.add_argument("--pg-user", default=os.environ.get("BENCH_PG_USER", "postgres"))
+    parser.add_argument("--pg-password", default=os.environ.get("BENCH_PG_PASSWORD", "postgres"))
+    parser.add_argument("--milvus-uri", help="defaults to a Milvus Lite file")
+    parser.add_argument(
+        "--mix", action="append", help="override a scenario weight, e.g. parse-contents=0"
+    )
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare p95 against")
+    parser.add_argument("--regression-threshold", type=float, default=20.0, help="percent")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
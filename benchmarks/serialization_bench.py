@@ -0,0 +1,107 @@
+"""Compare the default and the fast JSON path on a large get-contents page.
+
+The default path is what FastAPI does with a response_model: validate the
+content through the Pydantic model, dump it in JSON mode and encode it with
+the stdlib encoder. The fast path (FAST_JSON_RESPONSES=true) hands the row
+dicts to ORJSONResponse as they are.
+
+    python -m benchmarks.serialization_bench --rows 10000
+"""
+
+from datetime import datetime, timedelta
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from response_types.content import GetContentResponse
+
+
+def make_rows(count: int):
+    # Same columns as the contents table, get-contents returns whole rows
+    created_at = datetime(2025, 1, 1, 9, 30)
+    return [
+        {
+            "id": index,
+            "source": f"https://bucket.s3.amazonaws.com/tenant/facility/{index}.pdf",
+            "title": f"Document {index}",
+            "description": "Quarterly operating procedures for the facility " * 3,
+            "source_info": "local",
+            "source_data": "",
+            "tags": "policy,operations,safety",
+            "created_by": "author",
+            "updated_by": "reviewer",
+            "status": "ACCEPTED",
+            "version": "1",
+            "stored_in_kb": "true",
+            "topic_ids": [1 + index % 7, 8 + index % 5],
+            "is_deleted": False,
+            "created_at": created_at + timedelta(minutes=index),
+            "updated_at": created_at + timedelta(minutes=index, seconds=30),
+            "review_date": None,
+            "approved_time": created_at + timedelta(minutes=index, seconds=45),
+            "rejected_time": None,
+        }
+        for index in range(count)
+    ]
+
+
+def default_path(content, adapter):
+    # fastapi.routing.serialize_response followed by JSONResponse.render
+    value = adapter.validate_python(content)
+    return JSONResponse(adapter.dump_python(value, mode="json")).body
+
+
+def fast_path(content, adapter):
+    return ORJSONResponse(content).body
+
+
+def measure(render, content, adapter, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = render(content, adapter)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    content = {
+        "data": make_rows(args.rows),
+        "next_cursor": None,
+        "total_estimate": args.rows,
+        "status": "success",
+    }
+    adapter = TypeAdapter(GetContentResponse)
+
+    # Both paths must describe the same rows
+    default_body = json.loads(default_path(content, adapter))
+    fast_body = json.loads(fast_path(content, adapter))
+    if [row["id"] for row in default_body["data"]] != [
+        row["id"] for row in fast_body["data"]
+    ]:
+        print("FAIL the two paths returned different rows")
+        return 1
+
+    default_ms, default_bytes = measure(default_path, content, adapter, args.repeat)
+    fast_ms, fast_bytes = measure(fast_path, content, adapter, args.repeat)
+
+    print(f"{args.rows} rows, median of {args.repeat} runs")
+    print(f"{'path':<10}{'ms':>10}{'bytes':>12}")
+    print(f"{'default':<10}{default_ms:>10.1f}{default_bytes:>12}")
+    print(f"{'fast':<10}{fast_ms:>10.1f}{fast_bytes:>12}")
+    print(f"speedup: {default_ms / fast_ms:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
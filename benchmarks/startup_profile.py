@@ -0,0 +1,142 @@
+"""Profile how long importing the API takes and which modules it pulls in.
+
+Runs ``python -X importtime -c "import main"`` in a fresh interpreter (a few
+times, keeping the median), prints the slowest modules and packages, and
+exits with code 1 when the import exceeds ``--budget-ms`` or when a module
+that should only load on first use shows up at startup.
+
+    python -m benchmarks.startup_profile --budget-ms 1500 --top 25
+"""
+
+from collections import defaultdict
+from pathlib import Path
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Heavy SDKs that are imported lazily, none of them may load when main is imported
+LAZY_PACKAGES = [
+    "llama_index",
+    "llama_parse",
+    "openai",
+    "selenium",
+    "webdriver_manager",
+    "googleapiclient",
+    "boto3",
+    "botocore",
+    "pymilvus",
+    "nest_asyncio",
+]
+
+
+def profile_environment(config_path: Path):
+    # Importing main must not need real credentials or reachable services
+    env = dict(os.environ)
+    env.setdefault("ENVIRONMENT", "dev")
+    env.setdefault("KB_CONFIG_PATH", str(config_path))
+    for name in [
+        "KB_LLM_SERVICE_URL",
+        "OPEN_API_KEY",
+        "LLMA_API_KEY",
+        "AWS_REGION",
+        "COGNITO_POOL_ID",
+        "GOOGLE_API_KEY",
+        "S3_BUCKET_NAME",
+    ]:
+        env.setdefault(name, "startup-profile")
+    return env
+
+
+def write_config_ini(directory: Path):
+    config_path = directory / "config.ini"
+    config_path.write_text(
+        "[Postgres]\nhost = 127.0.0.1\nport = 5432\ndb = global_db\n"
+        "username = postgres\npassword = postgres\n"
+        f"\n[Milvus]\nhost = {directory / 'milvus_lite.db'}\nport = 19530\n"
+    )
+    return config_path
+
+
+def run_importtime(env):
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"importing main failed:\n{completed.stderr[-2000:]}")
+    return parse_importtime(completed.stderr)
+
+
+def parse_importtime(output: str):
+    # "import time: self [us] | cumulative | imported package"
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules.append(
+            {
+                "name": name.strip(),
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            }
+        )
+    return modules
+
+
+def summarize(modules):
+    total_ms = next(m["cumulative_ms"] for m in modules if m["name"] == "main")
+    packages = defaultdict(float)
+    for module in modules:
+        packages[module["name"].split(".")[0]] += module["self_ms"]
+    return total_ms, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="kb-startup-") as tmp_dir:
+        env = profile_environment(write_config_ini(Path(tmp_dir)))
+        # The first run also writes bytecode caches, the median keeps it out of the result
+        runs = [run_importtime(env) for _ in range(max(1, args.repeat))]
+
+    totals = [summarize(modules)[0] for modules in runs]
+    median_total = statistics.median_low(totals)
+    modules = runs[totals.index(median_total)]
+    _, packages = summarize(modules)
+
+    print(f"import main: {median_total:.1f} ms (runs: {', '.join(f'{t:.0f}' for t in totals)})")
+    print(f"\n{'package':<32}{'self ms':>10}")
+    for name, self_ms in sorted(packages.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"{name:<32}{self_ms:>10.1f}")
+
+    print(f"\n{'module':<56}{'cumulative ms':>14}")
+    slowest = sorted(modules, key=lambda module: -module["cumulative_ms"])
+    for module in slowest[: args.top]:
+        print(f"{module['name']:<56}{module['cumulative_ms']:>14.1f}")
+
+    failures = []
+    eager = sorted(package for package in LAZY_PACKAGES if package in packages)
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+    if median_total > args.budget_ms:
+        failures.append(f"{median_total:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    for failure in failures:
+        print("FAIL", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
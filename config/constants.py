@@ -32,11 +32,19 @@ origins = [
 origins = [url for url in origins if url]
 LLMA_API_KEY = os.environ["LLMA_API_KEY"]
 
+# Optional endpoint overrides, used to point the service at local stand-ins (see benchmarks/)
+OPENAI_API_BASE = os.environ.get("OPENAI_API_BASE", "")
+LLAMA_CLOUD_BASE_URL = os.environ.get("LLAMA_CLOUD_BASE_URL", "")
+COGNITO_ENDPOINT_URL = os.environ.get("COGNITO_ENDPOINT_URL", "")
+
 CONTENTS_TABLE_NAME = "contents"
 TOPICS_TABLE_NAME = "topics"
 PROMPTS_TABLE_NAME = "prompts"
 USER_CHAT_HISTORY_TABLE_NAME = "user_chat_history"
 USER_CONVERSATION_TABLE_NAME = "user_conversation"
+INGESTION_CHECKPOINTS_TABLE_NAME = "ingestion_checkpoints"
+INGESTION_JOBS_TABLE_NAME = "ingestion_jobs"
+CACHE_VERSIONS_TABLE_NAME = "cache_versions"
 CHAT_HISTORY_SIZE=3
 DEFAULT_POSTGRES_TABLES = ["contents", "topics", "prompts"]
 LEVEL_NAMES = [
@@ -123,3 +131,134 @@ PROMPT_FOR_TOPICS_QUESTIONS = """Go through the below content and extract the fo
 
 EMBEDDING_MODEL_NAME = "text-embedding-ada-002"
 LLM_MODEL_NAME = "gpt-3.5-turbo"
+
+# OpenAI rate limit budgets shared by search, titles and ingestion (see helpers/rate_limiter.py)
+OPENAI_LLM_REQUESTS_PER_MINUTE = int(os.environ.get("OPENAI_LLM_RPM", "3500"))
+OPENAI_LLM_TOKENS_PER_MINUTE = int(os.environ.get("OPENAI_LLM_TPM", "160000"))
+OPENAI_EMBEDDING_REQUESTS_PER_MINUTE = int(os.environ.get("OPENAI_EMBEDDING_RPM", "3000"))
+OPENAI_EMBEDDING_TOKENS_PER_MINUTE = int(
+    os.environ.get("OPENAI_EMBEDDING_TPM", "1000000")
+)
+# Share of each budget that titles and ingestion may never consume
+OPENAI_INTERACTIVE_RESERVE = float(os.environ.get("OPENAI_INTERACTIVE_RESERVE", "0.2"))
+OPENAI_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", "5"))
+LLM_COMPLETION_TOKEN_ESTIMATE = 500
+
+# Secondary chat model used while the primary one's circuit is open, empty to fail fast
+LLM_FALLBACK_MODEL_NAME = os.environ.get("LLM_FALLBACK_MODEL_NAME", "")
+
+# Hedged requests on the search path (see helpers/resilience.py)
+HEDGING_ENABLED = os.environ.get("HEDGING_ENABLED", "true").lower() == "true"
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_DELAY_MS = float(os.environ.get("HEDGE_MIN_DELAY_MS", "200"))
+HEDGE_MAX_DELAY_MS = float(os.environ.get("HEDGE_MAX_DELAY_MS", "10000"))
+
+# Circuit breaking for OpenAI calls
+CIRCUIT_FAILURE_RATE = float(os.environ.get("CIRCUIT_FAILURE_RATE", "0.5"))
+CIRCUIT_WINDOW_SIZE = int(os.environ.get("CIRCUIT_WINDOW_SIZE", "20"))
+CIRCUIT_MIN_CALLS = int(os.environ.get("CIRCUIT_MIN_CALLS", "10"))
+CIRCUIT_OPEN_SECONDS = float(os.environ.get("CIRCUIT_OPEN_SECONDS", "30"))
+
+# Per tenant database engines (see connection/postgres.py)
+TENANT_ENGINE_LIMIT = int(os.environ.get("TENANT_ENGINE_LIMIT", "16"))
+TENANT_ENGINE_IDLE_SECONDS = float(os.environ.get("TENANT_ENGINE_IDLE_SECONDS", "600"))
+TENANT_POOL_SIZE = int(os.environ.get("TENANT_POOL_SIZE", "2"))
+TENANT_MAX_OVERFLOW = int(os.environ.get("TENANT_MAX_OVERFLOW", "3"))
+DATABASE_EXISTS_CACHE_SECONDS = float(
+    os.environ.get("DATABASE_EXISTS_CACHE_SECONDS", "300")
+)
+
+# Compare the declared tables with the live database in the background after startup
+VERIFY_SCHEMA_ON_STARTUP = (
+    os.environ.get("VERIFY_SCHEMA_ON_STARTUP", "false").lower() == "true"
+)
+
+# Lifespan warm-up, /ready answers 503 until it is done (services/readiness_service.py)
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_POOL_CONNECTIONS = int(os.environ.get("WARMUP_POOL_CONNECTIONS", "4"))
+# The dummy embedding is a real (billed) OpenAI request per worker start
+WARMUP_EMBEDDING = os.environ.get("WARMUP_EMBEDDING", "true").lower() == "true"
+READY_CHECK_TIMEOUT_SECONDS = float(os.environ.get("READY_CHECK_TIMEOUT_SECONDS", "2"))
+
+# Keyset paginated list endpoints
+DEFAULT_PAGE_SIZE = int(os.environ.get("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", "200"))
+
+# Cached get-topics responses per worker, checked against the version in Postgres
+TOPIC_LIST_CACHE_SECONDS = float(os.environ.get("TOPIC_LIST_CACHE_SECONDS", "60"))
+TOPIC_LIST_CACHE_SIZE = int(os.environ.get("TOPIC_LIST_CACHE_SIZE", "512"))
+
+# Characters of the last answer shown in list-chat-threads
+CHAT_PREVIEW_LENGTH = int(os.environ.get("CHAT_PREVIEW_LENGTH", "200"))
+
+# List endpoints encode with orjson and skip response model validation (trusted rows)
+FAST_JSON_RESPONSES = os.environ.get("FAST_JSON_RESPONSES", "false").lower() == "true"
+
+# Access tokens are verified locally against the user pool's JWKS (middleware/auth.py)
+JWT_LOCAL_VERIFICATION = (
+    os.environ.get("JWT_LOCAL_VERIFICATION", "true").lower() == "true"
+)
+COGNITO_ISSUER = os.environ.get("COGNITO_ISSUER") or (
+    f"{COGNITO_ENDPOINT_URL.rstrip('/')}/{COGNITO_POOL_ID}"
+    if COGNITO_ENDPOINT_URL
+    else f"https://cognito-idp.{AWS_REGION}.amazonaws.com/{COGNITO_POOL_ID}"
+)
+# Comma separated app client ids accepted in the client_id claim, empty accepts any
+COGNITO_APP_CLIENT_IDS = [
+    client_id.strip()
+    for client_id in os.environ.get("COGNITO_APP_CLIENT_IDS", "").split(",")
+    if client_id.strip()
+]
+JWKS_REFRESH_SECONDS = float(os.environ.get("JWKS_REFRESH_SECONDS", "3600"))
+# An unknown kid refetches the JWKS (key rotation), at most this often
+JWKS_MIN_REFRESH_SECONDS = float(os.environ.get("JWKS_MIN_REFRESH_SECONDS", "60"))
+AUTH_TOKEN_CACHE_SECONDS = float(os.environ.get("AUTH_TOKEN_CACHE_SECONDS", "60"))
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get("AUTH_TOKEN_CACHE_SIZE", "10000"))
+
+# Cognito user profiles shown on view/list endpoints (helpers/user_profiles.py)
+USER_PROFILE_CACHE_SECONDS = float(os.environ.get("USER_PROFILE_CACHE_SECONDS", "300"))
+# Users that do not exist (deleted accounts) are remembered for a shorter time
+USER_PROFILE_NEGATIVE_CACHE_SECONDS = float(
+    os.environ.get("USER_PROFILE_NEGATIVE_CACHE_SECONDS", "60")
+)
+USER_PROFILE_CACHE_SIZE = int(os.environ.get("USER_PROFILE_CACHE_SIZE", "5000"))
+# Concurrent AdminGetUser calls per worker, Cognito throttles this API
+USER_PROFILE_CONCURRENCY = int(os.environ.get("USER_PROFILE_CONCURRENCY", "8"))
+
+# Rows per Milvus query/upsert batch when page metadata is updated in place
+MILVUS_UPDATE_BATCH_SIZE = int(os.environ.get("MILVUS_UPDATE_BATCH_SIZE", "500"))
+
+# Pages whose metadata is extracted at the same time, per parsed document
+METADATA_EXTRACTION_CONCURRENCY = int(
+    os.environ.get("METADATA_EXTRACTION_CONCURRENCY", "8")
+)
+# Extra attempts for a page whose completion is not the expected JSON
+METADATA_EXTRACTION_RETRIES = int(os.environ.get("METADATA_EXTRACTION_RETRIES", "2"))
+
+# Ingestion embeddings are requested in batches (helpers/embedding_batches.py)
+EMBEDDING_BATCH_MAX_TOKENS = int(os.environ.get("EMBEDDING_BATCH_MAX_TOKENS", "60000"))
+EMBEDDING_BATCH_MAX_INPUTS = int(os.environ.get("EMBEDDING_BATCH_MAX_INPUTS", "256"))
+EMBEDDING_BATCH_CONCURRENCY = int(os.environ.get("EMBEDDING_BATCH_CONCURRENCY", "4"))
+# Model input limit, longer pages are split and their chunk vectors averaged
+EMBEDDING_MAX_INPUT_TOKENS = int(os.environ.get("EMBEDDING_MAX_INPUT_TOKENS", "8191"))
+
+# Pages per extract/embed/insert batch while ingesting, and batches buffered between stages
+INGESTION_BATCH_PAGES = int(os.environ.get("INGESTION_BATCH_PAGES", "32"))
+INGESTION_QUEUE_SIZE = int(os.environ.get("INGESTION_QUEUE_SIZE", "2"))
+
+# Ingestion job queue worked by worker.py (services/ingestion_jobs_service.py)
+INGESTION_WORKER_CONCURRENCY = int(os.environ.get("INGESTION_WORKER_CONCURRENCY", "2"))
+INGESTION_WORKER_POLL_SECONDS = float(
+    os.environ.get("INGESTION_WORKER_POLL_SECONDS", "2")
+)
+INGESTION_JOB_MAX_ATTEMPTS = int(os.environ.get("INGESTION_JOB_MAX_ATTEMPTS", "5"))
+INGESTION_JOB_BACKOFF_SECONDS = float(
+    os.environ.get("INGESTION_JOB_BACKOFF_SECONDS", "30")
+)
+INGESTION_JOB_MAX_BACKOFF_SECONDS = float(
+    os.environ.get("INGESTION_JOB_MAX_BACKOFF_SECONDS", "1800")
+)
+# Running jobs refresh their lock, one not refreshed for this long lost its worker
+INGESTION_JOB_LOCK_TIMEOUT_SECONDS = float(
+    os.environ.get("INGESTION_JOB_LOCK_TIMEOUT_SECONDS", "300")
+)
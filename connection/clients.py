@@ -0,0 +1,103 @@
+from config.constants import AWS_REGION, COGNITO_ENDPOINT_URL
+import importlib.util
+import threading
+import httpx
+
+# HTTP/2 needs the optional h2 package, without it clients fall back to HTTP/1.1 keep-alive
+HTTP2_ENABLED = importlib.util.find_spec("h2") is not None
+
+# Every external dependency gets its own pooled client, so max_connections
+# also works as a per-host concurrency limit
+HTTP_CLIENT_SETTINGS = {
+    "default": {"timeout": 30.0, "max_connections": 20},
+    "openai": {"timeout": 120.0, "max_connections": 64},
+    "llama_parse": {"timeout": 60.0, "max_connections": 16},
+    "downloads": {"timeout": 60.0, "max_connections": 16},
+    "google": {"timeout": 60.0, "max_connections": 16},
+    "dropbox": {"timeout": 60.0, "max_connections": 16},
+    "cognito": {"timeout": 10.0, "max_connections": 8},
+}
+HTTP_CONNECT_TIMEOUT = 5.0
+HTTP_POOL_TIMEOUT = 10.0
+HTTP_KEEPALIVE_EXPIRY = 30.0
+
+BOTO3_MAX_POOL_CONNECTIONS = 50
+BOTO3_ENDPOINT_URLS = {"cognito-idp": COGNITO_ENDPOINT_URL}
+
+_lock = threading.Lock()
+_http_clients = {}
+_async_http_clients = {}
+_boto3_clients = {}
+
+
+def _http_client_options(name: str):
+    settings = HTTP_CLIENT_SETTINGS.get(name, HTTP_CLIENT_SETTINGS["default"])
+    return {
+        "timeout": httpx.Timeout(
+            settings["timeout"], connect=HTTP_CONNECT_TIMEOUT, pool=HTTP_POOL_TIMEOUT
+        ),
+        "limits": httpx.Limits(
+            max_connections=settings["max_connections"],
+            max_keepalive_connections=settings["max_connections"],
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "http2": HTTP2_ENABLED,
+    }
+
+
+def get_http_client(name: str = "default"):
+    client = _http_clients.get(name)
+    if client is None or client.is_closed:
+        with _lock:
+            client = _http_clients.get(name)
+            if client is None or client.is_closed:
+                client = httpx.Client(**_http_client_options(name))
+                _http_clients[name] = client
+    return client
+
+
+def get_async_http_client(name: str = "default"):
+    client = _async_http_clients.get(name)
+    if client is None or client.is_closed:
+        with _lock:
+            client = _async_http_clients.get(name)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(**_http_client_options(name))
+                _async_http_clients[name] = client
+    return client
+
+
+def get_boto3_client(service_name: str):
+    client = _boto3_clients.get(service_name)
+    if client is None:
+        with _lock:
+            client = _boto3_clients.get(service_name)
+            if client is None:
+                # Imported on first use, boto3/botocore add noticeably to startup time
+                import boto3
+                from botocore.config import Config
+
+                # boto3 clients are thread safe once created, creation itself is not
+                client = boto3.client(
+                    service_name,
+                    region_name=AWS_REGION,
+                    endpoint_url=BOTO3_ENDPOINT_URLS.get(service_name) or None,
+                    config=Config(max_pool_connections=BOTO3_MAX_POOL_CONNECTIONS),
+                )
+                _boto3_clients[service_name] = client
+    return client
+
+
+async def close_clients():
+    with _lock:
+        http_clients = list(_http_clients.values())
+        async_http_clients = list(_async_http_clients.values())
+        boto3_clients = list(_boto3_clients.values())
+        _http_clients.clear()
+        _async_http_clients.clear()
+        _boto3_clients.clear()
+
+    for client in http_clients + boto3_clients:
+        client.close()
+    for client in async_http_clients:
+        await client.aclose()
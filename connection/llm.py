@@ -0,0 +1,75 @@
+from connection.clients import get_http_client, get_async_http_client
+from config.constants import (
+    OPEN_API_KEY,
+    OPENAI_API_BASE,
+    LLM_MODEL_NAME,
+    EMBEDDING_MODEL_NAME,
+)
+import threading
+
+# Retries are owned by helpers/rate_limiter.py so they respect the shared budgets
+SDK_MAX_RETRIES = 0
+
+_lock = threading.Lock()
+_models = {}
+
+
+def _get_or_create(key, factory):
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                model = factory()
+                _models[key] = model
+    return model
+
+
+# The SDKs are imported inside the factories, llama_index alone takes seconds to import
+
+
+# Chat model used for answers and conversation titles
+def get_llm(model_name: str = LLM_MODEL_NAME):
+    def create():
+        from llama_index.llms.openai import OpenAI
+
+        return OpenAI(
+            model=model_name,
+            temperature=0.7,
+            api_key=OPEN_API_KEY,
+            api_base=OPENAI_API_BASE or None,
+            max_retries=SDK_MAX_RETRIES,
+            http_client=get_http_client("openai"),
+        )
+
+    return _get_or_create(f"llm:{model_name}", create)
+
+
+def get_embed_model():
+    def create():
+        from llama_index.embeddings.openai import OpenAIEmbedding
+
+        return OpenAIEmbedding(
+            model_name=EMBEDDING_MODEL_NAME,
+            api_key=OPEN_API_KEY,
+            api_base=OPENAI_API_BASE or None,
+            max_retries=SDK_MAX_RETRIES,
+            http_client=get_http_client("openai"),
+        )
+
+    return _get_or_create("embed_model", create)
+
+
+# Raw async OpenAI client for calls that need the chat completions API directly
+def get_async_openai_client():
+    def create():
+        import openai
+
+        return openai.AsyncOpenAI(
+            api_key=OPEN_API_KEY,
+            base_url=OPENAI_API_BASE or None,
+            max_retries=SDK_MAX_RETRIES,
+            http_client=get_async_http_client("openai"),
+        )
+
+    return _get_or_create("async_openai_client", create)
@@ -1,9 +1,11 @@
-from pymilvus import connections, db, Collection, utility
 import configparser
+import threading
 import os
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-CONFIG_PATH = os.path.join(BASE_DIR, "../config/config.ini")
+CONFIG_PATH = os.environ.get(
+    "KB_CONFIG_PATH", os.path.join(BASE_DIR, "../config/config.ini")
+)
 
 config = configparser.ConfigParser()
 config.read(CONFIG_PATH)
@@ -11,11 +13,30 @@ config.read(CONFIG_PATH)
 host = config.get("Milvus", "host")
 port = config.get("Milvus", "port")
 
-connections.connect(uri=host, port=port)
+_connect_lock = threading.Lock()
+_connected = False
+
+
+# Connects on first use (or from the app lifespan), not at import
+def connect_milvus(timeout: float = None):
+    global _connected
+    if _connected:
+        return
+    with _connect_lock:
+        if not _connected:
+            from pymilvus import connections
+
+            connections.connect(
+                uri=host, port=port, **({"timeout": timeout} if timeout else {})
+            )
+            _connected = True
 
 
 def create_or_load_db(db_name):
+    from pymilvus import db
+
     try:
+        connect_milvus()
         if db_name not in db.list_database():
             db.create_database(db_name)
         db.using_database(db_name)
@@ -25,6 +46,9 @@ def create_or_load_db(db_name):
 
 
 def create_or_load_collection(collection_name, schema=None):
+    from pymilvus import Collection, utility
+
+    connect_milvus()
     collection = None
 
     if collection_name in utility.list_collections():
@@ -40,5 +64,30 @@ def create_or_load_collection(collection_name, schema=None):
 
 
 def get_collections(dbname: str):
+    from pymilvus import utility
+
     create_or_load_db(dbname)
     return utility.list_collections()
+
+
+# The timeouts end the gRPC calls, a timed out wait_for leaves the thread running
+def ping_milvus(timeout: float = None):
+    from pymilvus import utility
+
+    connect_milvus(timeout)
+    return utility.get_server_version(timeout=timeout)
+
+
+# partial_update needs Milvus 2.6+ and pymilvus 2.6+. The server merges the sent
+# fields into the stored entity under the pk given, also with auto_id, so text
+# and embeddings are never resent. Pages that come back under other pks were
+# re-keyed instead of updated, which fails the caller rather than going unseen.
+def upsert_partial(collection, rows):
+    result = collection.upsert(rows, partial_update=True)
+    sent_pks = [row["id"] for row in rows]
+    if list(result.primary_keys) != sent_pks:
+        raise RuntimeError(
+            f"Milvus upsert re-keyed pages: sent {sent_pks[:5]}, "
+            f"got {list(result.primary_keys)[:5]}"
+        )
+    return result
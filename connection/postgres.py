@@ -1,11 +1,25 @@
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.orm import sessionmaker
-from config.constants import GLOBAL_DATABASE_NAME
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from config.constants import (
+    GLOBAL_DATABASE_NAME,
+    TENANT_ENGINE_LIMIT,
+    TENANT_ENGINE_IDLE_SECONDS,
+    TENANT_POOL_SIZE,
+    TENANT_MAX_OVERFLOW,
+)
+from schemas.all_schemas import metadata
+from collections import OrderedDict
 import configparser
+import threading
+import time
 import os
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-CONFIG_PATH = os.path.join(BASE_DIR, "../config/config.ini")
+CONFIG_PATH = os.environ.get(
+    "KB_CONFIG_PATH", os.path.join(BASE_DIR, "../config/config.ini")
+)
+ALEMBIC_CONFIG_PATH = os.path.join(BASE_DIR, "../alembic.ini")
 
 config = configparser.ConfigParser()
 config.read(CONFIG_PATH)
@@ -26,32 +40,201 @@ engine_pool = create_engine(
     echo=False,
 )
 
+# Same pool settings on asyncpg, used by the request handlers
+async_engine_pool = create_async_engine(
+    f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{GLOBAL_DATABASE_NAME}",
+    pool_size=10,
+    max_overflow=20,
+    pool_timeout=5,
+    pool_recycle=1800,
+    echo=False,
+)
+
 # Created a session for the engine
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine_pool)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine_pool, autoflush=False, expire_on_commit=False
+)
 
+# New physical connections vs checkouts, shows whether the pools are being reused
+_pool_stats_lock = threading.Lock()
+pool_stats = {}
+_tracked_engines = {}
 
-# Get the global session
-def get_db_engine():
+
+def _track_pool(name: str, engine):
+    pool_stats[name] = {"connections_opened": 0, "checkouts": 0}
+    _tracked_engines[name] = engine
+
+    @event.listens_for(engine, "connect")
+    def count_connect(dbapi_connection, connection_record):
+        with _pool_stats_lock:
+            pool_stats[name]["connections_opened"] += 1
+
+    @event.listens_for(engine, "checkout")
+    def count_checkout(dbapi_connection, connection_record, connection_proxy):
+        with _pool_stats_lock:
+            pool_stats[name]["checkouts"] += 1
+
+
+_track_pool("sync", engine_pool)
+_track_pool("async", async_engine_pool.sync_engine)
+
+
+# Request scoped session, the connection goes back to the pool when the request ends
+def get_db():
     db = SessionLocal()
     try:
-        return db, engine_pool
+        yield db
     finally:
         db.close()
 
 
-# Load All global connection tables
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Get the global session, the caller must close it with close_connection
+def get_db_engine():
+    return SessionLocal(), engine_pool
+
+
+def check_connection():
+    try:
+        with engine_pool.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return True
+    except Exception as e:
+        print(f"Error connecting to PostgreSQL database {GLOBAL_DATABASE_NAME}: {e}")
+        return False
+
+
+def get_pool_stats():
+    result = {}
+    for name, engine in _tracked_engines.items():
+        pool = engine.pool
+        with _pool_stats_lock:
+            stats = dict(pool_stats[name])
+        stats.update(
+            {
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            }
+        )
+        stats["reuse_ratio"] = (
+            round(1 - stats["connections_opened"] / stats["checkouts"], 4)
+            if stats["checkouts"]
+            else 0.0
+        )
+        result[name] = stats
+    return result
+
+
+# All global connection tables, declared in schemas/all_schemas.py (no reflection)
 def load_all_tables():
-    metadataCollection = MetaData()
-    metadataCollection.reflect(bind=engine_pool)
-    return metadataCollection
+    return metadata
+
+
+# Applies the versioned migrations in migrations/ up to the given revision
+def upgrade_database(revision: str = "head"):
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(ALEMBIC_CONFIG_PATH), revision)
+
+
+_schema_verification = None
+
+
+def verify_tables_against_db():
+    # Compares the declared tables with the live database, a clean result is kept
+    global _schema_verification
+    if _schema_verification is not None:
+        return _schema_verification
+
+    inspector = inspect(engine_pool)
+    existing_tables = set(inspector.get_table_names())
+    mismatches = {}
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            mismatches[table.name] = "table is missing"
+            continue
+        existing_columns = {
+            column["name"] for column in inspector.get_columns(table.name)
+        }
+        missing_columns = sorted(set(table.columns.keys()) - existing_columns)
+        if missing_columns:
+            mismatches[table.name] = f"missing columns: {', '.join(missing_columns)}"
+
+    for table_name, problem in mismatches.items():
+        print(f"Schema mismatch in '{table_name}': {problem}")
+    if not mismatches:
+        _schema_verification = mismatches
+    return mismatches
+
+
+# One small pool per tenant database, least recently used first
+_tenant_engines_lock = threading.Lock()
+_tenant_engines = OrderedDict()
+tenant_engine_stats = {"created": 0, "reused": 0, "evicted": 0}
+
+
+def _create_tenant_engine(database: str):
+    return create_engine(
+        f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{database}",
+        pool_size=TENANT_POOL_SIZE,
+        max_overflow=TENANT_MAX_OVERFLOW,
+        pool_timeout=5,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        echo=False,
+    )
 
 
 def get_engine(db_name=None):
     database = db_name if db_name else DB_NAME
-    database_url = (
-        f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{database}"
-    )
-    return create_engine(database_url, echo=False)
+    now = time.monotonic()
+    evicted = []
+    with _tenant_engines_lock:
+        entry = _tenant_engines.pop(database, None)
+        if entry:
+            engine = entry[0]
+            tenant_engine_stats["reused"] += 1
+        else:
+            engine = _create_tenant_engine(database)
+            tenant_engine_stats["created"] += 1
+        _tenant_engines[database] = (engine, now)
+
+        # Oldest first, stop at the first pool that is neither idle nor over the bound
+        for name, (other, last_used) in list(_tenant_engines.items()):
+            over_limit = len(_tenant_engines) > TENANT_ENGINE_LIMIT
+            if name == database or (
+                not over_limit and now - last_used < TENANT_ENGINE_IDLE_SECONDS
+            ):
+                break
+            del _tenant_engines[name]
+            evicted.append(other)
+        tenant_engine_stats["evicted"] += len(evicted)
+
+    # Checked out connections stay usable, they are closed when returned
+    for other in evicted:
+        other.dispose()
+    return engine
+
+
+def dispose_tenant_engines():
+    with _tenant_engines_lock:
+        engines = [engine for engine, _ in _tenant_engines.values()]
+        _tenant_engines.clear()
+    for engine in engines:
+        engine.dispose()
+
+
+def get_tenant_engine_stats():
+    with _tenant_engines_lock:
+        return {**tenant_engine_stats, "open_pools": len(_tenant_engines)}
 
 
 def get_connection():
@@ -66,8 +249,7 @@ def get_connection():
 def get_session(db_name=None):
     try:
         engine = get_engine(db_name)
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-        db = SessionLocal()
+        db = Session(bind=engine, autoflush=False)
         return db, engine
     except Exception as e:
         print(f"Error connecting to PostgreSQL database {db_name}: {e}")
@@ -75,9 +257,7 @@ def get_session(db_name=None):
 
 
 def close_connection(db, engine):
+    # Engines are shared (engine_pool and the tenant registry), only close the session
     if db:
         db.close()
         print("Session closed")
-    if engine:
-        engine.dispose()
-        print("Engine disposed")
@@ -1,15 +1,39 @@
 from fastapi import HTTPException, status
-from services.chats_service import list_chat_threads
-from request_types.chats import ListChatThreadsRequest
+from sqlalchemy.ext.asyncio import AsyncSession
+from services.chats_service import list_chat_threads, get_conversation_history
+from request_types.chats import ListChatThreadsRequest, ConversationHistoryRequest
+from helpers.service import list_response
 
 
-def list_chat_threads_controller(request: ListChatThreadsRequest):
-    data = list_chat_threads(request)
+async def list_chat_threads_controller(
+    request: ListChatThreadsRequest, db: AsyncSession
+):
+    data = await list_chat_threads(request, db)
     if data["error"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
         )
-    return {
-        "data": data["data"],
-        "status": "success",
-    }
+    return list_response(
+        {
+            "data": data["data"],
+            "next_cursor": data["next_cursor"],
+            "status": "success",
+        }
+    )
+
+
+async def get_conversation_history_controller(
+    request: ConversationHistoryRequest, username: str, db: AsyncSession
+):
+    data = await get_conversation_history(request, username, db)
+    if data["error"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
+        )
+    return list_response(
+        {
+            "data": data["data"],
+            "next_cursor": data["next_cursor"],
+            "status": "success",
+        }
+    )
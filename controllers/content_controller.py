@@ -1,4 +1,5 @@
-from fastapi import HTTPException, status, UploadFile, BackgroundTasks
+from fastapi import HTTPException, status, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
 from services.scrape_service import (
     scrape_content_data,
     scrape_cloud_data,
@@ -17,7 +18,11 @@ from request_types.contents import (
     EditContentRequest,
     ParseContentRequest,
 )
-from services.parsing_service import parse_contents
+from services.ingestion_jobs_service import (
+    queue_content_ingestion,
+    view_ingestion_job,
+)
+from helpers.service import list_response
 
 
 async def fetch_scrape_content_controller(request: ScrapeDataRequest):
@@ -38,10 +43,9 @@ async def fetch_scrape_content_controller(request: ScrapeDataRequest):
 async def create_content_controller(
     request: CreateContentRequest,
     file: UploadFile,
-    backgroundTask: BackgroundTasks,
-    authorization,
+    db: AsyncSession,
 ):
-    data = create_content(request, file, backgroundTask, authorization)
+    data = await create_content(request, file, db)
     if data["error"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
@@ -49,12 +53,11 @@ async def create_content_controller(
     return {"data": data["data"], "status": "success"}
 
 
-def edit_content_controller(
+async def edit_content_controller(
     request: EditContentRequest,
-    backgroundTask: BackgroundTasks,
-    authorization,
+    db: AsyncSession,
 ):
-    data = edit_content(request, backgroundTask, authorization)
+    data = await edit_content(request, db)
     if data["error"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
@@ -62,8 +65,24 @@ def edit_content_controller(
     return {"data": data["data"], "status": "success"}
 
 
-def get_contents_controller(request: CreateContentRequest):
-    data = get_contents(request)
+async def get_contents_controller(request: CreateContentRequest, db: AsyncSession):
+    data = await get_contents(request, db)
+    if data["error"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
+        )
+    return list_response(
+        {
+            "data": data["data"],
+            "next_cursor": data["next_cursor"],
+            "total_estimate": data["total_estimate"],
+            "status": "success",
+        }
+    )
+
+
+async def view_content_controller(id: int, db: AsyncSession):
+    data = await view_content(id, db)
     if data["error"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
@@ -71,8 +90,8 @@ def get_contents_controller(request: CreateContentRequest):
     return {"data": data["data"], "status": "success"}
 
 
-def view_content_controller(id: int):
-    data = view_content(id)
+async def delete_content_controller(id: int, db: AsyncSession):
+    data = await delete_content(id, db)
     if data["error"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
@@ -80,8 +99,8 @@ def view_content_controller(id: int):
     return {"data": data["data"], "status": "success"}
 
 
-def delete_content_controller(id: int):
-    data = delete_content(id)
+async def parse_content_controller(request: ParseContentRequest, db: AsyncSession):
+    data = await queue_content_ingestion(request, db)
     if data["error"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
@@ -89,8 +108,8 @@ def delete_content_controller(id: int):
     return {"data": data["data"], "status": "success"}
 
 
-async def parse_content_controller(request: ParseContentRequest, file: UploadFile):
-    data = await parse_contents(request, file)
+async def view_ingestion_job_controller(content_id: int, db: AsyncSession):
+    data = await view_ingestion_job(content_id, db)
     if data["error"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
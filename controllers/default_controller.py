@@ -1,5 +1,8 @@
 from fastapi import HTTPException, status
-from services.default_service import add_default_tables_in_postgres_db
+from services.default_service import (
+    add_default_tables_in_postgres_db,
+    get_service_metrics,
+)
 
 
 def create_default_tables_in_ps_controller():
@@ -9,3 +12,12 @@ def create_default_tables_in_ps_controller():
             status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
         )
     return {"data": data["data"], "status": "success"}
+
+
+def get_service_metrics_controller():
+    data = get_service_metrics()
+    if data["error"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
+        )
+    return {"data": data["data"], "status": "success"}
@@ -0,0 +1,14 @@
+from fastapi import status
+from fastapi.responses import JSONResponse
+from services.readiness_service import check_readiness
+
+
+async def get_readiness_controller():
+    data = await check_readiness()
+    if not data["ready"]:
+        # The load balancer keeps this worker out of rotation until it is warm
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"data": data, "status": "unavailable"},
+        )
+    return {"data": data, "status": "success"}
@@ -1,10 +1,13 @@
 from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from services.search_service import search_knowledge_base
 from request_types.search import SearchKnowledgeBaseRequest
 
 
-def search_knowledge_base_controller(request: SearchKnowledgeBaseRequest):
-    data = search_knowledge_base(request)
+async def search_knowledge_base_controller(
+    request: SearchKnowledgeBaseRequest, db: AsyncSession
+):
+    data = await search_knowledge_base(request, db)
     if data["error"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
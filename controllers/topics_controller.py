@@ -1,16 +1,22 @@
-from fastapi import HTTPException, status
+from fastapi import HTTPException, status, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from services.topics_service import (
     create_topics,
     edit_topics,
     get_topics_list,
+    get_topics_list_version,
     delete_topic,
     view_topic,
+    topic_list_cache,
 )
 from request_types.topics import AddTopicRequest, EditTopicRequest, GetTopicRequest
+from response_types.topics import GetTopicResponse
+from helpers.response_cache import etag_matches
+from helpers.service import encode_json
 
 
-def create_topics_controller(request: AddTopicRequest):
-    data = create_topics(request)
+async def create_topics_controller(request: AddTopicRequest, db: AsyncSession):
+    data = await create_topics(request, db)
     if data["error"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
@@ -18,8 +24,8 @@ def create_topics_controller(request: AddTopicRequest):
     return {"data": data["data"], "status": "success"}
 
 
-def edit_topics_controller(request: EditTopicRequest):
-    data = edit_topics(request)
+async def edit_topics_controller(request: EditTopicRequest, db: AsyncSession):
+    data = await edit_topics(request, db)
     if data["error"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
@@ -27,17 +33,44 @@ def edit_topics_controller(request: EditTopicRequest):
     return {"data": data["data"], "status": "success"}
 
 
-def get_topics_controller(request: GetTopicRequest):
-    data = get_topics_list(request)
-    if data["error"]:
+async def get_topics_controller(
+    request: GetTopicRequest, db: AsyncSession, if_none_match: str = None
+):
+    version = await get_topics_list_version(db)
+    if version["error"]:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
+            status_code=status.HTTP_400_BAD_REQUEST, detail=version["error"]
         )
-    return {"data": data["data"], "status": "success"}
+
+    # The scope and page fields are the key, the topics version in Postgres the ETag
+    cache_key = request.model_dump_json()
+    etag = topic_list_cache.etag(cache_key, version["data"])
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        topic_list_cache.count_not_modified()
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = topic_list_cache.get(cache_key, version["data"])
+    if body is None:
+        data = await get_topics_list(request, db)
+        if data["error"]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
+            )
+        body = encode_json(
+            {
+                "data": data["data"],
+                "next_cursor": data["next_cursor"],
+                "status": "success",
+            },
+            GetTopicResponse,
+        )
+        topic_list_cache.set(cache_key, version["data"], body)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
-def view_topic_controller(id: str):
-    data = view_topic(id)
+async def view_topic_controller(id: str, db: AsyncSession):
+    data = await view_topic(id, db)
     if data["error"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
@@ -45,8 +78,8 @@ def view_topic_controller(id: str):
     return {"data": data["data"], "status": "success"}
 
 
-def delete_topic_controller(id: str):
-    data = delete_topic(id)
+async def delete_topic_controller(id: str, db: AsyncSession):
+    data = await delete_topic(id, db)
     if data["error"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=data["error"]
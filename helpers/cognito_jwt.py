@@ -0,0 +1,138 @@
+from connection.clients import get_async_http_client
+from config.constants import (
+    COGNITO_ISSUER,
+    COGNITO_APP_CLIENT_IDS,
+    JWKS_REFRESH_SECONDS,
+    JWKS_MIN_REFRESH_SECONDS,
+    AUTH_TOKEN_CACHE_SECONDS,
+    AUTH_TOKEN_CACHE_SIZE,
+)
+from collections import OrderedDict
+import asyncio
+import hashlib
+import threading
+import time
+import jwt
+
+
+class JwksUnavailableError(Exception):
+    pass
+
+
+class CognitoJwtVerifier:
+    """Verifies Cognito access tokens locally against the pool's JWKS.
+
+    The key set is fetched once, refreshed every JWKS_REFRESH_SECONDS and
+    refetched early when a token names an unknown key id (key rotation). A
+    failed refresh keeps serving the keys it already has.
+    """
+
+    def __init__(self, issuer: str, client_ids: list):
+        self.issuer = issuer
+        self.client_ids = client_ids
+        self.jwks_url = f"{issuer}/.well-known/jwks.json"
+        self._keys = {}
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self.stats = {"verified": 0, "rejected": 0, "jwks_fetches": 0}
+
+    async def _refresh(self, min_age: float):
+        async with self._lock:
+            # Another request may have refreshed while this one waited
+            if self._keys and time.monotonic() - self._fetched_at < min_age:
+                return
+            try:
+                response = await get_async_http_client("cognito").get(self.jwks_url)
+                response.raise_for_status()
+                self._keys = {
+                    key["kid"]: jwt.PyJWK(key) for key in response.json()["keys"]
+                }
+                self.stats["jwks_fetches"] += 1
+            except Exception as e:
+                print(f"Error fetching Cognito JWKS from {self.jwks_url}: {e}")
+                if not self._keys:
+                    raise JwksUnavailableError(str(e))
+            finally:
+                self._fetched_at = time.monotonic()
+
+    async def _signing_key(self, kid: str):
+        if time.monotonic() - self._fetched_at >= JWKS_REFRESH_SECONDS:
+            await self._refresh(JWKS_REFRESH_SECONDS)
+        key = self._keys.get(kid)
+        if key is None:
+            await self._refresh(JWKS_MIN_REFRESH_SECONDS)
+            key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        return key
+
+    async def verify(self, token: str):
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            claims = jwt.decode(
+                token,
+                key=await self._signing_key(kid),
+                algorithms=["RS256"],
+                issuer=self.issuer,
+                options={"require": ["exp", "iss", "token_use"], "verify_aud": False},
+            )
+            if claims["token_use"] != "access":
+                raise jwt.InvalidTokenError("Not an access token")
+            if self.client_ids and claims.get("client_id") not in self.client_ids:
+                raise jwt.InvalidTokenError("Token issued to an unknown client")
+        except jwt.InvalidTokenError:
+            self.stats["rejected"] += 1
+            raise
+        self.stats["verified"] += 1
+        return claims
+
+
+class TokenCache:
+    """Short lived cache of authenticated users, keyed by a hash of the token."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def _key(token: str):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[0]
+            self._entries.pop(key, None)
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, token: str, value, expires_at: float = None):
+        # Never past the token's own expiry
+        expires = time.time() + self.ttl_seconds
+        if expires_at:
+            expires = min(expires, expires_at)
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries)}
+
+
+jwt_verifier = CognitoJwtVerifier(COGNITO_ISSUER, COGNITO_APP_CLIENT_IDS)
+token_cache = TokenCache(AUTH_TOKEN_CACHE_SECONDS, AUTH_TOKEN_CACHE_SIZE)
+
+
+def get_auth_stats():
+    return {"jwt": dict(jwt_verifier.stats), "token_cache": token_cache.get_stats()}
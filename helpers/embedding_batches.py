@@ -0,0 +1,157 @@
+from helpers.rate_limiter import embedding_scheduler, PRIORITY_INGESTION
+from connection.llm import get_async_openai_client
+from config.constants import (
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_BATCH_MAX_TOKENS,
+    EMBEDDING_BATCH_MAX_INPUTS,
+    EMBEDDING_BATCH_CONCURRENCY,
+    EMBEDDING_MAX_INPUT_TOKENS,
+)
+import asyncio
+import math
+import threading
+
+# Without tiktoken pages are cut at this many characters per token, below the
+# usual ~4 so a page is not sent over the input limit on a low estimate
+FALLBACK_CHARS_PER_TOKEN = 3
+
+_encoding_lock = threading.Lock()
+_encoding = None
+_encoding_loaded = False
+
+
+def get_encoding():
+    # tiktoken is optional and may need to download its BPE file, None means count by length
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+
+                    try:
+                        _encoding = tiktoken.encoding_for_model(EMBEDDING_MODEL_NAME)
+                    except KeyError:
+                        _encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    print(f"tiktoken not available, estimating tokens by length: {e}")
+                    _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str):
+    encoding = get_encoding()
+    if encoding is None:
+        return max(1, math.ceil(len(text) / FALLBACK_CHARS_PER_TOKEN))
+    return max(1, len(encoding.encode(text, disallowed_special=())))
+
+
+def split_text(text: str, max_tokens: int = EMBEDDING_MAX_INPUT_TOKENS):
+    encoding = get_encoding()
+    if encoding is None:
+        size = max_tokens * FALLBACK_CHARS_PER_TOKEN
+        chunks = [text[start : start + size] for start in range(0, len(text), size)]
+    else:
+        tokens = encoding.encode(text, disallowed_special=())
+        chunks = [
+            encoding.decode(tokens[start : start + max_tokens])
+            for start in range(0, len(tokens), max_tokens)
+        ]
+    return [(chunk, count_tokens(chunk)) for chunk in chunks]
+
+
+def plan_batches(texts):
+    """Groups page texts into embedding requests.
+
+    Returns the batches as lists of (page index, text, tokens) and the number
+    of pages that had to be split. A page over the model input limit becomes
+    several inputs, each batch stays under EMBEDDING_BATCH_MAX_TOKENS and
+    EMBEDDING_BATCH_MAX_INPUTS.
+    """
+    inputs = []
+    split_pages = 0
+    for index, text in enumerate(texts):
+        # Same normalization as the llama_index model used for search queries
+        text = (text or " ").replace("\n", " ")
+        tokens = count_tokens(text)
+        if tokens <= EMBEDDING_MAX_INPUT_TOKENS:
+            inputs.append((index, text, tokens))
+            continue
+        split_pages += 1
+        inputs.extend((index, chunk, count) for chunk, count in split_text(text))
+
+    batches = []
+    batch, batch_tokens = [], 0
+    for item in inputs:
+        if batch and (
+            batch_tokens + item[2] > EMBEDDING_BATCH_MAX_TOKENS
+            or len(batch) >= EMBEDDING_BATCH_MAX_INPUTS
+        ):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += item[2]
+    if batch:
+        batches.append(batch)
+    return batches, split_pages
+
+
+async def embed_batch(batch, semaphore: asyncio.Semaphore):
+    async with semaphore:
+        response = await embedding_scheduler.call_async(
+            PRIORITY_INGESTION,
+            sum(tokens for _, _, tokens in batch),
+            get_async_openai_client().embeddings.create,
+            model=EMBEDDING_MODEL_NAME,
+            input=[text for _, text, _ in batch],
+        )
+    return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+
+def average_embeddings(parts):
+    # Token weighted mean of the chunk vectors, normalized like the model output
+    total = sum(tokens for _, tokens in parts)
+    vector = [
+        sum(embedding[i] * tokens for embedding, tokens in parts) / total
+        for i in range(len(parts[0][0]))
+    ]
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+async def embed_texts(texts):
+    """Embeds page texts in token sized batches, concurrently under the rate limiter.
+
+    Returns one embedding per text, in order, and the stats of the run.
+    """
+    batches, split_pages = plan_batches(texts)
+    stats = {
+        "pages": len(texts),
+        "inputs": sum(len(batch) for batch in batches),
+        "split_pages": split_pages,
+        "tokens": sum(tokens for batch in batches for _, _, tokens in batch),
+        "embedding_calls": len(batches),
+    }
+    if not batches:
+        return [], stats
+
+    semaphore = asyncio.Semaphore(EMBEDDING_BATCH_CONCURRENCY)
+    tasks = [asyncio.ensure_future(embed_batch(batch, semaphore)) for batch in batches]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    parts = [[] for _ in texts]
+    for batch, embeddings in zip(batches, results):
+        for (index, _, tokens), embedding in zip(batch, embeddings):
+            parts[index].append((embedding, tokens))
+
+    embeddings = [
+        page_parts[0][0] if len(page_parts) == 1 else average_embeddings(page_parts)
+        for page_parts in parts
+    ]
+    return embeddings, stats
@@ -0,0 +1,101 @@
+from connection.postgres import load_all_tables
+from config.constants import INGESTION_CHECKPOINTS_TABLE_NAME
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+
+metadataCollection = load_all_tables()
+
+
+class IngestionCheckpoints:
+    """Per-page progress of one content's ingestion, kept in Postgres.
+
+    Every stage of the pipeline records what it produced for a batch of pages
+    and commits, so a failed parse resumes with only the missing work. The
+    stages run concurrently on one session, the lock keeps their statements
+    from interleaving.
+    """
+
+    def __init__(self, db: AsyncSession, content_id: int):
+        self.db = db
+        self.content_id = int(content_id)
+        self.table = metadataCollection.tables[INGESTION_CHECKPOINTS_TABLE_NAME]
+        self._lock = asyncio.Lock()
+
+    async def load(self):
+        table = self.table
+        result = await self.db.execute(
+            table.select()
+            .with_only_columns(
+                table.c.page,
+                table.c.markdown,
+                table.c.page_metadata,
+                table.c.embedding,
+                table.c.inserted,
+            )
+            .where(table.c.content_id == self.content_id)
+            .order_by(table.c.page)
+        )
+        return [
+            {
+                "page": row["page"],
+                "md": row["markdown"],
+                "metadata": row["page_metadata"],
+                "embedding": row["embedding"],
+                "inserted": row["inserted"],
+            }
+            for row in result.mappings()
+        ]
+
+    async def save_pages(self, pages):
+        rows = [
+            {"content_id": self.content_id, "page": page["page"], "markdown": page["md"]}
+            for page in pages
+        ]
+        async with self._lock:
+            await self.db.execute(
+                insert(self.table).values(rows).on_conflict_do_nothing()
+            )
+            await self.db.commit()
+
+    async def _update_pages(self, values: dict, rows):
+        table = self.table
+        async with self._lock:
+            await self.db.execute(
+                update(table)
+                .where(
+                    table.c.content_id == self.content_id,
+                    table.c.page == bindparam("b_page"),
+                )
+                .values(updated_at=func.now(), **values),
+                rows,
+            )
+            await self.db.commit()
+
+    async def save_metadata(self, pages):
+        await self._update_pages(
+            {"page_metadata": bindparam("b_metadata")},
+            [{"b_page": page["page"], "b_metadata": page["metadata"]} for page in pages],
+        )
+
+    async def save_embeddings(self, pages):
+        await self._update_pages(
+            {"embedding": bindparam("b_embedding")},
+            [
+                {"b_page": page["page"], "b_embedding": page["embedding"]}
+                for page in pages
+            ],
+        )
+
+    async def mark_inserted(self, pages):
+        await self._update_pages(
+            {"inserted": True}, [{"b_page": page["page"]} for page in pages]
+        )
+
+    async def clear(self):
+        # Part of the caller's transaction, committed with the stored_in_kb update
+        async with self._lock:
+            await self.db.execute(
+                self.table.delete().where(self.table.c.content_id == self.content_id)
+            )
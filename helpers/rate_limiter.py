@@ -0,0 +1,280 @@
+from config.constants import (
+    OPENAI_LLM_REQUESTS_PER_MINUTE,
+    OPENAI_LLM_TOKENS_PER_MINUTE,
+    OPENAI_EMBEDDING_REQUESTS_PER_MINUTE,
+    OPENAI_EMBEDDING_TOKENS_PER_MINUTE,
+    OPENAI_INTERACTIVE_RESERVE,
+    OPENAI_MAX_RETRIES,
+)
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+
+# Priority lanes, lower value is served first
+PRIORITY_SEARCH = 0
+PRIORITY_TITLE = 1
+PRIORITY_INGESTION = 2
+LANE_NAMES = {
+    PRIORITY_SEARCH: "search",
+    PRIORITY_TITLE: "title",
+    PRIORITY_INGESTION: "ingestion",
+}
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+# openai and httpx network errors, matched by name to keep the SDKs out of this module
+TRANSIENT_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "TimeoutException",
+    "ConnectError",
+    "ReadTimeout",
+}
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+# Waiters that are not at the head of the queue re-check at this interval
+IDLE_POLL_SECONDS = 0.05
+
+
+def estimate_tokens(text: str, completion_tokens: int = 0):
+    # ~4 characters per token for English text, close enough for pacing
+    return max(1, len(text or "") // 4) + completion_tokens
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.refill_per_second = self.capacity / 60.0
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, floor: float = 0.0):
+        # Seconds until `amount` can be taken while leaving `floor` in the bucket
+        missing = amount + floor - self.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.refill_per_second
+
+    def consume(self, amount: float):
+        self.tokens -= amount
+
+
+class LLMScheduler:
+    """Paces upstream calls against requests- and tokens-per-minute budgets.
+
+    Callers queue by priority lane. Only the head of the queue may take
+    capacity, so interactive search always goes before titles and ingestion,
+    and lower lanes must leave a reserve of both budgets untouched.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        interactive_reserve: float = OPENAI_INTERACTIVE_RESERVE,
+        max_retries: int = OPENAI_MAX_RETRIES,
+    ):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.interactive_reserve = interactive_reserve
+        self.max_retries = max_retries
+        self._cond = threading.Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self.stats = {
+            lane: {
+                "requests": 0,
+                "retries": 0,
+                "rate_limited": 0,
+                "failures": 0,
+                "wait_seconds": 0.0,
+            }
+            for lane in LANE_NAMES.values()
+        }
+
+    def _try_acquire(self, ticket, priority: int, tokens: float):
+        # Returns 0 once capacity was taken, otherwise seconds to wait (caller holds the lock)
+        now = time.monotonic()
+        if self._queue[0] != ticket:
+            return IDLE_POLL_SECONDS
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        reserve = 0.0 if priority == PRIORITY_SEARCH else self.interactive_reserve
+        tokens = min(tokens, self.tokens.capacity * (1 - reserve))
+        wait = max(
+            self.requests.wait_time(1, self.requests.capacity * reserve),
+            self.tokens.wait_time(tokens, self.tokens.capacity * reserve),
+        )
+        if wait > 0:
+            return wait
+
+        self.requests.consume(1)
+        self.tokens.consume(tokens)
+        heapq.heappop(self._queue)
+        self._cond.notify_all()
+        return 0
+
+    def _enqueue(self, priority: int):
+        ticket = (priority, next(self._sequence))
+        heapq.heappush(self._queue, ticket)
+        self._cond.notify_all()
+        return ticket
+
+    def _abandon(self, ticket):
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+            self._cond.notify_all()
+
+    def _record_wait(self, priority: int, started: float):
+        lane = self.stats[LANE_NAMES[priority]]
+        lane["requests"] += 1
+        lane["wait_seconds"] += time.monotonic() - started
+
+    def acquire(self, priority: int, tokens: float):
+        started = time.monotonic()
+        with self._cond:
+            ticket = self._enqueue(priority)
+            try:
+                while True:
+                    wait = self._try_acquire(ticket, priority, tokens)
+                    if wait == 0:
+                        self._record_wait(priority, started)
+                        return
+                    self._cond.wait(timeout=wait)
+            except BaseException:
+                self._abandon(ticket)
+                raise
+
+    async def acquire_async(self, priority: int, tokens: float):
+        started = time.monotonic()
+        with self._cond:
+            ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_acquire(ticket, priority, tokens)
+                    if wait == 0:
+                        self._record_wait(priority, started)
+                        return
+                await asyncio.sleep(min(wait, 1.0))
+        except BaseException:
+            with self._cond:
+                self._abandon(ticket)
+            raise
+
+    def pause(self, seconds: float):
+        # The provider told us to back off, every lane waits
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _retry_delay(self, error: Exception, priority: int, attempt: int):
+        if not is_transient_error(error) or attempt >= self.max_retries:
+            return None
+
+        lane = self.stats[LANE_NAMES[priority]]
+        lane["retries"] += 1
+        backoff = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt)
+        delay = backoff * random.uniform(0.5, 1.0)
+        if getattr(error, "status_code", None) == 429:
+            lane["rate_limited"] += 1
+            retry_after = get_retry_after(error)
+            if retry_after is not None:
+                delay = retry_after
+            self.pause(delay)
+        return delay
+
+    def call(self, priority: int, tokens: float, fn, *args, **kwargs):
+        attempt = 0
+        while True:
+            self.acquire(priority, tokens)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, priority, attempt)
+                if delay is None:
+                    self.stats[LANE_NAMES[priority]]["failures"] += 1
+                    raise
+                time.sleep(delay)
+                attempt += 1
+
+    async def call_async(self, priority: int, tokens: float, fn, *args, **kwargs):
+        attempt = 0
+        while True:
+            await self.acquire_async(priority, tokens)
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, priority, attempt)
+                if delay is None:
+                    self.stats[LANE_NAMES[priority]]["failures"] += 1
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def get_stats(self):
+        with self._cond:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                "queued": len(self._queue),
+                "paused_for_seconds": round(max(0.0, self._paused_until - now), 3),
+                "available_requests": round(self.requests.tokens, 1),
+                "available_tokens": round(self.tokens.tokens, 1),
+                "lanes": {
+                    lane: {**values, "wait_seconds": round(values["wait_seconds"], 3)}
+                    for lane, values in self.stats.items()
+                },
+            }
+
+
+def is_transient_error(error: Exception):
+    # Rate limits, provider side failures and network errors, not bad requests
+    if getattr(error, "status_code", None) in RETRYABLE_STATUS_CODES:
+        return True
+    return type(error).__name__ in TRANSIENT_ERROR_NAMES
+
+
+def get_retry_after(error: Exception):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+# One scheduler per OpenAI rate limit scope
+llm_scheduler = LLMScheduler(
+    "llm", OPENAI_LLM_REQUESTS_PER_MINUTE, OPENAI_LLM_TOKENS_PER_MINUTE
+)
+embedding_scheduler = LLMScheduler(
+    "embedding",
+    OPENAI_EMBEDDING_REQUESTS_PER_MINUTE,
+    OPENAI_EMBEDDING_TOKENS_PER_MINUTE,
+)
+
+
+def get_scheduler_stats():
+    return {
+        scheduler.name: scheduler.get_stats()
+        for scheduler in (llm_scheduler, embedding_scheduler)
+    }
@@ -0,0 +1,256 @@
+from config.constants import (
+    HEDGING_ENABLED,
+    HEDGE_PERCENTILE,
+    HEDGE_MIN_DELAY_MS,
+    HEDGE_MAX_DELAY_MS,
+    CIRCUIT_FAILURE_RATE,
+    CIRCUIT_WINDOW_SIZE,
+    CIRCUIT_MIN_CALLS,
+    CIRCUIT_OPEN_SECONDS,
+)
+from helpers.rate_limiter import is_transient_error
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque
+import math
+import threading
+import time
+
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MAX_WORKERS = 64
+
+_hedge_executor = ThreadPoolExecutor(
+    max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="hedge"
+)
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str):
+        super().__init__(f"{name} is temporarily unavailable, please try again later")
+        self.name = name
+
+
+class Hedger:
+    """Fires a duplicate request when the first one is slower than the recent p95.
+
+    Whichever attempt succeeds first wins; the loser is left to finish in
+    the background and, when the hedge won, its extra latency is recorded as
+    time saved.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        enabled: bool = HEDGING_ENABLED,
+        percentile: float = HEDGE_PERCENTILE,
+        min_delay_ms: float = HEDGE_MIN_DELAY_MS,
+        max_delay_ms: float = HEDGE_MAX_DELAY_MS,
+    ):
+        self.name = name
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay_ms = min_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=500)
+        self.stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "saved_ms": 0.0}
+
+    def hedge_delay_ms(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return self.max_delay_ms
+        rank = math.ceil(self.percentile / 100 * len(latencies)) - 1
+        return min(self.max_delay_ms, max(self.min_delay_ms, latencies[rank]))
+
+    def _record(self, started: float, **increments):
+        with self._lock:
+            self._latencies.append((time.monotonic() - started) * 1000)
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _record_saved(self, primary, hedge_finished: float):
+        def on_primary_done(future):
+            if future.cancelled() or future.exception() is not None:
+                return
+            _, primary_finished = future.result()
+            with self._lock:
+                self.stats["saved_ms"] += (primary_finished - hedge_finished) * 1000
+
+        primary.add_done_callback(on_primary_done)
+
+    @staticmethod
+    def _timed(fn, args, kwargs):
+        result = fn(*args, **kwargs)
+        return result, time.monotonic()
+
+    def call(self, fn, *args, **kwargs):
+        if not self.enabled:
+            return fn(*args, **kwargs)
+
+        started = time.monotonic()
+        primary = _hedge_executor.submit(self._timed, fn, args, kwargs)
+        done, _ = wait([primary], timeout=self.hedge_delay_ms() / 1000)
+        if done:
+            result, _ = primary.result()
+            self._record(started, calls=1)
+            return result
+
+        hedge = _hedge_executor.submit(self._timed, fn, args, kwargs)
+        pending, error = {primary, hedge}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                result, finished = future.result()
+                if future is hedge:
+                    self._record(started, calls=1, hedged=1, hedge_wins=1)
+                    self._record_saved(primary, finished)
+                else:
+                    self._record(started, calls=1, hedged=1)
+                return result
+
+        self._record(started, calls=1, hedged=1)
+        raise error
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats["saved_ms"] = round(stats["saved_ms"], 1)
+        stats["current_delay_ms"] = round(self.hedge_delay_ms(), 1)
+        stats["hedge_rate"] = (
+            round(stats["hedged"] / stats["calls"], 4) if stats["calls"] else 0.0
+        )
+        return stats
+
+
+class CircuitBreaker:
+    """Fails fast once the recent transient error rate crosses a threshold.
+
+    After `open_seconds` one probe call is let through (half open); its
+    outcome closes the circuit again or re-opens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = CIRCUIT_FAILURE_RATE,
+        window_size: int = CIRCUIT_WINDOW_SIZE,
+        min_calls: int = CIRCUIT_MIN_CALLS,
+        open_seconds: float = CIRCUIT_OPEN_SECONDS,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window_size)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.stats = {"opened": 0, "short_circuited": 0, "fallbacks": 0}
+
+    def _allow(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    return False
+                self._state = self.HALF_OPEN
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.stats["opened"] += 1
+
+    def _record(self, failed: bool):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if failed:
+                    self._open()
+                else:
+                    self._state = self.CLOSED
+                return
+
+            self._outcomes.append(failed)
+            failures = sum(self._outcomes)
+            if (
+                len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_rate
+            ):
+                self._open()
+
+    def _fallback(self, fallback, error):
+        if fallback is None:
+            raise error
+        with self._lock:
+            self.stats["fallbacks"] += 1
+        return fallback()
+
+    def call(self, fn, *args, fallback=None, **kwargs):
+        if not self._allow():
+            with self._lock:
+                self.stats["short_circuited"] += 1
+            return self._fallback(fallback, CircuitOpenError(self.name))
+
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            transient = is_transient_error(e)
+            self._record(failed=transient)
+            if not transient:
+                raise
+            return self._fallback(fallback, e)
+
+        self._record(failed=False)
+        return result
+
+    def get_stats(self):
+        with self._lock:
+            outcomes = list(self._outcomes)
+            return {
+                "state": self._state,
+                "recent_calls": len(outcomes),
+                "recent_failure_rate": (
+                    round(sum(outcomes) / len(outcomes), 4) if outcomes else 0.0
+                ),
+                **self.stats,
+            }
+
+
+_registry_lock = threading.Lock()
+_hedgers = {}
+_breakers = {}
+
+
+def get_hedger(name: str):
+    with _registry_lock:
+        if name not in _hedgers:
+            _hedgers[name] = Hedger(name)
+        return _hedgers[name]
+
+
+def get_circuit_breaker(name: str):
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def get_resilience_stats():
+    with _registry_lock:
+        hedgers, breakers = list(_hedgers.values()), list(_breakers.values())
+    return {
+        "hedging": {hedger.name: hedger.get_stats() for hedger in hedgers},
+        "circuit_breakers": {breaker.name: breaker.get_stats() for breaker in breakers},
+    }
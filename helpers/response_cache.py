@@ -0,0 +1,133 @@
+from connection.postgres import load_all_tables
+from config.constants import CACHE_VERSIONS_TABLE_NAME
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+
+metadataCollection = load_all_tables()
+
+
+async def get_cache_version(db: AsyncSession, name: str):
+    versions_table = metadataCollection.tables[CACHE_VERSIONS_TABLE_NAME]
+    version = (
+        await db.execute(
+            select(versions_table.c.version).where(versions_table.c.name == name)
+        )
+    ).scalar()
+    return version or 0
+
+
+async def bump_cache_version(db: AsyncSession, name: str):
+    # Part of the caller's transaction, other workers see the new version on commit
+    versions_table = metadataCollection.tables[CACHE_VERSIONS_TABLE_NAME]
+    statement = insert(versions_table).values(name=name, version=1)
+    return (
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[versions_table.c.name],
+                set_={
+                    "version": versions_table.c.version + 1,
+                    "updated_at": func.now(),
+                },
+            ).returning(versions_table.c.version)
+        )
+    ).scalar()
+
+
+class VersionedResponseCache:
+    """In-process cache of serialized responses, keyed by request and version.
+
+    The version is the change counter of the cached table in Postgres, read
+    on every request, so a write through any worker is seen by all of them on
+    the next request. The ETag is derived from the version and the request,
+    a matching If-None-Match needs neither the query nor the cached body.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float, max_entries: int):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.version = 0
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+    def etag(self, key, version: int):
+        key_hash = hashlib.sha256(key.encode()).hexdigest()[:16]
+        return f'"{self.name}-{version}-{key_hash}"'
+
+    def _observe(self, version: int):
+        # Entries of older versions can never be served again
+        if version > self.version:
+            self.version = version
+            self._entries.clear()
+
+    def get(self, key, version: int):
+        now = time.monotonic()
+        with self._lock:
+            self._observe(version)
+            entry = self._entries.get(key)
+            if entry and entry["version"] == version and entry["expires"] > now:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry["body"]
+            if entry and entry["expires"] <= now:
+                del self._entries[key]
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key, version: int, body: bytes):
+        # A request that read an older version than another worker wrote is not stored
+        with self._lock:
+            self._observe(version)
+            if version == self.version:
+                self._entries[key] = {
+                    "version": version,
+                    "expires": time.monotonic() + self.ttl_seconds,
+                    "body": body,
+                }
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return body
+
+    def count_not_modified(self):
+        with self._lock:
+            self.stats["not_modified"] += 1
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({"version": self.version, "entries": len(self._entries)})
+        return stats
+
+
+def etag_matches(if_none_match, etag: str):
+    if not if_none_match:
+        return False
+    candidates = [item.strip() for item in if_none_match.split(",")]
+    # Weak comparison, as If-None-Match requires
+    return "*" in candidates or etag in [
+        item[2:] if item.startswith("W/") else item for item in candidates
+    ]
+
+
+_registry_lock = threading.Lock()
+_registry = {}
+
+
+def get_response_cache(name: str, ttl_seconds: float, max_entries: int):
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = VersionedResponseCache(name, ttl_seconds, max_entries)
+        return _registry[name]
+
+
+def get_response_cache_stats():
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {cache.name: cache.get_stats() for cache in caches}
@@ -3,15 +3,26 @@ from config.constants import (
     CONTENT_TYPES,
     AUTHORITY_UPDATE_USER_ROLES,
     S3_BUCKET_NAME,
+    DATABASE_EXISTS_CACHE_SECONDS,
+    FAST_JSON_RESPONSES,
 )
 from connection.postgres import get_engine, DB_NAME
+from connection.clients import get_boto3_client
 from sqlalchemy.sql import text
-from botocore.exceptions import NoCredentialsError
+from sqlalchemy import and_, or_, desc
+from sqlalchemy.sql.expression import nulls_last
 from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
 from typing import List
+from datetime import datetime
+import base64
+import json
+import orjson
 import re
-import boto3
-import httpx
+import time
+
+# Databases seen to exist, only positive results are cached
+_known_databases = {}
 
 
 def get_db_name(request):
@@ -65,41 +76,48 @@ def get_old_db_name(request):
     return db_name_map
 
 
-def create_database_if_not_exists(db_name: str):
-    engine = get_engine(DB_NAME)
-    conn = engine.connect()
-    conn.execution_options(isolation_level="AUTOCOMMIT")
-
-    # Check if the database exists
+def _database_exists(conn, db_name: str):
     result = conn.execute(
         text("SELECT 1 FROM pg_database WHERE datname = :db_name"), {"db_name": db_name}
     ).fetchone()
+    return result is not None
+
 
-    if not result:
-        conn.execute(f"CREATE DATABASE {db_name};")
-        print(f"Database '{db_name}' created successfully.")
+def _is_known_database(db_name: str):
+    checked_at = _known_databases.get(db_name)
+    return (
+        checked_at is not None
+        and time.monotonic() - checked_at < DATABASE_EXISTS_CACHE_SECONDS
+    )
+
+
+def create_database_if_not_exists(db_name: str):
+    if _is_known_database(db_name):
+        return
 
-    conn.close()
-    engine.dispose()
+    with get_engine(DB_NAME).connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT")
+
+        # Check if the database exists
+        if not _database_exists(conn, db_name):
+            conn.execute(text(f'CREATE DATABASE "{db_name}"'))
+            print(f"Database '{db_name}' created successfully.")
+
+    _known_databases[db_name] = time.monotonic()
 
 
 def check_database_is_exists(db_name: str):
-    engine = get_engine(DB_NAME)
-    conn = engine.connect()
-    conn.execution_options(isolation_level="AUTOCOMMIT")
+    if _is_known_database(db_name):
+        return True
 
-    # Check if the database exists
-    result = conn.execute(
-        text("SELECT 1 FROM pg_database WHERE datname = :db_name"), {"db_name": db_name}
-    ).fetchone()
+    with get_engine(DB_NAME).connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT")
 
-    if not result:
-        conn.close()
-        engine.dispose()
-        return False
+        # Check if the database exists
+        if not _database_exists(conn, db_name):
+            return False
 
-    conn.close()
-    engine.dispose()
+    _known_databases[db_name] = time.monotonic()
     return True
 
 
@@ -109,6 +127,69 @@ def get_result_in_json(table, data):
     return data_list
 
 
+# Keyset pagination on (sort column DESC NULLS LAST, id DESC), cursor = the last row
+def keyset_order_by(table, sort_column: str = "updated_at"):
+    return [nulls_last(desc(table.c[sort_column])), desc(table.c.id)]
+
+
+def encode_cursor(row, sort_column: str = "updated_at"):
+    sort_value = row[sort_column].isoformat() if row[sort_column] else None
+    payload = json.dumps({"sort": sort_value, "id": row["id"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def keyset_after(table, cursor: str, sort_column: str = "updated_at"):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        last_id = int(payload["id"])
+        sort_value = payload["sort"]
+        sort_value = datetime.fromisoformat(sort_value) if sort_value else None
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    column = table.c[sort_column]
+    same_value_before = table.c.id < last_id
+    if sort_value is None:
+        # NULLs come last, only smaller ids are left
+        return and_(column.is_(None), same_value_before)
+    return or_(
+        column < sort_value,
+        and_(column == sort_value, same_value_before),
+        column.is_(None),
+    )
+
+
+async def estimate_row_count(db, query):
+    # Planner estimate from EXPLAIN, the matching rows are never counted
+    connection = await db.connection()
+    compiled = query.compile(
+        dialect=connection.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    params = compiled.params
+    if compiled.positiontup is not None:
+        params = tuple(params[name] for name in compiled.positiontup)
+    result = await connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled.string}", params
+    )
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+# Opt-in fast path for list endpoints, their rows come straight from the declared tables
+def list_response(content: dict):
+    if FAST_JSON_RESPONSES:
+        return ORJSONResponse(content)
+    return content
+
+
+def encode_json(content: dict, response_model):
+    if FAST_JSON_RESPONSES:
+        return orjson.dumps(content)
+    return response_model.model_validate(content).model_dump_json().encode()
+
+
 def print_log(method_name, method_type, event, data):
     print(
         f"{method_name}::",
@@ -124,7 +205,9 @@ def print_log(method_name, method_type, event, data):
 def upload_docs_to_s3(
     file_path: str, file_name: str, unique_id: str, file_ext: str, config
 ):
-    s3_client = boto3.client("s3")
+    from botocore.exceptions import NoCredentialsError
+
+    s3_client = get_boto3_client("s3")
     s3_bucket_name = S3_BUCKET_NAME
 
     safe_file_name = sanitize_filename(file_name)
@@ -158,7 +241,7 @@ def upload_docs_to_s3(
 
 
 def get_signed_url(s3_filename: str):
-    s3_client = boto3.client("s3")
+    s3_client = get_boto3_client("s3")
     s3_bucket_name = S3_BUCKET_NAME
     signed_url = s3_client.generate_presigned_url(
         "get_object",
@@ -172,15 +255,6 @@ def validate_user_able_peform_this_operation(groups: List[str]):
     return any(role in groups for role in AUTHORITY_UPDATE_USER_ROLES)
 
 
-async def call_async_api(API_URL: str, data: dict, header):
-    async with httpx.AsyncClient(timeout=None) as client:
-        try:
-            response = await client.post(API_URL, data=data, headers=header)
-            print("API Response:", response.json())
-        except httpx.RequestError as e:
-            print(f"Request error: {str(e)}")
-            return {"error": "Request failed"}
-        
 def sanitize_filename(filename: str) -> str:
     # Replace spaces and special characters with underscores
     sanitized = re.sub(r'[\s,]+', '_', filename)  # Replace spaces and commas with _
@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import threading
+
+
+def make_flight_key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent identical calls into one upstream call.
+
+    The first caller for a key runs the function, every caller that arrives
+    while it is in flight waits for and shares its result (or exception).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+        self.stats = {"calls": 0, "upstream_calls": 0, "collapsed": 0, "errors": 0}
+
+    def _count(self, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            self.stats["calls"] += 1
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+                self.stats["upstream_calls"] += 1
+            else:
+                self.stats["collapsed"] += 1
+
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            self._count(errors=1)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    async def ado(self, key, fn, *args, **kwargs):
+        with self._lock:
+            self.stats["calls"] += 1
+            task = self._tasks.get(key)
+            if task is None:
+                # Run upstream as its own task so a cancelled caller does not cancel the others
+                task = asyncio.ensure_future(fn(*args, **kwargs))
+                self._tasks[key] = task
+                self.stats["upstream_calls"] += 1
+                task.add_done_callback(lambda done: self._finish_task(key, done))
+            else:
+                self.stats["collapsed"] += 1
+
+        return await asyncio.shield(task)
+
+    def _finish_task(self, key, task):
+        with self._lock:
+            if self._tasks.get(key) is task:
+                self._tasks.pop(key)
+            if not task.cancelled() and task.exception() is not None:
+                self.stats["errors"] += 1
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats["collapse_ratio"] = (
+            round(stats["collapsed"] / stats["calls"], 4) if stats["calls"] else 0.0
+        )
+        return stats
+
+
+_registry_lock = threading.Lock()
+_registry = {}
+
+
+def get_singleflight(name: str):
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = SingleFlight(name)
+        return _registry[name]
+
+
+def get_singleflight_stats():
+    with _registry_lock:
+        flights = list(_registry.values())
+    return {flight.name: flight.get_stats() for flight in flights}
@@ -0,0 +1,123 @@
+from connection.clients import get_boto3_client
+from helpers.singleflight import get_singleflight
+from config.constants import (
+    COGNITO_POOL_ID,
+    USER_PROFILE_CACHE_SECONDS,
+    USER_PROFILE_NEGATIVE_CACHE_SECONDS,
+    USER_PROFILE_CACHE_SIZE,
+    USER_PROFILE_CONCURRENCY,
+)
+from fastapi.concurrency import run_in_threadpool
+from collections import OrderedDict
+import asyncio
+import threading
+import time
+
+
+class UserProfileCache:
+    """Cognito user attributes by username, with a TTL and negative caching.
+
+    Lookups for the same user share one AdminGetUser call, distinct users are
+    fetched concurrently (at most USER_PROFILE_CONCURRENCY at a time). Users
+    that do not exist are cached as None, other errors are not cached.
+    """
+
+    def __init__(self, ttl_seconds, negative_ttl_seconds, max_entries, concurrency):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._flight = get_singleflight("user_profile")
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.stats = {"hits": 0, "misses": 0, "lookups": 0, "not_found": 0, "errors": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _cached(self, username: str):
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry and entry[1] > time.monotonic():
+                self._entries.move_to_end(username)
+                self.stats["hits"] += 1
+                return True, entry[0]
+            self._entries.pop(username, None)
+            self.stats["misses"] += 1
+            return False, None
+
+    def _store(self, username: str, profile, ttl_seconds: float):
+        with self._lock:
+            self._entries[username] = (profile, time.monotonic() + ttl_seconds)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def _lookup(self, username: str):
+        async with self._semaphore:
+            self._count("lookups")
+            try:
+                response = await run_in_threadpool(
+                    get_boto3_client("cognito-idp").admin_get_user,
+                    UserPoolId=COGNITO_POOL_ID,
+                    Username=username,
+                )
+            except Exception as e:
+                print("cognito user::", str(e))
+                error_code = getattr(e, "response", {}).get("Error", {}).get("Code")
+                if error_code == "UserNotFoundException":
+                    self._count("not_found")
+                    self._store(username, None, self.negative_ttl_seconds)
+                else:
+                    self._count("errors")
+                return None
+
+        profile = {
+            attr["Name"].replace("custom:", ""): attr["Value"]
+            for attr in response["UserAttributes"]
+        }
+        self._store(username, profile, self.ttl_seconds)
+        return profile
+
+    async def get(self, username: str):
+        if not username:
+            return None
+        found, profile = self._cached(username)
+        if found:
+            return profile
+        return await self._flight.ado(username, self._lookup, username)
+
+    async def get_many(self, usernames):
+        unique = list(dict.fromkeys(username for username in usernames if username))
+        profiles = await asyncio.gather(*[self.get(username) for username in unique])
+        return dict(zip(unique, profiles))
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries)}
+
+
+user_profiles = UserProfileCache(
+    USER_PROFILE_CACHE_SECONDS,
+    USER_PROFILE_NEGATIVE_CACHE_SECONDS,
+    USER_PROFILE_CACHE_SIZE,
+    USER_PROFILE_CONCURRENCY,
+)
+
+
+async def get_created_updated_users(row: dict):
+    # Both users in one concurrent pass, the same user is looked up once
+    profiles = await user_profiles.get_many([row["created_by"], row["updated_by"]])
+    return profiles.get(row["created_by"]), profiles.get(row["updated_by"])
+
+
+async def enrich_with_user_profiles(rows: list):
+    # One lookup per distinct user for the whole page
+    profiles = await user_profiles.get_many(
+        [row.get(key) for row in rows for key in ("created_by", "updated_by")]
+    )
+    for row in rows:
+        row["create_user_data"] = profiles.get(row.get("created_by"))
+        row["update_user_data"] = profiles.get(row.get("updated_by"))
+    return rows
@@ -3,6 +3,7 @@ from fastapi.security import HTTPBearer
 from routes.sample import index
 from routes import (
     default_routes,
+    health_routes,
     topics_routes,
     content_routes,
     search_routes,
@@ -11,13 +12,39 @@ from routes import (
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from config.constants import origins
-from connection.postgres import get_db_engine
+from config.constants import origins, VERIFY_SCHEMA_ON_STARTUP
+from connection.postgres import (
+    dispose_tenant_engines,
+    engine_pool,
+    async_engine_pool,
+    verify_tables_against_db,
+)
 from pydantic import ValidationError
 from fastapi.openapi.utils import get_openapi
+from connection.clients import close_clients
+from services.readiness_service import warm_up
+from contextlib import asynccontextmanager
+import asyncio
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm-up runs while the server already listens, /ready is 503 until it is done
+    warmup_task = asyncio.create_task(warm_up())
+    if VERIFY_SCHEMA_ON_STARTUP:
+        # Runs in the background, startup does not wait for the reflection round trips
+        asyncio.get_running_loop().run_in_executor(None, verify_tables_against_db)
+    yield
+    warmup_task.cancel()
+    # Release pooled outbound and database connections on shutdown
+    await close_clients()
+    await async_engine_pool.dispose()
+    engine_pool.dispose()
+    dispose_tenant_engines()
+
 
 security = HTTPBearer()  # This will handle the token extraction from headers
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 
 def custom_openapi():
@@ -79,14 +106,10 @@ async def validation_exception_handler(request: Request, exc: Exception):
     )
 
 
-if get_db_engine():
-    print({"message": "Postgres connection successfully"})
-else:
-    print({"message": "Postgres connection failed"})
-
 app.openapi = custom_openapi
 
 app.include_router(index.router, tags=["Sample"])
+app.include_router(health_routes.router, tags=["Health"])
 app.include_router(
     default_routes.router, tags=["Default"], dependencies=[Depends(security)]
 )
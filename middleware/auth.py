@@ -1,13 +1,13 @@
-import boto3
 from fastapi import Request, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer
-from config.constants import AWS_REGION, COGNITO_POOL_ID
+from config.constants import COGNITO_POOL_ID, JWT_LOCAL_VERIFICATION
+from connection.clients import get_boto3_client
+from helpers.cognito_jwt import jwt_verifier, token_cache, JwksUnavailableError
+import jwt
 
 security = HTTPBearer()
 
-# Initialize AWS Cognito client
-cognito_client = boto3.client("cognito-idp", region_name=AWS_REGION)
-
 
 class AuthenticatedUser:
     def __init__(self, user_details, groups):
@@ -15,43 +15,85 @@ class AuthenticatedUser:
         self.groups = groups
 
 
-async def authentication_handler(request: Request):
-    headers = request.headers if request.headers else {}
-    authorization_token = (
-        headers.get("Authorization").split(" ")[1]
-        if "Authorization" in headers
-        else headers.get("authorization").split(" ")[1]
-        if "authorization" in headers
-        else None
-    )
+async def verify_token_locally(authorization_token: str):
+    try:
+        claims = await jwt_verifier.verify(authorization_token)
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
 
-    if not authorization_token:
-        raise HTTPException(status_code=401, detail="Authorization token is missing")
+    # Same shape as cognito get_user, groups come from the token itself
+    user_details = {
+        "Username": claims.get("username", claims["sub"]),
+        "UserAttributes": [{"Name": "sub", "Value": claims["sub"]}],
+    }
+    user = AuthenticatedUser(user_details, claims.get("cognito:groups", []))
+    token_cache.set(authorization_token, user, claims["exp"])
+    return user
+
+
+async def verify_token_with_cognito(authorization_token: str):
+    cognito_client = get_boto3_client("cognito-idp")
 
     try:
         # Validate token with Cognito
-        user_details = cognito_client.get_user(AccessToken=authorization_token)
+        user_details = await run_in_threadpool(
+            cognito_client.get_user, AccessToken=authorization_token
+        )
         if not user_details:
             raise HTTPException(status_code=401, detail="Invalid token")
 
         username = user_details["Username"]
-        response = cognito_client.admin_list_groups_for_user(
-            Username=username, UserPoolId=COGNITO_POOL_ID
+        response = await run_in_threadpool(
+            cognito_client.admin_list_groups_for_user,
+            Username=username,
+            UserPoolId=COGNITO_POOL_ID,
         )
 
         groups = [group["GroupName"] for group in response.get("Groups", [])]
 
-        return AuthenticatedUser(user_details, groups)  # Store in class
+        user = AuthenticatedUser(user_details, groups)  # Store in class
+        token_cache.set(authorization_token, user)
+        return user
 
     except cognito_client.exceptions.NotAuthorizedException:
         raise HTTPException(status_code=401, detail="Invalid token")
     except cognito_client.exceptions.ExpiredTokenException:
         raise HTTPException(status_code=401, detail="Token expired")
+    except HTTPException:
+        raise
     except Exception as e:
         print("Token validation failed:", str(e))
         raise HTTPException(status_code=500, detail="Token validation failed")
 
 
+async def authentication_handler(request: Request):
+    headers = request.headers if request.headers else {}
+    authorization_token = (
+        headers.get("Authorization").split(" ")[1]
+        if "Authorization" in headers
+        else headers.get("authorization").split(" ")[1]
+        if "authorization" in headers
+        else None
+    )
+
+    if not authorization_token:
+        raise HTTPException(status_code=401, detail="Authorization token is missing")
+
+    user = token_cache.get(authorization_token)
+    if user:
+        return user
+
+    if JWT_LOCAL_VERIFICATION:
+        try:
+            return await verify_token_locally(authorization_token)
+        except JwksUnavailableError:
+            # No signing keys yet (JWKS endpoint unreachable), ask Cognito instead
+            pass
+    return await verify_token_with_cognito(authorization_token)
+
+
 async def get_authenticated_user(
     authenticated_user: AuthenticatedUser = Depends(authentication_handler),
 ):
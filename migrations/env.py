@@ -0,0 +1,40 @@
+from alembic import context
+from sqlalchemy import text
+from connection.postgres import engine_pool
+from schemas.all_schemas import metadata
+
+# Runs against the global database through the shared engine (connection/postgres.py)
+target_metadata = metadata
+
+# Workers calling upgrade_database() at the same time wait for each other
+MIGRATION_LOCK_ID = 7401
+
+
+def run_migrations_offline():
+    context.configure(
+        url=engine_pool.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with engine_pool.connect() as connection:
+        connection.execute(text(f"SELECT pg_advisory_lock({MIGRATION_LOCK_ID})"))
+        connection.commit()
+        try:
+            context.configure(connection=connection, target_metadata=target_metadata)
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            connection.execute(text(f"SELECT pg_advisory_unlock({MIGRATION_LOCK_ID})"))
+            connection.commit()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
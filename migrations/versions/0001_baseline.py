@@ -0,0 +1,92 @@
+"""Baseline, the tables create_all used to create
+
+Databases that already have the tables (created by create_all before the
+migrations existed) are only stamped, existing tables are left untouched.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
+from config.constants import LEVEL_NAMES
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing_tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "topics" not in existing_tables:
+        op.create_table(
+            "topics",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column("title", sa.String(255)),
+            sa.Column("description", sa.String(500)),
+            sa.Column("collection_name", sa.String(255)),
+            sa.Column("level", sa.String(255)),
+            sa.Column("created_by", sa.String(100)),
+            sa.Column("is_deleted", sa.Boolean),
+            sa.Column("updated_by", sa.String(255), nullable=True),
+            sa.Column("created_at", sa.TIMESTAMP, server_default=sa.func.now()),
+            sa.Column("updated_at", sa.TIMESTAMP),
+            *[sa.Column(level, sa.String(255), nullable=True) for level in LEVEL_NAMES],
+        )
+
+    if "contents" not in existing_tables:
+        op.create_table(
+            "contents",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column("source", sa.String(255)),
+            sa.Column("title", sa.String(255)),
+            sa.Column("description", sa.String(500)),
+            sa.Column("source_info", sa.String(500), nullable=True),
+            sa.Column("source_data", sa.String(500), nullable=True),
+            sa.Column("tags", sa.String(255), nullable=True),
+            sa.Column("created_by", sa.String(100)),
+            sa.Column("updated_by", sa.String(255), nullable=True),
+            sa.Column("status", sa.String(50), nullable=True),
+            sa.Column("version", sa.String(50), nullable=True),
+            sa.Column("stored_in_kb", sa.String(50), nullable=True),
+            sa.Column("topic_ids", ARRAY(sa.Integer)),
+            sa.Column("is_deleted", sa.Boolean),
+            sa.Column("created_at", sa.TIMESTAMP, server_default=sa.func.now()),
+            sa.Column("updated_at", sa.TIMESTAMP),
+            sa.Column("review_date", sa.TIMESTAMP),
+            sa.Column("approved_time", sa.TIMESTAMP),
+            sa.Column("rejected_time", sa.TIMESTAMP),
+        )
+
+    if "user_chat_history" not in existing_tables:
+        op.create_table(
+            "user_chat_history",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column("question", sa.TEXT),
+            sa.Column("answer", sa.TEXT),
+            sa.Column("model_name", sa.String(255)),
+            sa.Column("topic_id", sa.String(255)),
+            sa.Column("conversation_id", sa.String(255)),
+            sa.Column("is_deleted", sa.Boolean),
+            sa.Column("created_at", sa.TIMESTAMP, server_default=sa.func.now()),
+            sa.Column("updated_at", sa.TIMESTAMP),
+        )
+
+    if "user_conversation" not in existing_tables:
+        op.create_table(
+            "user_conversation",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column("name", sa.TEXT),
+            sa.Column("username", sa.String(255)),
+            sa.Column("created_at", sa.TIMESTAMP, server_default=sa.func.now()),
+            sa.Column("updated_at", sa.TIMESTAMP),
+        )
+
+
+def downgrade():
+    for table_name in ["user_conversation", "user_chat_history", "contents", "topics"]:
+        op.drop_table(table_name)
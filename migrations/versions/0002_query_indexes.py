@@ -0,0 +1,85 @@
+"""Indexes for the hot read paths
+
+- contents.topic_ids: GIN, serves the && / @> filters of get-contents, search
+  and delete-topic
+- contents (updated_at DESC NULLS LAST, id DESC): get-contents keyset order
+- topics (tenant, facility, is_deleted): topic scope filters
+- user_conversation (username, created_at): list-chat-threads
+- user_chat_history (conversation_id, created_at): history and thread previews
+
+Built CONCURRENTLY so writes keep going on large tables. IF NOT EXISTS because
+databases created by create_all already have the indexes declared in the
+schemas.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from config.constants import LEVEL_NAMES
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+TOPIC_SCOPE_INDEX = f"ix_topics_{'_'.join(LEVEL_NAMES)}_is_deleted"
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_contents_topic_ids",
+            "contents",
+            ["topic_ids"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_contents_updated_at_id",
+            "contents",
+            [sa.text("updated_at DESC NULLS LAST"), sa.text("id DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            TOPIC_SCOPE_INDEX,
+            "topics",
+            [*LEVEL_NAMES, "is_deleted"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_user_conversation_username_created_at",
+            "user_conversation",
+            ["username", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_user_chat_history_conversation_id_created_at",
+            "user_chat_history",
+            ["conversation_id", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for index_name, table_name in [
+            ("ix_user_chat_history_conversation_id_created_at", "user_chat_history"),
+            ("ix_user_conversation_username_created_at", "user_conversation"),
+            (TOPIC_SCOPE_INDEX, "topics"),
+            ("ix_contents_updated_at_id", "contents"),
+            ("ix_contents_topic_ids", "contents"),
+        ]:
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,59 @@
+"""user_chat_history.conversation_id becomes an integer foreign key
+
+The column was a VARCHAR holding str(user_conversation.id). Values that are
+not numeric or point at no conversation could never be read back, they are
+set to NULL so the constraint can be added.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        """
+        UPDATE user_chat_history SET conversation_id = NULL
+        WHERE conversation_id !~ '^[0-9]+$'
+           OR NOT EXISTS (
+               SELECT 1 FROM user_conversation
+               WHERE user_conversation.id::text = user_chat_history.conversation_id
+           )
+        """
+    )
+    op.alter_column(
+        "user_chat_history",
+        "conversation_id",
+        type_=sa.Integer,
+        existing_type=sa.String(255),
+        postgresql_using="conversation_id::integer",
+    )
+    op.create_foreign_key(
+        "fk_user_chat_history_conversation_id",
+        "user_chat_history",
+        "user_conversation",
+        ["conversation_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+
+
+def downgrade():
+    op.drop_constraint(
+        "fk_user_chat_history_conversation_id", "user_chat_history", type_="foreignkey"
+    )
+    op.alter_column(
+        "user_chat_history",
+        "conversation_id",
+        type_=sa.String(255),
+        existing_type=sa.Integer,
+        postgresql_using="conversation_id::text",
+    )
@@ -0,0 +1,48 @@
+"""Per-page ingestion checkpoints
+
+parse-contents records every page's markdown, extracted metadata, embedding
+and whether it reached Milvus. A failed parse resumes from the pages that are
+not inserted yet, the rows of a content are deleted once it is stored.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "ingestion_checkpoints",
+        sa.Column(
+            "content_id",
+            sa.Integer,
+            sa.ForeignKey(
+                "contents.id",
+                name="fk_ingestion_checkpoints_content_id",
+                ondelete="CASCADE",
+            ),
+            primary_key=True,
+        ),
+        sa.Column("page", sa.Integer, primary_key=True),
+        sa.Column("markdown", sa.TEXT),
+        sa.Column("page_metadata", JSONB, nullable=True),
+        sa.Column("embedding", ARRAY(sa.Float), nullable=True),
+        sa.Column(
+            "inserted", sa.Boolean, nullable=False, server_default=sa.false()
+        ),
+        sa.Column("created_at", sa.TIMESTAMP, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.TIMESTAMP),
+    )
+
+
+def downgrade():
+    op.drop_table("ingestion_checkpoints")
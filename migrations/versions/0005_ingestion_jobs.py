@@ -0,0 +1,70 @@
+"""Ingestion job queue
+
+create-content and edit-content enqueue a job per content to ingest, worker.py
+claims them with FOR UPDATE SKIP LOCKED. A partial unique index keeps one
+pending job per content, a partial index serves the claim query.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "ingestion_jobs",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column(
+            "content_id",
+            sa.Integer,
+            sa.ForeignKey(
+                "contents.id", name="fk_ingestion_jobs_content_id", ondelete="CASCADE"
+            ),
+            nullable=False,
+        ),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("max_attempts", sa.Integer, nullable=False),
+        sa.Column(
+            "run_after", sa.TIMESTAMP, nullable=False, server_default=sa.func.now()
+        ),
+        sa.Column("locked_by", sa.String(255), nullable=True),
+        sa.Column("locked_at", sa.TIMESTAMP, nullable=True),
+        sa.Column("last_error", sa.TEXT, nullable=True),
+        sa.Column("stage_timings", JSONB, nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.TIMESTAMP),
+        sa.Column("started_at", sa.TIMESTAMP, nullable=True),
+        sa.Column("finished_at", sa.TIMESTAMP, nullable=True),
+    )
+    op.create_index(
+        "ix_ingestion_jobs_queued_run_after",
+        "ingestion_jobs",
+        ["run_after", "id"],
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+    op.create_index(
+        "uq_ingestion_jobs_pending_content_id",
+        "ingestion_jobs",
+        ["content_id"],
+        unique=True,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+    op.create_index(
+        "ix_ingestion_jobs_content_id_created_at",
+        "ingestion_jobs",
+        ["content_id", "created_at"],
+    )
+
+
+def downgrade():
+    op.drop_table("ingestion_jobs")
@@ -0,0 +1,32 @@
+"""Change counters for cached lists
+
+Every topic mutation bumps the topics row in the same transaction. get-topics
+reads it by primary key on each request, so the cached pages and ETags of all
+workers follow the same version.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "cache_versions",
+        sa.Column("name", sa.String(100), primary_key=True),
+        sa.Column("version", sa.BigInteger, nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.TIMESTAMP, server_default=sa.func.now()),
+    )
+    op.execute("INSERT INTO cache_versions (name, version) VALUES ('topics', 0)")
+
+
+def downgrade():
+    op.drop_table("cache_versions")
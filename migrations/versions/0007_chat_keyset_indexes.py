@@ -0,0 +1,74 @@
+"""Chat indexes in keyset order
+
+list-chat-threads and get-conversation-history page on (created_at DESC NULLS
+LAST, id DESC). The ascending (username, created_at) and (conversation_id,
+created_at) indexes from 0002 find the rows but cannot supply that order, so
+every page sorted all of a user's threads or a conversation's turns. The new
+indexes match the order, the old ones are dropped once they exist.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+KEYSET_ORDER = [sa.text("created_at DESC NULLS LAST"), sa.text("id DESC")]
+
+# (new index, old index, table, leading column)
+INDEXES = [
+    (
+        "ix_user_conversation_username_created_at_id",
+        "ix_user_conversation_username_created_at",
+        "user_conversation",
+        "username",
+    ),
+    (
+        "ix_user_chat_history_conversation_id_created_at_id",
+        "ix_user_chat_history_conversation_id_created_at",
+        "user_chat_history",
+        "conversation_id",
+    ),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for index_name, old_index_name, table_name, column in INDEXES:
+            op.create_index(
+                index_name,
+                table_name,
+                [column, *KEYSET_ORDER],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.drop_index(
+                old_index_name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for index_name, old_index_name, table_name, column in INDEXES:
+            op.create_index(
+                old_index_name,
+                table_name,
+                [column, "created_at"],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -1,5 +1,5 @@
 from pydantic import Field
-from config.constants import LEVEL_NAMES
+from config.constants import LEVEL_NAMES, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 # add topic fields
 add_topic_fields = {
@@ -29,6 +29,8 @@ for field_name in LEVEL_NAMES:
 # get topic fields
 get_topic_fields = {
     "is_all": (bool, Field("")),
+    "limit": (int, Field(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)),
+    "cursor": (str, Field("")),
 }
 for field_name in LEVEL_NAMES:
     get_topic_fields[field_name] = (str, Field(default=""))
@@ -73,14 +75,26 @@ edit_content_fields = {
 
 
 # get content fields
-get_content_fields = {}
+get_content_fields = {
+    "limit": (int, Field(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)),
+    "cursor": (str, Field("")),
+    "status": (str, Field("")),
+    "tags": (str, Field("")),
+    "title": (str, Field("")),
+    "include_count": (bool, Field(False)),
+    "include_users": (bool, Field(False)),
+}
 for field_name in LEVEL_NAMES:
     get_content_fields[field_name] = (str, Field(default=""))
 
 parse_content_fields = {
     "content_id": (str, Field(...)),
-    "url": (str, Field("")),
-    "page_no": (str, Field("")),
+}
+
+# ingestion worker request, url is the S3 source signed when the job runs
+ingest_content_fields = {
+    "content_id": (str, Field(...)),
+    "url": (str, Field(...)),
 }
 
 search_knowledge_base_fields = {
@@ -94,4 +108,12 @@ search_knowledge_base_fields = {
 
 list_chat_threads_fields = {
     "username": (str, Field(...)),
+    "limit": (int, Field(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)),
+    "cursor": (str, Field("")),
+}
+
+conversation_history_fields = {
+    "conversation_id": (str, Field(...)),
+    "limit": (int, Field(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)),
+    "cursor": (str, Field("")),
 }
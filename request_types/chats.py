@@ -1,5 +1,8 @@
 from pydantic import field_validator, create_model, model_validator
-from request_types.all_fields import list_chat_threads_fields
+from request_types.all_fields import (
+    list_chat_threads_fields,
+    conversation_history_fields,
+)
 
 from typing import Type
 
@@ -32,3 +35,18 @@ class ListChatThreadsRequest(ListChatThreadsBaseRequestModel):
 ListChatThreadsRequest.__validators__ = {
     "validate_username": ListChatThreadsRequest.validate_username,
 }
+
+
+# Conversation history request
+ConversationHistoryRequestModel: Type = create_model(
+    "ConversationHistoryRequest", **conversation_history_fields
+)
+
+
+class ConversationHistoryRequest(ConversationHistoryRequestModel):
+    @field_validator("conversation_id")
+    @classmethod
+    def validate_conversation_id(cls, value):
+        if not value or not value.strip().isdigit():
+            raise ValueError("Conversation id must be a number")
+        return value.strip()
@@ -5,9 +5,10 @@ from request_types.all_fields import (
     get_content_fields,
     edit_content_fields,
     parse_content_fields,
+    ingest_content_fields,
 )
 from config.constants import ALLOWED_EXTENSIONS, CONTENT_STATUS
-from fastapi import HTTPException, UploadFile, Form
+from fastapi import HTTPException, UploadFile, Form, Request
 from typing import Optional, Type
 
 
@@ -321,16 +322,23 @@ class ParseContentRequest(ParseContentRequestModel):
         return value.strip()
 
     @classmethod
-    def as_form(
-        cls,
-        content_id: str = Form(...),
-        url: Optional[str] = Form(""),
-        page_no: Optional[str] = Form(""),
-    ):
-        return cls(
-            content_id=content_id,
-            url=url,
-            page_no=page_no,
-        )
+    async def as_form(cls, request: Request, content_id: str = Form(...)):
+        # url, page_no and file uploads were accepted before parsing moved to the
+        # worker, which always ingests the stored source of the content
+        unsupported = sorted(set((await request.form()).keys()) - {"content_id"})
+        if unsupported:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unsupported fields: {', '.join(unsupported)}. "
+                "The stored source of the content is ingested",
+            )
+        return cls(content_id=content_id)
+
+
+IngestContentRequestModel: Type = create_model(
+    "IngestContentRequest", **ingest_content_fields
+)
+
 
+class IngestContentRequest(IngestContentRequestModel):
     pass
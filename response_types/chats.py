@@ -3,15 +3,39 @@ from typing import Optional, List
 from datetime import datetime
 
 
+class LastMessageData(BaseModel):
+    question: Optional[str] = None
+    answer: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
 class ConversationData(BaseModel):
     id: int
     name: str
     username: str
     created_at: datetime
     updated_at: datetime
+    last_message: Optional[LastMessageData] = None
 
 
 class ListChatThreadsResponse(BaseModel):
     data: Optional[List[ConversationData]] = None
+    next_cursor: Optional[str] = None
+    status: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class ChatTurnData(BaseModel):
+    id: int
+    question: Optional[str] = None
+    answer: Optional[str] = None
+    model_name: Optional[str] = None
+    topic_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class ConversationHistoryResponse(BaseModel):
+    data: Optional[List[ChatTurnData]] = None
+    next_cursor: Optional[str] = None
     status: Optional[str] = None
     detail: Optional[str] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
 
@@ -66,6 +66,8 @@ class ContentData(BaseModel):
 
 class GetContentResponse(BaseModel):
     data: Optional[List[ContentData]] = []
+    next_cursor: Optional[str] = None
+    total_estimate: Optional[int] = None
     status: Optional[str] = None
     detail: Optional[str] = None
 
@@ -88,7 +90,29 @@ class DeleteContentResponse(BaseModel):
     detail: Optional[str] = None
 
 
+class IngestionJobData(BaseModel):
+    id: int
+    content_id: int
+    status: str
+    attempts: int
+    max_attempts: int
+    run_after: Optional[datetime] = None
+    last_error: Optional[str] = None
+    # Seconds per stage: queue_wait, parse, extract, embed, insert, total
+    stage_timings: Optional[Dict[str, float]] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
 class ParseContentResponse(BaseModel):
-    data: Optional[str] = None
+    data: Optional[IngestionJobData] = None
+    status: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class ViewIngestionJobResponse(BaseModel):
+    data: Optional[IngestionJobData] = None
     status: Optional[str] = None
     detail: Optional[str] = None
@@ -1,8 +1,14 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Dict, Any
 
 
 class DefaultTableCreationResponse(BaseModel):
     data: Optional[str] = None
     status: Optional[str] = None
     detail: Optional[str] = None
+
+
+class ServiceMetricsResponse(BaseModel):
+    data: Optional[Dict[str, Any]] = None
+    status: Optional[str] = None
+    detail: Optional[str] = None
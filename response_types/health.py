@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import Optional, Dict, Any
+
+
+class ReadinessResponse(BaseModel):
+    data: Optional[Dict[str, Any]] = None
+    status: Optional[str] = None
+    detail: Optional[str] = None
@@ -31,6 +31,7 @@ class TopicData(BaseModel):
 
 class GetTopicResponse(BaseModel):
     data: List[TopicData]
+    next_cursor: Optional[str] = None
     status: str
 
 
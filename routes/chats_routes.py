@@ -1,11 +1,30 @@
-from fastapi import APIRouter
-from controllers.chats_controller import list_chat_threads_controller
-from request_types.chats import ListChatThreadsRequest
-from response_types.chats import ListChatThreadsResponse
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from connection.postgres import get_async_db
+from controllers.chats_controller import (
+    list_chat_threads_controller,
+    get_conversation_history_controller,
+)
+from request_types.chats import ListChatThreadsRequest, ConversationHistoryRequest
+from response_types.chats import ListChatThreadsResponse, ConversationHistoryResponse
+from middleware.auth import AuthenticatedUser, get_authenticated_user
 
 router = APIRouter()
 
 
 @router.post("/list-chat-threads", response_model=ListChatThreadsResponse)
-def list_chat_threads(data: ListChatThreadsRequest):
-    return list_chat_threads_controller(data)
+async def list_chat_threads(
+    data: ListChatThreadsRequest, db: AsyncSession = Depends(get_async_db)
+):
+    return await list_chat_threads_controller(data, db)
+
+
+@router.post("/get-conversation-history", response_model=ConversationHistoryResponse)
+async def get_conversation_history(
+    data: ConversationHistoryRequest,
+    auth_user: AuthenticatedUser = Depends(get_authenticated_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await get_conversation_history_controller(
+        data, auth_user.user_details["Username"], db
+    )
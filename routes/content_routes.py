@@ -4,8 +4,6 @@ from fastapi import (
     Depends,
     HTTPException,
     status,
-    BackgroundTasks,
-    Header,
 )
 from controllers.content_controller import (
     fetch_scrape_content_controller,
@@ -15,6 +13,7 @@ from controllers.content_controller import (
     edit_content_controller,
     delete_content_controller,
     parse_content_controller,
+    view_ingestion_job_controller,
 )
 from request_types.contents import (
     ScrapeDataRequest,
@@ -32,8 +31,11 @@ from response_types.content import (
     EditContentResponse,
     DeleteContentResponse,
     ParseContentResponse,
+    ViewIngestionJobResponse,
 )
 from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from connection.postgres import get_async_db
 from middleware.auth import AuthenticatedUser, get_authenticated_user
 from helpers.service import validate_user_able_peform_this_operation
 
@@ -48,20 +50,18 @@ async def scrape_data(data: ScrapeDataRequest):
 
 @router.post("/create-content", response_model=CreateContentResponse)
 async def create_content(
-    bgt: BackgroundTasks,
     form_data: CreateContentRequest = Depends(CreateContentRequest.as_form),
     file: Optional[UploadFile] = Depends(validate_file),
-    authorization: str = Header(None),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return await create_content_controller(form_data, file, bgt, authorization)
+    return await create_content_controller(form_data, file, db)
 
 
 @router.post("/edit-content", response_model=EditContentResponse)
 async def edit_content(
-    bgt: BackgroundTasks,
     data: EditContentRequest,
     auth_user: AuthenticatedUser = Depends(get_authenticated_user),
-    authorization: str = Header(None),
+    db: AsyncSession = Depends(get_async_db),
 ):
     authority = validate_user_able_peform_this_operation(auth_user.groups)
     if not authority:
@@ -69,22 +69,26 @@ async def edit_content(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to perform this operation.",
         )
-    return edit_content_controller(data, bgt, authorization)
+    return await edit_content_controller(data, db)
 
 
 @router.post("/get-contents", response_model=GetContentResponse)
-def get_contents(data: GetContentRequest):
-    return get_contents_controller(data)
+async def get_contents(
+    data: GetContentRequest, db: AsyncSession = Depends(get_async_db)
+):
+    return await get_contents_controller(data, db)
 
 
 @router.get("/view-content/{id}", response_model=ViewContentResponse)
-def view_content(id: int):
-    return view_content_controller(id)
+async def view_content(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await view_content_controller(id, db)
 
 
 @router.delete("/delete-content/{id}", response_model=DeleteContentResponse)
-def delete_topic(
-    id: str, auth_user: AuthenticatedUser = Depends(get_authenticated_user)
+async def delete_topic(
+    id: str,
+    auth_user: AuthenticatedUser = Depends(get_authenticated_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     authority = validate_user_able_peform_this_operation(auth_user.groups)
     if not authority:
@@ -92,12 +96,19 @@ def delete_topic(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to perform this operation.",
         )
-    return delete_content_controller(id)
+    return await delete_content_controller(id, db)
 
 
+# Queues the content for the ingestion worker, parsing does not run in the API
 @router.post("/parse-contents", response_model=ParseContentResponse)
 async def parse_contents(
     formdata: ParseContentRequest = Depends(ParseContentRequest.as_form),
-    file: Optional[UploadFile] = Depends(validate_file),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return await parse_content_controller(formdata, file)
+    return await parse_content_controller(formdata, db)
+
+
+# Latest ingestion job of a content, with the seconds spent in each stage
+@router.get("/view-ingestion-job/{content_id}", response_model=ViewIngestionJobResponse)
+async def view_ingestion_job(content_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await view_ingestion_job_controller(content_id, db)
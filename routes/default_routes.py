@@ -1,6 +1,9 @@
 from fastapi import APIRouter
-from controllers.default_controller import create_default_tables_in_ps_controller
-from response_types.default import DefaultTableCreationResponse
+from controllers.default_controller import (
+    create_default_tables_in_ps_controller,
+    get_service_metrics_controller,
+)
+from response_types.default import DefaultTableCreationResponse, ServiceMetricsResponse
 
 router = APIRouter()
 
@@ -10,3 +13,8 @@ router = APIRouter()
 )
 def add_default_tables_in_ps():
     return create_default_tables_in_ps_controller()
+
+
+@router.get("/service-metrics", response_model=ServiceMetricsResponse)
+def service_metrics():
+    return get_service_metrics_controller()
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from controllers.health_controller import get_readiness_controller
+from response_types.health import ReadinessResponse
+
+router = APIRouter()
+
+
+# Unauthenticated, polled by the load balancer health check
+@router.get("/ready", response_model=ReadinessResponse)
+async def ready():
+    return await get_readiness_controller()
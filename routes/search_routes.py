@@ -1,4 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from connection.postgres import get_async_db
 from controllers.search_controller import search_knowledge_base_controller
 from request_types.search import SearchKnowledgeBaseRequest
 from response_types.search import SearchResultResponse
@@ -7,5 +9,7 @@ router = APIRouter()
 
 
 @router.post("/search-knowledge-base", response_model=SearchResultResponse)
-def search_knowledge_base_(data: SearchKnowledgeBaseRequest):
-    return search_knowledge_base_controller(data)
+async def search_knowledge_base_(
+    data: SearchKnowledgeBaseRequest, db: AsyncSession = Depends(get_async_db)
+):
+    return await search_knowledge_base_controller(data, db)
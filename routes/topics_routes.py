@@ -1,4 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Header
+from sqlalchemy.ext.asyncio import AsyncSession
+from connection.postgres import get_async_db
 from controllers.topics_controller import (
     create_topics_controller,
     edit_topics_controller,
@@ -20,25 +22,33 @@ router = APIRouter()
 
 
 @router.post("/create-topics", response_model=CreateTopicResponse)
-def create_topics(data: AddTopicRequest):
-    return create_topics_controller(data)
+async def create_topics(
+    data: AddTopicRequest, db: AsyncSession = Depends(get_async_db)
+):
+    return await create_topics_controller(data, db)
 
 
 @router.post("/edit-topics", response_model=EditTopicResponse)
-def edit_topics(data: EditTopicRequest):
-    return edit_topics_controller(data)
+async def edit_topics(
+    data: EditTopicRequest, db: AsyncSession = Depends(get_async_db)
+):
+    return await edit_topics_controller(data, db)
 
 
 @router.post("/get-topics", response_model=GetTopicResponse)
-def get_topics(data: GetTopicRequest):
-    return get_topics_controller(data)
+async def get_topics(
+    data: GetTopicRequest,
+    db: AsyncSession = Depends(get_async_db),
+    if_none_match: str = Header(None),
+):
+    return await get_topics_controller(data, db, if_none_match)
 
 
 @router.get("/view-topics/{id}", response_model=ViewTopicResponse)
-def view_topics(id: str):
-    return view_topic_controller(id)
+async def view_topics(id: str, db: AsyncSession = Depends(get_async_db)):
+    return await view_topic_controller(id, db)
 
 
 @router.delete("/delete-topic/{id}", response_model=DeleteTopicResponse)
-def delete_topic(id: str):
-    return delete_topic_controller(id)
+async def delete_topic(id: str, db: AsyncSession = Depends(get_async_db)):
+    return await delete_topic_controller(id, db)
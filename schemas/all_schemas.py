@@ -1,42 +1,127 @@
-from sqlalchemy import Table, MetaData
+from sqlalchemy import Table, MetaData, Index, text
 
 from config.constants import (
+    LEVEL_NAMES,
     TOPICS_TABLE_NAME,
     CONTENTS_TABLE_NAME,
     USER_CHAT_HISTORY_TABLE_NAME,
     USER_CONVERSATION_TABLE_NAME,
+    INGESTION_CHECKPOINTS_TABLE_NAME,
+    INGESTION_JOBS_TABLE_NAME,
+    CACHE_VERSIONS_TABLE_NAME,
 )
 from schemas.columns import (
     topic_table_columns,
     content_table_columns,
     user_chat_history_columns,
     user_conversation_columns,
+    ingestion_checkpoint_columns,
+    ingestion_job_columns,
+    cache_version_columns,
 )
 
+# Every table is declared on one shared MetaData, services read it instead of reflecting
+metadata = MetaData()
+
 topic_table_schema = Table(
     TOPICS_TABLE_NAME,
-    MetaData(),
+    metadata,
     *topic_table_columns,
     extend_existing=True,
 )
 
 contents_table_schema = Table(
     CONTENTS_TABLE_NAME,
-    MetaData(),
+    metadata,
     *content_table_columns,
     extend_existing=True,
 )
 
+# Indexes are created by migrations/versions, declared here so they stay in sync
+Index(
+    f"ix_topics_{'_'.join(LEVEL_NAMES)}_is_deleted",
+    *[topic_table_schema.c[level] for level in LEVEL_NAMES],
+    topic_table_schema.c.is_deleted,
+)
+
+Index(
+    "ix_contents_topic_ids",
+    contents_table_schema.c.topic_ids,
+    postgresql_using="gin",
+)
+
+# Matches the keyset order of get-contents
+Index(
+    "ix_contents_updated_at_id",
+    contents_table_schema.c.updated_at.desc().nulls_last(),
+    contents_table_schema.c.id.desc(),
+)
+
 user_history_table_schema = Table(
     USER_CHAT_HISTORY_TABLE_NAME,
-    MetaData(),
+    metadata,
     *user_chat_history_columns,
     extend_existing=True,
 )
 
 user_coversation_table_schema = Table(
     USER_CONVERSATION_TABLE_NAME,
-    MetaData(),
+    metadata,
     *user_conversation_columns,
     extend_existing=True,
 )
+
+# Thread listing per user and turns per conversation, in their keyset order
+Index(
+    "ix_user_conversation_username_created_at_id",
+    user_coversation_table_schema.c.username,
+    user_coversation_table_schema.c.created_at.desc().nulls_last(),
+    user_coversation_table_schema.c.id.desc(),
+)
+Index(
+    "ix_user_chat_history_conversation_id_created_at_id",
+    user_history_table_schema.c.conversation_id,
+    user_history_table_schema.c.created_at.desc().nulls_last(),
+    user_history_table_schema.c.id.desc(),
+)
+
+ingestion_checkpoints_table_schema = Table(
+    INGESTION_CHECKPOINTS_TABLE_NAME,
+    metadata,
+    *ingestion_checkpoint_columns,
+    extend_existing=True,
+)
+
+ingestion_jobs_table_schema = Table(
+    INGESTION_JOBS_TABLE_NAME,
+    metadata,
+    *ingestion_job_columns,
+    extend_existing=True,
+)
+
+# Workers claim from the queued rows in run_after order
+Index(
+    "ix_ingestion_jobs_queued_run_after",
+    ingestion_jobs_table_schema.c.run_after,
+    ingestion_jobs_table_schema.c.id,
+    postgresql_where=text("status = 'queued'"),
+)
+# At most one pending job per content, enqueueing again is a no-op
+Index(
+    "uq_ingestion_jobs_pending_content_id",
+    ingestion_jobs_table_schema.c.content_id,
+    unique=True,
+    postgresql_where=text("status IN ('queued', 'running')"),
+)
+Index(
+    "ix_ingestion_jobs_content_id_created_at",
+    ingestion_jobs_table_schema.c.content_id,
+    ingestion_jobs_table_schema.c.created_at,
+)
+
+cache_versions_table_schema = Table(
+    CACHE_VERSIONS_TABLE_NAME,
+    metadata,
+    *cache_version_columns,
+    extend_existing=True,
+)
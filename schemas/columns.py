@@ -1,6 +1,12 @@
-from sqlalchemy import Column, Integer, String, TIMESTAMP, func, Boolean, TEXT
-from config.constants import LEVEL_NAMES
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import Column, Integer, String, TIMESTAMP, func, Boolean, TEXT, Float
+from sqlalchemy import BigInteger
+from sqlalchemy import ForeignKey
+from config.constants import (
+    LEVEL_NAMES,
+    USER_CONVERSATION_TABLE_NAME,
+    CONTENTS_TABLE_NAME,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 
 
 topic_table_columns = [
@@ -47,7 +53,15 @@ user_chat_history_columns = [
     Column("answer", TEXT),
     Column("model_name", String(255)),
     Column("topic_id", String(255)),
-    Column("conversation_id", String(255)),
+    Column(
+        "conversation_id",
+        Integer,
+        ForeignKey(
+            f"{USER_CONVERSATION_TABLE_NAME}.id",
+            name="fk_user_chat_history_conversation_id",
+            ondelete="CASCADE",
+        ),
+    ),
     Column("is_deleted", Boolean, default=False),
     Column("created_at", TIMESTAMP, server_default=func.now()),
     Column("updated_at", TIMESTAMP, onupdate=func.now()),
@@ -60,3 +74,58 @@ user_conversation_columns = [
     Column("created_at", TIMESTAMP, server_default=func.now()),
     Column("updated_at", TIMESTAMP, onupdate=func.now()),
 ]
+
+# Per-page ingestion progress, rows live until the content is stored in the KB
+ingestion_checkpoint_columns = [
+    Column(
+        "content_id",
+        Integer,
+        ForeignKey(
+            f"{CONTENTS_TABLE_NAME}.id",
+            name="fk_ingestion_checkpoints_content_id",
+            ondelete="CASCADE",
+        ),
+        primary_key=True,
+    ),
+    Column("page", Integer, primary_key=True),
+    Column("markdown", TEXT),
+    Column("page_metadata", JSONB, nullable=True),
+    Column("embedding", ARRAY(Float), nullable=True),
+    Column("inserted", Boolean, default=False, nullable=False),
+    Column("created_at", TIMESTAMP, server_default=func.now()),
+    Column("updated_at", TIMESTAMP, onupdate=func.now()),
+]
+
+ingestion_job_columns = [
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column(
+        "content_id",
+        Integer,
+        ForeignKey(
+            f"{CONTENTS_TABLE_NAME}.id",
+            name="fk_ingestion_jobs_content_id",
+            ondelete="CASCADE",
+        ),
+        nullable=False,
+    ),
+    # queued -> running -> succeeded, or back to queued until it is dead
+    Column("status", String(20), nullable=False),
+    Column("attempts", Integer, default=0, nullable=False),
+    Column("max_attempts", Integer, nullable=False),
+    Column("run_after", TIMESTAMP, server_default=func.now(), nullable=False),
+    Column("locked_by", String(255), nullable=True),
+    Column("locked_at", TIMESTAMP, nullable=True),
+    Column("last_error", TEXT, nullable=True),
+    Column("stage_timings", JSONB, nullable=True),
+    Column("created_at", TIMESTAMP, server_default=func.now()),
+    Column("updated_at", TIMESTAMP, onupdate=func.now()),
+    Column("started_at", TIMESTAMP, nullable=True),
+    Column("finished_at", TIMESTAMP, nullable=True),
+]
+
+# One row per cached table, bumped in the transaction of every write to it
+cache_version_columns = [
+    Column("name", String(100), primary_key=True),
+    Column("version", BigInteger, default=0, nullable=False),
+    Column("updated_at", TIMESTAMP, server_default=func.now()),
+]
@@ -1,42 +1,91 @@
-from request_types.chats import ListChatThreadsRequest
-from helpers.service import print_log
-from connection.postgres import get_db_engine, close_connection, load_all_tables
-from config.constants import USER_CONVERSATION_TABLE_NAME, GLOBAL_DATABASE_NAME
-from fastapi import HTTPException, status
-from sqlalchemy.sql.expression import nulls_last
-from sqlalchemy import desc
+from request_types.chats import ListChatThreadsRequest, ConversationHistoryRequest
+from helpers.service import print_log, keyset_order_by, keyset_after, encode_cursor
+from connection.postgres import load_all_tables
+from config.constants import (
+    USER_CONVERSATION_TABLE_NAME,
+    USER_CHAT_HISTORY_TABLE_NAME,
+    CHAT_PREVIEW_LENGTH,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, true
 
 metadataCollection = load_all_tables()
 
 
-def list_chat_threads(request: ListChatThreadsRequest):
-    db, engine = None, None
+def next_page(rows: list, limit: int, sort_column: str):
+    # Queries fetch limit + 1 rows, the extra one means there is a next page
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1], sort_column)
+    return rows, None
+
+
+async def list_chat_threads(request: ListChatThreadsRequest, db: AsyncSession):
     try:
         print_log("list_chat_threads", "POST", "entry", request)
-        db, engine = get_db_engine()
-        if db is None:
-            print(f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.",
-            )
         user_conversation_table = metadataCollection.tables[
             USER_CONVERSATION_TABLE_NAME
         ]
+        user_chat_history_table = metadataCollection.tables[
+            USER_CHAT_HISTORY_TABLE_NAME
+        ]
         filters = [user_conversation_table.c.username == request.username]
+        if request.cursor:
+            filters.append(
+                keyset_after(user_conversation_table, request.cursor, "created_at")
+            )
 
-        # Order by updated_at DESC
+        # Latest turn of each thread on the page, one index lookup per thread
+        last_message = (
+            select(
+                user_chat_history_table.c.question,
+                func.left(
+                    user_chat_history_table.c.answer, CHAT_PREVIEW_LENGTH
+                ).label("answer"),
+                user_chat_history_table.c.created_at,
+            )
+            .where(
+                user_chat_history_table.c.conversation_id
+                == user_conversation_table.c.id,
+                user_chat_history_table.c.is_deleted == False,
+            )
+            .order_by(user_chat_history_table.c.created_at.desc())
+            .limit(1)
+            .lateral("last_message")
+        )
+
+        # Order by created_at DESC
         query = (
-            user_conversation_table.select()
+            select(
+                user_conversation_table,
+                last_message.c.question.label("last_question"),
+                last_message.c.answer.label("last_answer"),
+                last_message.c.created_at.label("last_message_at"),
+            )
+            .select_from(user_conversation_table.outerjoin(last_message, true()))
             .where(*filters)
-            .order_by(nulls_last(desc(user_conversation_table.c.created_at)))
+            .order_by(*keyset_order_by(user_conversation_table, "created_at"))
+            .limit(request.limit + 1)
         )
 
-        chat_threads_list_data = db.execute(query).mappings().fetchall()
+        rows = (await db.execute(query)).mappings().fetchall()
+        chat_threads_list_data, next_cursor = next_page(
+            [dict(row) for row in rows], request.limit, "created_at"
+        )
+        for thread in chat_threads_list_data:
+            last_message_at = thread.pop("last_message_at")
+            question = thread.pop("last_question")
+            answer = thread.pop("last_answer")
+            thread["last_message"] = (
+                {"question": question, "answer": answer, "created_at": last_message_at}
+                if last_message_at
+                else None
+            )
 
         print_log("list_chat_threads", "POST", "exit", "Chat threads list successfully")
         return {
             "data": chat_threads_list_data,
+            "next_cursor": next_cursor,
             "error": None,
         }
     except Exception as e:
@@ -46,7 +95,72 @@ def list_chat_threads(request: ListChatThreadsRequest):
             "error",
             f"Error occurred while searching knowledge base: {e}",
         )
-        if db:
-            db.rollback()
-        close_connection(db, engine)
+        await db.rollback()
         return {"data": None, "code": 400, "error": str(e)}
+
+
+async def get_conversation_history(
+    request: ConversationHistoryRequest, username: str, db: AsyncSession
+):
+    try:
+        print_log("get_conversation_history", "POST", "entry", request)
+        user_conversation_table = metadataCollection.tables[
+            USER_CONVERSATION_TABLE_NAME
+        ]
+        user_chat_history_table = metadataCollection.tables[
+            USER_CHAT_HISTORY_TABLE_NAME
+        ]
+
+        # Only the owner of the conversation can read it
+        conversation = (
+            await db.execute(
+                select(user_conversation_table.c.id).where(
+                    user_conversation_table.c.id == int(request.conversation_id),
+                    user_conversation_table.c.username == username,
+                )
+            )
+        ).first()
+        if not conversation:
+            return {"data": None, "error": "Conversation not found"}
+
+        filters = [
+            user_chat_history_table.c.conversation_id == int(request.conversation_id),
+            user_chat_history_table.c.is_deleted == False,
+        ]
+        if request.cursor:
+            filters.append(
+                keyset_after(user_chat_history_table, request.cursor, "created_at")
+            )
+
+        query = (
+            select(
+                user_chat_history_table.c.id,
+                user_chat_history_table.c.question,
+                user_chat_history_table.c.answer,
+                user_chat_history_table.c.model_name,
+                user_chat_history_table.c.topic_id,
+                user_chat_history_table.c.created_at,
+            )
+            .where(*filters)
+            .order_by(*keyset_order_by(user_chat_history_table, "created_at"))
+            .limit(request.limit + 1)
+        )
+
+        rows = (await db.execute(query)).mappings().fetchall()
+        history, next_cursor = next_page(
+            [dict(row) for row in rows], request.limit, "created_at"
+        )
+
+        print_log(
+            "get_conversation_history", "POST", "exit", "History fetched successfully"
+        )
+        return {"data": history, "next_cursor": next_cursor, "error": None}
+    except Exception as e:
+        print_log(
+            "get_conversation_history",
+            "POST",
+            "error",
+            f"Error occurred while getting conversation history: {e}",
+        )
+        await db.rollback()
+        return {"data": None, "error": str(e)}
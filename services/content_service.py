@@ -1,58 +1,53 @@
 from helpers.service import print_log, upload_docs_to_s3
-from connection.postgres import (
-    close_connection,
-    get_db_engine,
-    load_all_tables,
+from helpers.user_profiles import get_created_updated_users, enrich_with_user_profiles
+from connection.postgres import load_all_tables
+from connection.milvus import (
+    create_or_load_db,
+    create_or_load_collection,
+    upsert_partial,
 )
-from connection.milvus import create_or_load_db, create_or_load_collection
+from services.ingestion_jobs_service import enqueue_ingestion_job
 from config.constants import (
-    GLOBAL_DATABASE_NAME,
     CONTENTS_TABLE_NAME,
     LEVEL_LIST_DEFAULT_CONTENT_STATUS,
     TOPICS_TABLE_NAME,
     LEVEL_NAMES,
     CONTENT_STATUS,
-    AWS_REGION,
-    COGNITO_POOL_ID,
-    KB_LLM_SERVICE_URL,
     MILVUS_DATABASE_NAME,
     MILVUS_CONTENT_COLLECTION_NAME,
+    MILVUS_UPDATE_BATCH_SIZE,
 )
-from helpers.service import get_result_in_json, get_signed_url, call_async_api
-from fastapi import HTTPException, status, UploadFile, BackgroundTasks
+from helpers.service import (
+    get_result_in_json,
+    get_signed_url,
+    keyset_order_by,
+    keyset_after,
+    encode_cursor,
+    estimate_row_count,
+)
+from fastapi import HTTPException, status, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from request_types.contents import (
     CreateContentRequest,
     GetContentRequest,
     EditContentRequest,
 )
-from sqlalchemy.sql.expression import nulls_last
-from sqlalchemy import func, desc
-import boto3
+from sqlalchemy import func, select, cast, TEXT
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 import os
 
 metadataCollection = load_all_tables()
 
-cognito_client = boto3.client("cognito-idp", region_name=AWS_REGION)
-
 
-def create_content(
+async def create_content(
     request: CreateContentRequest,
     file: UploadFile,
-    backgroundTask: BackgroundTasks,
-    authorization: str,
+    db: AsyncSession,
 ):
-    db, engine = None, None
     try:
         print_log("create_content", "POST", "entry", request)
-        db, engine = get_db_engine()
-
-        if db is None:
-            print(f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.",
-            )
 
         topic_ids = request.topic_ids
         topic_ids_list = list(map(int, topic_ids.split(",")))
@@ -60,8 +55,8 @@ def create_content(
         location = None
         if file and hasattr(file, "filename") and file.filename:
             filename, extension = os.path.splitext(file.filename)
-            uploade_file_url, location = upload_docs_to_s3(
-                file, filename, unique_id, extension, request
+            uploade_file_url, location = await run_in_threadpool(
+                upload_docs_to_s3, file, filename, unique_id, extension, request
             )
 
         request_data_for_content = {
@@ -83,38 +78,22 @@ def create_content(
         print("request_data_for_content::::", request_data_for_content)
 
         contents_table = metadataCollection.tables[CONTENTS_TABLE_NAME]
-        new_record_id = db.execute(
-            contents_table.insert()
-            .values(request_data_for_content)
-            .returning(contents_table.c.id)
+        new_record_id = (
+            await db.execute(
+                contents_table.insert()
+                .values(request_data_for_content)
+                .returning(contents_table.c.id)
+            )
         ).scalar()  # Fetch the returned ID
 
-        db.commit()
-
-        close_connection(db, engine)
-
-        # Migrate knowledge base data
+        # Migrate knowledge base data, the ingestion worker picks the job up
         if LEVEL_LIST_DEFAULT_CONTENT_STATUS[f"{request.level}"] == "ACCEPTED":
             source_mb = request.source if request.source else location
             print("source_mb: ", source_mb)
             if source_mb:
-                path = "/".join(source_mb.split("/")[-4:])
-                print("path: ", path)
-                signed_url = get_signed_url(path)
-                request_for_parsing_data = {
-                    "content_id": str(new_record_id),
-                    "url": signed_url,
-                }
-                headers = {
-                    "Authorization": authorization,
-                    "Content-Type": "application/x-www-form-urlencoded",
-                }
-                backgroundTask.add_task(
-                    call_async_api,
-                    KB_LLM_SERVICE_URL + "/parse-contents",
-                    request_for_parsing_data,
-                    headers,
-                )
+                await enqueue_ingestion_job(db, new_record_id)
+
+        await db.commit()
 
         print_log("create_content", "POST", "exit", "Content created successfully")
 
@@ -129,24 +108,13 @@ def create_content(
             "error",
             f"Error occurred while creating content: {e}",
         )
-        if db:
-            db.rollback()
-        close_connection(db, engine)
+        await db.rollback()
         return {"data": None, "error": str(e)}
 
 
-def get_contents(request: GetContentRequest):
-    db, engine = None, None
+async def get_contents(request: GetContentRequest, db: AsyncSession):
     try:
         print_log("get_contents", "POST", "entry", request)
-        db, engine = get_db_engine()
-
-        if db is None:
-            print(f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.",
-            )
 
         topics_table = metadataCollection.tables[TOPICS_TABLE_NAME]
         contents_table = metadataCollection.tables[CONTENTS_TABLE_NAME]
@@ -165,50 +133,68 @@ def get_contents(request: GetContentRequest):
             else:
                 filters.append(topics_table.c[level] == "ALL")
 
-        # Build query dynamically based on filters
-        query = topics_table.select().with_only_columns(topics_table.c.id)
-
-        if filters:
-            query = query.where(
-                *filters,
+        # Topic ids stay in SQL, array_agg is NULL (no rows) when no topic matches
+        topic_ids_query = select(func.array_agg(topics_table.c.id)).where(*filters)
+        content_filters = [
+            contents_table.c.is_deleted == False,
+            contents_table.c.topic_ids.overlap(topic_ids_query.scalar_subquery()),
+        ]
+        if request.status:
+            statuses = [item.strip() for item in request.status.split(",")]
+            content_filters.append(contents_table.c.status.in_(statuses))
+        if request.tags:
+            tags = [
+                item.strip().lower() for item in request.tags.split(",") if item.strip()
+            ]
+            # Whole tags only, "ops" must not match a content tagged "devops"
+            content_tags = func.string_to_array(
+                func.lower(
+                    func.regexp_replace(
+                        func.trim(contents_table.c.tags), r"\s*,\s*", ",", "g"
+                    )
+                ),
+                ",",
+                type_=ARRAY(TEXT),
+            )
+            content_filters.append(content_tags.overlap(cast(tags, ARRAY(TEXT))))
+        if request.title:
+            content_filters.append(
+                contents_table.c.title.icontains(request.title, autoescape=True)
             )
 
-        topic_list_data = db.execute(query).fetchall()
-        topic_list_data = get_result_in_json(topics_table, topic_list_data)
-
-        topic_ids = []
-        if len(topic_list_data) > 0:
-            topic_ids = [int(row["id"]) for row in topic_list_data]
+        total_estimate = None
+        if request.include_count:
+            total_estimate = await estimate_row_count(
+                db, select(contents_table.c.id).where(*content_filters)
+            )
 
-        # Extract relavnt contents based on topic_ids
-        content_filters = [contents_table.c.is_deleted == False]
-        if topic_ids:
-            content_filters.append(contents_table.c.topic_ids.overlap(topic_ids))
-        else:
-            return {
-                "data": [],
-                "error": None,
-            }
+        if request.cursor:
+            content_filters.append(keyset_after(contents_table, request.cursor))
 
-        # Build query dynamically based on filters
-        content_query = contents_table.select()
+        # One extra row tells whether there is a next page
+        content_query = (
+            contents_table.select()
+            .where(*content_filters)
+            .order_by(*keyset_order_by(contents_table))
+            .limit(request.limit + 1)
+        )
+        content_list_data = (await db.execute(content_query)).mappings().fetchall()
+        content_list_data = [dict(row) for row in content_list_data]
 
-        if filters:
-            content_query = content_query.where(
-                *content_filters,
-            )
+        next_cursor = None
+        if len(content_list_data) > request.limit:
+            content_list_data = content_list_data[: request.limit]
+            next_cursor = encode_cursor(content_list_data[-1])
 
-        content_query = content_query.order_by(
-            nulls_last(desc(contents_table.c.updated_at))
-        )
-        content_list_data = db.execute(content_query).fetchall()
-        content_list_data = get_result_in_json(contents_table, content_list_data)
+        if request.include_users:
+            content_list_data = await enrich_with_user_profiles(content_list_data)
 
-        close_connection(db, engine)
         print_log("get_contents", "POST", "exit", "Content list fetched successfully")
 
         return {
             "data": content_list_data,
+            "next_cursor": next_cursor,
+            "total_estimate": total_estimate,
             "error": None,
         }
     except Exception as e:
@@ -218,24 +204,13 @@ def get_contents(request: GetContentRequest):
             "error",
             f"Error occurred while getting contents: {e}",
         )
-        if db:
-            db.rollback()
-        close_connection(db, engine)
+        await db.rollback()
         return {"data": None, "error": str(e)}
 
 
-def view_content(id: int):
-    db, engine = None, None
+async def view_content(id: int, db: AsyncSession):
     try:
         print_log("view_content", "POST", "entry", {"id": id})
-        db, engine = get_db_engine()
-
-        if db is None:
-            print(f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.",
-            )
 
         contents_table = metadataCollection.tables[CONTENTS_TABLE_NAME]
         content_filters = [
@@ -247,7 +222,7 @@ def view_content(id: int):
         content_query = contents_table.select().where(
             *content_filters,
         )
-        content_data = db.execute(content_query).fetchall()
+        content_data = (await db.execute(content_query)).fetchall()
         content_data = get_result_in_json(contents_table, content_data)
 
         signed_url = None
@@ -261,47 +236,12 @@ def view_content(id: int):
                 print(path)
                 signed_url = get_signed_url(path)
 
-            print(content_data["created_by"])
-            if content_data["created_by"]:
-                try:
-                    response = cognito_client.admin_get_user(
-                        UserPoolId=COGNITO_POOL_ID,
-                        Username=content_data["created_by"],
-                    )
-
-                    user_details = {
-                        attr["Name"].replace("custom:", ""): attr["Value"]
-                        for attr in response["UserAttributes"]
-                    }
-
-                    print("content_data:::", user_details)
-                except Exception as e:
-                    print("cognito user::", str(e))
-
-            if (
-                content_data["updated_by"] is not None
-                and content_data["created_by"] != content_data["updated_by"]
-            ):
-                if content_data["updated_by"]:
-                    try:
-                        response_2 = cognito_client.admin_get_user(
-                            UserPoolId=COGNITO_POOL_ID,
-                            Username=content_data["updated_by"],
-                        )
-
-                        update_user_details = {
-                            attr2["Name"].replace("custom:", ""): attr2["Value"]
-                            for attr2 in response_2["UserAttributes"]
-                        }
-                    except Exception as e:
-                        print("cognito user::", str(e))
-            elif content_data["created_by"] == content_data["updated_by"]:
-                update_user_details = user_details
-
+            user_details, update_user_details = await get_created_updated_users(
+                content_data
+            )
         else:
             return {"data": None, "error": None}
 
-        close_connection(db, engine)
         print_log("view_content", "POST", "exit", {"id": id})
 
         return {
@@ -320,26 +260,48 @@ def view_content(id: int):
             "error",
             f"Error occurred while view content: {e}",
         )
-        if db:
-            db.rollback()
-        close_connection(db, engine)
+        await db.rollback()
         return {"data": None, "error": str(e)}
 
 
-def edit_content(
-    request: EditContentRequest, backgroundTask: BackgroundTasks, authorization
+def update_milvus_content(content_id: str, metadata_changes: dict, topic_ids_list):
+    create_or_load_db(MILVUS_DATABASE_NAME)
+    collection = create_or_load_collection(MILVUS_CONTENT_COLLECTION_NAME)
+
+    # Only the changed fields are sent, embeddings never leave milvus
+    output_fields = ["metadata"] if metadata_changes else []
+    iterator = collection.query_iterator(
+        batch_size=MILVUS_UPDATE_BATCH_SIZE,
+        expr=f"content_id == '{content_id}'",
+        output_fields=output_fields,
+    )
+    updated_pages = 0
+    try:
+        while pages := iterator.next():
+            rows = []
+            for page in pages:
+                row = {"id": page["id"]}
+                if metadata_changes:
+                    row["metadata"] = {**page["metadata"], **metadata_changes}
+                if topic_ids_list is not None:
+                    row["topic_ids"] = topic_ids_list
+                rows.append(row)
+            upsert_partial(collection, rows)
+            updated_pages += len(rows)
+    finally:
+        iterator.close()
+
+    print(f"Updated {updated_pages} milvus pages for content_id: {content_id}")
+
+
+async def edit_content(
+    request: EditContentRequest,
+    db: AsyncSession,
 ):
-    db, engine = None, None
+    # (metadata, topic_ids) of the unchanged row, once Milvus pages may be updated
+    milvus_revert = None
     try:
         print_log("edit_content", "POST", "entry", request)
-        db, engine = get_db_engine()
-
-        if db is None:
-            print(f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.",
-            )
 
         contents_table = metadataCollection.tables[CONTENTS_TABLE_NAME]
         content_filters = [
@@ -354,12 +316,16 @@ def edit_content(
                 contents_table.c.status,
                 contents_table.c.source,
                 contents_table.c.stored_in_kb,
+                contents_table.c.title,
+                contents_table.c.version,
+                contents_table.c.tags,
+                contents_table.c.topic_ids,
             )
             .where(
                 *content_filters,
             )
         )
-        exist_content_data = db.execute(content_query).mappings().fetchall()
+        exist_content_data = (await db.execute(content_query)).mappings().fetchall()
 
         topic_ids = request.topic_ids
         topic_ids_list = list(map(int, topic_ids.split(",")))
@@ -385,121 +351,51 @@ def edit_content(
             request_data_for_content[status_time_fields[request.status]] = func.now()
 
         print("request_update_data_for_content::", request_data_for_content)
-        db.execute(
+        await db.execute(
             contents_table.update()
             .where(contents_table.c.id == int(request.id))
             .values(request_data_for_content)
         )
-        db.commit()
-
-        close_connection(db, engine)
-
-        # Update Data in Milvus
-        create_or_load_db(MILVUS_DATABASE_NAME)
-        collection = create_or_load_collection(MILVUS_CONTENT_COLLECTION_NAME)
 
         if (
             len(exist_content_data) > 0
             and exist_content_data[0]["status"] == "ACCEPTED"
             and exist_content_data[0]["stored_in_kb"] == "STORED"
         ):
-            content_id = request.id
-            # Step 1: Retrieve all existing records with the given content_id
-            search_expr = (
-                f"content_id == '{content_id}'"  # Ensure it's treated as a string
-            )
-            results = collection.query(
-                search_expr,
-                output_fields=[
-                    "text",
-                    "embedding",
-                    "summary",
-                    "topics",
-                    "questions",
-                    "named_entities",
-                    "metadata",
-                    "content_id",
-                    "is_deleted",
-                ],
+            # Update Data in Milvus before the commit, any later error undoes both
+            existing = exist_content_data[0]
+            metadata_changes = {
+                field: getattr(request, field)
+                for field in ["title", "version", "tags"]
+                if getattr(request, field) != existing[field]
+            }
+            changed_topic_ids = (
+                topic_ids_list if topic_ids_list != existing["topic_ids"] else None
             )
-
-            if not results:
-                print(f"No records found with content_id: {content_id}")
-            else:
-                # Step 2: Delete all records with the given content_id
-                delete_expr = f"content_id == '{content_id}'"
-                collection.delete(delete_expr)
-                print(f"Deleted {len(results)} records with content_id: {content_id}")
-
-                # Step 3: Reinsert updated records
-                insert_data = [
-                    [] for _ in range(10)
-                ]  # Same format as your insert function
-
-                for record in results:
-                    updated_metadata = {
-                        "page": record["metadata"]["page"],  # Keep existing page value
-                        "title": request.title,  # Update title
-                        "version": request.version,  # Update version
-                        "tags": request.tags,  # Update tags
-                    }
-
-                    insert_data[0].append(record["text"])
-                    insert_data[1].append(record["embedding"])
-                    insert_data[2].append(record["summary"])
-                    insert_data[3].append(record["topics"])
-                    insert_data[4].append(record["questions"])
-                    insert_data[5].append(record["named_entities"])
-                    insert_data[6].append(updated_metadata)
-                    insert_data[7].append(topic_ids_list)
-                    insert_data[8].append(record["content_id"])
-                    insert_data[9].append(False)
-
-                collection.insert(insert_data)
-                print(
-                    f"Reinserted {len(results)} records with updated topic_ids for content_id: {content_id}"
+            if metadata_changes or changed_topic_ids is not None:
+                milvus_revert = (
+                    {field: existing[field] for field in metadata_changes},
+                    existing["topic_ids"] if changed_topic_ids is not None else None,
                 )
-
-                # Step 4: Flush to persist changes
-                collection.flush()
-
-                # Step 6: Fetch the newly inserted records to verify the update
-                updated_results = collection.query(
-                    search_expr, output_fields=["metadata", "topic_ids", "content_id"]
+                await run_in_threadpool(
+                    update_milvus_content,
+                    str(request.id),
+                    metadata_changes,
+                    changed_topic_ids,
                 )
 
-                print(f"Updated Records for content_id {content_id}:")
-                for record in updated_results:
-                    print(record)
-
-        print_log("edit_content", "POST", "exit", "Content updated successfully")
-
         if (
             len(exist_content_data) > 0
             and exist_content_data[0]["status"] != "ACCEPTED"
             and request.status == "ACCEPTED"
+            and exist_content_data[0]["source"]
         ):
-            # Migrate knowledge base data
-            exist_content_data = exist_content_data[0]
-            source_mb = exist_content_data["source"]
-            if source_mb:
-                path = "/".join(source_mb.split("/")[-4:])
-                print("path: ", path)
-                signed_url = get_signed_url(path)
-                request_for_parsing_data = {
-                    "content_id": str(request.id),
-                    "url": signed_url,
-                }
-                headers = {
-                    "Authorization": authorization,
-                    "Content-Type": "application/x-www-form-urlencoded",
-                }
-                backgroundTask.add_task(
-                    call_async_api,
-                    KB_LLM_SERVICE_URL + "/parse-contents",
-                    request_for_parsing_data,
-                    headers,
-                )
+            # Migrate knowledge base data, the ingestion worker picks the job up
+            await enqueue_ingestion_job(db, request.id)
+
+        await db.commit()
+
+        print_log("edit_content", "POST", "exit", "Content updated successfully")
 
         return {
             "data": "Content updated successfully",
@@ -512,24 +408,34 @@ def edit_content(
             "error",
             f"Error occurred while editing content: {e}",
         )
-        if db:
-            db.rollback()
-        close_connection(db, engine)
+        await db.rollback()
+        if milvus_revert:
+            # The row is rolled back, Milvus must not keep the new values
+            try:
+                await run_in_threadpool(
+                    update_milvus_content, str(request.id), *milvus_revert
+                )
+            except Exception as revert_error:
+                print(
+                    f"Milvus pages of content {request.id} not reverted: {revert_error}"
+                )
         return {"data": None, "error": str(e)}
 
 
-def delete_content(id: str):
-    db, engine = None, None
+def delete_milvus_content(id: str):
+    create_or_load_db(MILVUS_DATABASE_NAME)
+    collection = create_or_load_collection(MILVUS_CONTENT_COLLECTION_NAME)
+
+    # Delete records where content_id matches
+    delete_expr = f"content_id == '{str(id)}'"
+    collection.delete(delete_expr)
+
+    print(f"Deleted records from milvus where content_id = {int(id)}")
+
+
+async def delete_content(id: str, db: AsyncSession):
     try:
         print_log("delete_content", "DELETE", "entry", id)
-        db, engine = get_db_engine()
-
-        if db is None:
-            print(f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.",
-            )
 
         contents_table = metadataCollection.tables[CONTENTS_TABLE_NAME]
 
@@ -537,7 +443,7 @@ def delete_content(id: str):
         query_check = contents_table.select().where(
             contents_table.c.id == int(id), contents_table.c.is_deleted == False
         )
-        result = db.execute(query_check).fetchone()
+        result = (await db.execute(query_check)).fetchone()
 
         if not result:
             raise HTTPException(
@@ -553,20 +459,11 @@ def delete_content(id: str):
             .values(is_deleted=True)
         )
 
-        db.execute(query)
-        db.commit()
+        await db.execute(query)
+        await db.commit()
 
         # Delete Data from Milvus
-        create_or_load_db(MILVUS_DATABASE_NAME)
-        collection = create_or_load_collection(MILVUS_CONTENT_COLLECTION_NAME)
-
-        # Delete records where content_id matches
-        delete_expr = f"content_id == '{str(id)}'"
-        collection.delete(delete_expr)
-
-        print(f"Deleted records from milvus where content_id = {int(id)}")
-
-        close_connection(db, engine)
+        await run_in_threadpool(delete_milvus_content, id)
 
         print_log(
             "delete_content", "DELETE", "exit", f"Content {id} deleted successfully"
@@ -583,7 +480,5 @@ def delete_content(id: str):
             "error",
             f"Error occurred while deleting content: {e}",
         )
-        if db:
-            db.rollback()
-        close_connection(db, engine)
+        await db.rollback()
         return {"data": None, "error": str(e)}
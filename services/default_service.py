@@ -1,41 +1,30 @@
-from schemas.all_schemas import (
-    topic_table_schema,
-    contents_table_schema,
-    user_history_table_schema,
-    user_coversation_table_schema,
+from connection.postgres import (
+    upgrade_database,
+    get_pool_stats,
+    get_tenant_engine_stats,
 )
-from sqlalchemy import MetaData
-from connection.postgres import engine_pool
 from connection.milvus import (
     create_or_load_collection,
     create_or_load_db,
 )
 from config.constants import MILVUS_DATABASE_NAME, MILVUS_CONTENT_COLLECTION_NAME
-from schemas.milvus_all_schemas import mv_content_fields
-from pymilvus import CollectionSchema, utility, Index
-
-
-metadata = MetaData()
+from helpers.singleflight import get_singleflight_stats
+from helpers.response_cache import get_response_cache_stats
+from helpers.rate_limiter import get_scheduler_stats
+from helpers.resilience import get_resilience_stats
+from helpers.cognito_jwt import get_auth_stats
+from helpers.user_profiles import user_profiles
 
 
 def add_default_tables_in_postgres_db():
     try:
-        engine = engine_pool
-        topic_table = topic_table_schema
-        contents_table = contents_table_schema
-        user_histoy_table = user_history_table_schema
-        user_conversation_table = user_coversation_table_schema
-        metadata.create_all(
-            engine,
-            tables=[
-                topic_table,
-                contents_table,
-                user_histoy_table,
-                user_conversation_table,
-            ],
-        )
+        # Versioned migrations (migrations/versions) instead of create_all
+        upgrade_database()
 
         try:
+            from pymilvus import CollectionSchema
+            from schemas.milvus_all_schemas import mv_content_fields
+
             db = create_or_load_db(MILVUS_DATABASE_NAME)
             print("db: ", db)
             collection_schema = CollectionSchema(
@@ -58,3 +47,23 @@ def add_default_tables_in_postgres_db():
     except Exception as e:
         print(f"Error occured while creating default tables: {e}")
         return {"data": None, "code": 400, "error": str(e)}
+
+
+def get_service_metrics():
+    try:
+        return {
+            "data": {
+                "postgres_pool": get_pool_stats(),
+                "tenant_engines": get_tenant_engine_stats(),
+                "singleflight": get_singleflight_stats(),
+                "response_caches": get_response_cache_stats(),
+                "auth": get_auth_stats(),
+                "user_profiles": user_profiles.get_stats(),
+                "schedulers": get_scheduler_stats(),
+                **get_resilience_stats(),
+            },
+            "error": None,
+        }
+    except Exception as e:
+        print(f"Error occured while collecting service metrics: {e}")
+        return {"data": None, "error": str(e)}
@@ -0,0 +1,316 @@
+from connection.postgres import load_all_tables, AsyncSessionLocal
+from config.constants import (
+    CONTENTS_TABLE_NAME,
+    INGESTION_JOBS_TABLE_NAME,
+    INGESTION_JOB_MAX_ATTEMPTS,
+    INGESTION_JOB_BACKOFF_SECONDS,
+    INGESTION_JOB_MAX_BACKOFF_SECONDS,
+    INGESTION_JOB_LOCK_TIMEOUT_SECONDS,
+)
+from helpers.service import print_log, get_signed_url
+from request_types.contents import IngestContentRequest, ParseContentRequest
+from services.parsing_service import parse_contents
+from sqlalchemy import case, desc, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import timedelta
+import asyncio
+import random
+import time
+
+metadataCollection = load_all_tables()
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+# Out of attempts, kept for inspection until someone re-enqueues the content
+JOB_DEAD = "dead"
+PENDING_STATUSES = [JOB_QUEUED, JOB_RUNNING]
+
+CLAIMED_COLUMNS = ["id", "content_id", "attempts", "max_attempts"]
+
+
+async def enqueue_ingestion_job(db: AsyncSession, content_id: int):
+    # Joins the caller's transaction, the job exists only if the content change commits
+    jobs_table = metadataCollection.tables[INGESTION_JOBS_TABLE_NAME]
+    return (
+        await db.execute(
+            insert(jobs_table)
+            .values(
+                content_id=int(content_id),
+                status=JOB_QUEUED,
+                attempts=0,
+                max_attempts=INGESTION_JOB_MAX_ATTEMPTS,
+            )
+            .on_conflict_do_nothing(
+                index_elements=[jobs_table.c.content_id],
+                index_where=jobs_table.c.status.in_(PENDING_STATUSES),
+            )
+            .returning(jobs_table.c.id)
+        )
+    ).scalar()
+
+
+async def claim_ingestion_jobs(db: AsyncSession, worker_id: str, limit: int):
+    jobs_table = metadataCollection.tables[INGESTION_JOBS_TABLE_NAME]
+    claimable = (
+        select(jobs_table.c.id)
+        .where(
+            jobs_table.c.status == JOB_QUEUED, jobs_table.c.run_after <= func.now()
+        )
+        .order_by(jobs_table.c.run_after, jobs_table.c.id)
+        .limit(int(limit))
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(jobs_table)
+        .where(jobs_table.c.id.in_(claimable.scalar_subquery()))
+        .values(
+            status=JOB_RUNNING,
+            attempts=jobs_table.c.attempts + 1,
+            locked_by=worker_id,
+            locked_at=func.now(),
+            started_at=func.now(),
+            updated_at=func.now(),
+        )
+        .returning(
+            *[jobs_table.c[column] for column in CLAIMED_COLUMNS],
+            func.extract("epoch", func.now() - jobs_table.c.run_after).label(
+                "queue_wait"
+            ),
+        )
+    )
+    jobs = [dict(row) for row in result.mappings()]
+    await db.commit()
+    return jobs
+
+
+async def recover_stale_ingestion_jobs(db: AsyncSession):
+    # Workers that died mid-job stop refreshing locked_at, their jobs are retried
+    jobs_table = metadataCollection.tables[INGESTION_JOBS_TABLE_NAME]
+    result = await db.execute(
+        update(jobs_table)
+        .where(
+            jobs_table.c.status == JOB_RUNNING,
+            jobs_table.c.locked_at
+            < func.now() - timedelta(seconds=INGESTION_JOB_LOCK_TIMEOUT_SECONDS),
+        )
+        .values(
+            status=case(
+                (jobs_table.c.attempts >= jobs_table.c.max_attempts, JOB_DEAD),
+                else_=JOB_QUEUED,
+            ),
+            locked_by=None,
+            locked_at=None,
+            run_after=func.now(),
+            last_error="Worker stopped refreshing the job lock",
+            updated_at=func.now(),
+        )
+        .returning(jobs_table.c.id)
+    )
+    recovered = result.scalars().all()
+    await db.commit()
+    return recovered
+
+
+async def update_claimed_job(db: AsyncSession, job_id: int, worker_id: str, values):
+    # Only the worker holding the lock may move the job on
+    jobs_table = metadataCollection.tables[INGESTION_JOBS_TABLE_NAME]
+    await db.execute(
+        update(jobs_table)
+        .where(
+            jobs_table.c.id == int(job_id),
+            jobs_table.c.locked_by == worker_id,
+            jobs_table.c.status == JOB_RUNNING,
+        )
+        .values(updated_at=func.now(), **values)
+    )
+    await db.commit()
+
+
+def retry_delay(attempts: int):
+    backoff = min(
+        INGESTION_JOB_MAX_BACKOFF_SECONDS,
+        INGESTION_JOB_BACKOFF_SECONDS * 2 ** max(0, attempts - 1),
+    )
+    return backoff * random.uniform(0.5, 1.0)
+
+
+def failed_job_values(job: dict, error: str, stage_timings: dict):
+    if job["attempts"] >= job["max_attempts"]:
+        return {
+            "status": JOB_DEAD,
+            "locked_by": None,
+            "locked_at": None,
+            "last_error": error,
+            "stage_timings": stage_timings,
+            "finished_at": func.now(),
+        }
+    return {
+        "status": JOB_QUEUED,
+        "locked_by": None,
+        "locked_at": None,
+        "last_error": error,
+        "stage_timings": stage_timings,
+        "run_after": func.now() + timedelta(seconds=retry_delay(job["attempts"])),
+    }
+
+
+async def keep_job_locked(job_id: int, worker_id: str):
+    while True:
+        await asyncio.sleep(INGESTION_JOB_LOCK_TIMEOUT_SECONDS / 3)
+        try:
+            async with AsyncSessionLocal() as db:
+                await update_claimed_job(
+                    db, job_id, worker_id, {"locked_at": func.now()}
+                )
+        except Exception as e:
+            print(f"Could not refresh the lock of ingestion job {job_id}: {e}")
+
+
+async def build_parse_request(db: AsyncSession, content_id: int):
+    # The S3 url is signed when the job runs, a queued job may wait longer than it lives
+    contents_table = metadataCollection.tables[CONTENTS_TABLE_NAME]
+    source = (
+        await db.execute(
+            select(contents_table.c.source).where(
+                contents_table.c.id == int(content_id)
+            )
+        )
+    ).scalar()
+    if not source:
+        raise ValueError(f"Content {content_id} has no source to ingest")
+    path = "/".join(source.split("/")[-4:])
+    return IngestContentRequest(content_id=str(content_id), url=get_signed_url(path))
+
+
+async def process_ingestion_job(job: dict, worker_id: str):
+    started = time.monotonic()
+    # Seconds the job was due before a worker picked it up
+    stage_timings = {"queue_wait": round(float(job["queue_wait"]), 3)}
+    heartbeat = asyncio.create_task(keep_job_locked(job["id"], worker_id))
+    print_log("process_ingestion_job", "WORKER", "entry", job)
+    try:
+        async with AsyncSessionLocal() as db:
+            request = await build_parse_request(db, job["content_id"])
+            result = await parse_contents(request, None, db, stage_timings)
+            stage_timings["total"] = round(time.monotonic() - started, 3)
+            if result["error"]:
+                raise RuntimeError(result["error"])
+
+            await update_claimed_job(
+                db,
+                job["id"],
+                worker_id,
+                {
+                    "status": JOB_SUCCEEDED,
+                    "locked_by": None,
+                    "locked_at": None,
+                    "last_error": None,
+                    "stage_timings": stage_timings,
+                    "finished_at": func.now(),
+                },
+            )
+        print_log("process_ingestion_job", "WORKER", "exit", {**job, **stage_timings})
+    except asyncio.CancelledError:
+        # Worker shutdown, the attempt does not count and the checkpoints stay
+        async with AsyncSessionLocal() as db:
+            await update_claimed_job(
+                db,
+                job["id"],
+                worker_id,
+                {
+                    "status": JOB_QUEUED,
+                    "attempts": job["attempts"] - 1,
+                    "locked_by": None,
+                    "locked_at": None,
+                    "run_after": func.now(),
+                },
+            )
+        raise
+    except Exception as e:
+        stage_timings.setdefault("total", round(time.monotonic() - started, 3))
+        print_log(
+            "process_ingestion_job",
+            "WORKER",
+            "error",
+            f"Ingestion job {job['id']} attempt {job['attempts']} failed: {e}",
+        )
+        async with AsyncSessionLocal() as db:
+            await update_claimed_job(
+                db, job["id"], worker_id, failed_job_values(job, str(e), stage_timings)
+            )
+    finally:
+        heartbeat.cancel()
+
+
+async def latest_ingestion_job(db: AsyncSession, content_id: int):
+    jobs_table = metadataCollection.tables[INGESTION_JOBS_TABLE_NAME]
+    return (
+        (
+            await db.execute(
+                jobs_table.select()
+                .where(jobs_table.c.content_id == int(content_id))
+                .order_by(desc(jobs_table.c.created_at), desc(jobs_table.c.id))
+                .limit(1)
+            )
+        )
+        .mappings()
+        .fetchone()
+    )
+
+
+async def queue_content_ingestion(request: ParseContentRequest, db: AsyncSession):
+    try:
+        print_log("queue_content_ingestion", "POST", "entry", request)
+
+        contents_table = metadataCollection.tables[CONTENTS_TABLE_NAME]
+        source = (
+            await db.execute(
+                select(contents_table.c.source).where(
+                    contents_table.c.id == int(request.content_id),
+                    contents_table.c.is_deleted == False,
+                )
+            )
+        ).scalar()
+        if not source:
+            return {
+                "data": None,
+                "error": f"Content {request.content_id} has no source to ingest",
+            }
+
+        # A queued or running job of the content is returned instead of a second one
+        await enqueue_ingestion_job(db, request.content_id)
+        await db.commit()
+        job = await latest_ingestion_job(db, request.content_id)
+
+        print_log("queue_content_ingestion", "POST", "exit", dict(job))
+        return {"data": dict(job), "error": None}
+    except Exception as e:
+        print_log(
+            "queue_content_ingestion",
+            "POST",
+            "error",
+            f"Error occurred while queueing ingestion job: {e}",
+        )
+        await db.rollback()
+        return {"data": None, "error": str(e)}
+
+
+async def view_ingestion_job(content_id: int, db: AsyncSession):
+    try:
+        print_log("view_ingestion_job", "GET", "entry", {"content_id": content_id})
+
+        job = await latest_ingestion_job(db, content_id)
+
+        print_log("view_ingestion_job", "GET", "exit", {"content_id": content_id})
+        return {"data": dict(job) if job else None, "error": None}
+    except Exception as e:
+        print_log(
+            "view_ingestion_job",
+            "GET",
+            "error",
+            f"Error occurred while viewing ingestion job: {e}",
+        )
+        await db.rollback()
+        return {"data": None, "error": str(e)}
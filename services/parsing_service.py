@@ -1,32 +1,46 @@
 from helpers.service import print_log
-from connection.postgres import close_connection, load_all_tables, get_db_engine
-from connection.milvus import create_or_load_collection, create_or_load_db
-from request_types.contents import ParseContentRequest
+from helpers.singleflight import get_singleflight, make_flight_key
+from helpers.rate_limiter import llm_scheduler, estimate_tokens, PRIORITY_INGESTION
+from helpers.embedding_batches import embed_texts
+from helpers.ingestion_checkpoints import IngestionCheckpoints
+from connection.postgres import load_all_tables
+from connection.milvus import (
+    create_or_load_collection,
+    create_or_load_db,
+    upsert_partial,
+)
+from connection.clients import get_async_http_client
+from connection.llm import get_async_openai_client
+from request_types.contents import IngestContentRequest
 from fastapi import UploadFile, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from config.constants import (
     LLMA_API_KEY,
-    OPEN_API_KEY,
     PROMPT_FOR_TOPICS_QUESTIONS,
-    EMBEDDING_MODEL_NAME,
     LLM_MODEL_NAME,
     MILVUS_CONTENT_COLLECTION_NAME,
     MILVUS_DATABASE_NAME,
+    MILVUS_UPDATE_BATCH_SIZE,
     CONTENTS_TABLE_NAME,
+    LLAMA_CLOUD_BASE_URL,
+    METADATA_EXTRACTION_CONCURRENCY,
+    METADATA_EXTRACTION_RETRIES,
+    INGESTION_BATCH_PAGES,
+    INGESTION_QUEUE_SIZE,
 )
-from llama_index.embeddings.openai import OpenAIEmbedding
+from sqlalchemy.ext.asyncio import AsyncSession
 from bs4 import BeautifulSoup
-import httpx
-import openai
+import asyncio
 import json
-import nest_asyncio
-
-nest_asyncio.apply()
-from llama_parse import LlamaParse
+import time
 
 metadataCollection = load_all_tables()
 
-# openai key configured
-client = openai.OpenAI(api_key=OPEN_API_KEY)
+# Re-parsing the same page concurrently shares one metadata extraction call
+process_document_flight = get_singleflight("process_document")
+
+METADATA_MAX_TOKENS = 1000
+METADATA_KEYS = ["summary", "topics", "questions", "named_entities"]
 
 MAX_LENGTHS = {
     "text": 20000,
@@ -46,15 +60,14 @@ def get_file_extension(url):
 
 
 async def download_file(url):
-    async with httpx.AsyncClient(timeout=None) as client:
-        response = await client.get(url)
-        if response.status_code == 200:
-            html_content = response.text
-            soup = BeautifulSoup(html_content, "html.parser")
-            text = soup.get_text(separator="\n", strip=True)
-            return text
-        else:
-            raise Exception(f"Failed to download file: {response.status_code}")
+    response = await get_async_http_client("downloads").get(url)
+    if response.status_code == 200:
+        html_content = response.text
+        soup = BeautifulSoup(html_content, "html.parser")
+        text = soup.get_text(separator="\n", strip=True)
+        return text
+    else:
+        raise Exception(f"Failed to download file: {response.status_code}")
 
 
 def truncate_text(text, max_length):
@@ -74,7 +87,7 @@ def truncate_list(lst, max_length):
     return lst[:max_length] if isinstance(lst, list) else lst
 
 
-def process_document(text):
+async def process_document(text):
     prompt = (
         PROMPT_FOR_TOPICS_QUESTIONS
         + f"""
@@ -83,24 +96,339 @@ def process_document(text):
     """
     )
 
-    response = client.chat.completions.create(
+    return await process_document_flight.ado(
+        make_flight_key(LLM_MODEL_NAME, prompt), extract_metadata, prompt
+    )
+
+
+async def extract_metadata(prompt):
+    # Rate limits and transient API errors are retried by the scheduler
+    response = await llm_scheduler.call_async(
+        PRIORITY_INGESTION,
+        estimate_tokens(prompt, METADATA_MAX_TOKENS),
+        get_async_openai_client().chat.completions.create,
         model=LLM_MODEL_NAME,
         messages=[{"role": "user", "content": prompt}],
         temperature=0.7,
-        max_tokens=1000,
+        max_tokens=METADATA_MAX_TOKENS,
+    )
+
+    metadata = json.loads(response.choices[0].message.content)
+    missing = [key for key in METADATA_KEYS if key not in metadata]
+    if missing:
+        raise ValueError(f"Metadata is missing {', '.join(missing)}")
+    return metadata
+
+
+async def extract_page_metadata(doc, semaphore: asyncio.Semaphore):
+    async with semaphore:
+        attempt = 0
+        while True:
+            try:
+                return await process_document(doc["md"])
+            except ValueError as e:
+                # Malformed JSON from the model, a new completion usually fixes it
+                if attempt >= METADATA_EXTRACTION_RETRIES:
+                    raise ValueError(f"Page {doc['page']}: {e}") from e
+                attempt += 1
+                print(f"Retrying metadata of page {doc['page']} ({attempt}): {e}")
+
+
+async def extract_pages_metadata(parsed_documents):
+    semaphore = asyncio.Semaphore(METADATA_EXTRACTION_CONCURRENCY)
+    tasks = [
+        asyncio.ensure_future(extract_page_metadata(doc, semaphore))
+        for doc in parsed_documents
+    ]
+    try:
+        metadata = await asyncio.gather(*tasks)
+    except BaseException:
+        # One page failed for good, the rest of the document is not worth finishing
+        for task in tasks:
+            task.cancel()
+        raise
+    return {doc["page"]: data for doc, data in zip(parsed_documents, metadata)}
+
+
+def get_ingestion_collection():
+    create_or_load_db(MILVUS_DATABASE_NAME)
+    return create_or_load_collection(MILVUS_CONTENT_COLLECTION_NAME)
+
+
+def build_insert_data(pages, content, content_id):
+    insert_data = [[] for _ in range(10)]
+    for page in pages:
+        page_metadata = page["metadata"]
+        insert_data[0].append(truncate_text(page["md"], MAX_LENGTHS["text"]))
+        insert_data[1].append(page["embedding"])
+        insert_data[2].append(
+            truncate_text(page_metadata["summary"], MAX_LENGTHS["summary"])
+        )
+        insert_data[3].append(
+            truncate_list(page_metadata["topics"], MAX_LENGTHS["topics"])
+        )
+        insert_data[4].append(
+            truncate_list(page_metadata["questions"], MAX_LENGTHS["questions"])
+        )
+        insert_data[5].append(
+            truncate_list(
+                page_metadata["named_entities"], MAX_LENGTHS["named_entities"]
+            )
+        )
+        insert_data[6].append(
+            {
+                "page": page["page"],
+                "title": content["title"],
+                "version": content["version"],
+                "tags": content["tags"],
+            }
+        )
+        insert_data[7].append(content["topic_ids"])
+        insert_data[8].append(content_id)
+        # Hidden from search until publish_milvus_pages, when the content is STORED
+        insert_data[9].append(True)
+    return insert_data
+
+
+def replace_milvus_pages(collection, content_id: str, page_numbers, insert_data):
+    # A resumed batch may have reached milvus before its checkpoint was written
+    collection.delete(
+        f"content_id == '{content_id}' and is_deleted == true"
+        f" and metadata[\"page\"] in {page_numbers}"
+    )
+    collection.insert(insert_data)
+
+
+def start_milvus_pages(collection, content_id: str, insert_data):
+    # A fresh run drops the hidden pages of an earlier failed or dead run
+    collection.delete(f"content_id == '{content_id}' and is_deleted == true")
+    collection.insert(insert_data)
+
+
+def query_page_ids(collection, expr: str):
+    iterator = collection.query_iterator(
+        batch_size=MILVUS_UPDATE_BATCH_SIZE, expr=expr, output_fields=[]
+    )
+    try:
+        while pages := iterator.next():
+            yield [page["id"] for page in pages]
+    finally:
+        iterator.close()
+
+
+def publish_milvus_pages(content_id: str):
+    # Pages of a failed or dead run stay hidden, search filters on is_deleted
+    collection = get_ingestion_collection()
+    # Pages of an earlier ingestion (a re-queued content) go once the new ones show
+    replaced_ids = [
+        page_id
+        for page_ids in query_page_ids(
+            collection, f"content_id == '{content_id}' and is_deleted == false"
+        )
+        for page_id in page_ids
+    ]
+    published_pages = 0
+    for page_ids in query_page_ids(
+        collection, f"content_id == '{content_id}' and is_deleted == true"
+    ):
+        upsert_partial(
+            collection, [{"id": page_id, "is_deleted": False} for page_id in page_ids]
+        )
+        published_pages += len(page_ids)
+    for start in range(0, len(replaced_ids), MILVUS_UPDATE_BATCH_SIZE):
+        collection.delete(
+            f"id in {replaced_ids[start : start + MILVUS_UPDATE_BATCH_SIZE]}"
+        )
+    return published_pages
+
+
+def add_stage_time(stage_timings: dict, stage: str, started: float):
+    # Busy seconds per stage, stages overlap so the sum exceeds the wall time
+    elapsed = time.monotonic() - started
+    stage_timings[stage] = round(stage_timings.get(stage, 0.0) + elapsed, 3)
+
+
+async def ingest_pages(
+    pages,
+    content,
+    content_id: str,
+    checkpoints: IngestionCheckpoints,
+    resumed: bool,
+    stage_timings: dict,
+):
+    """Streams pages through extract -> embed -> insert in fixed size batches.
+
+    Batches hold INGESTION_BATCH_PAGES pages. The stages run concurrently and
+    hand batches over bounded queues, so at most a few batches are held in
+    memory whatever the document size. Each stage checkpoints its output, pages
+    that already have metadata or an embedding skip that call and inserted
+    pages are not sent again.
+    """
+    pending = [page for page in pages if not page["inserted"]]
+    batches = [
+        pending[start : start + INGESTION_BATCH_PAGES]
+        for start in range(0, len(pending), INGESTION_BATCH_PAGES)
+    ]
+    extracted_queue = asyncio.Queue(maxsize=INGESTION_QUEUE_SIZE)
+    insert_queue = asyncio.Queue(maxsize=INGESTION_QUEUE_SIZE)
+    stats = {
+        "pages": len(pages),
+        "batches": len(batches),
+        "pages_inserted": len(pages) - len(pending),
+        "resumed_from_page": pending[0]["page"] if resumed and pending else None,
+        "metadata_calls": 0,
+    }
+
+    async def extract_stage():
+        for batch in batches:
+            missing = [page for page in batch if page["metadata"] is None]
+            if missing:
+                started = time.monotonic()
+                metadata = await extract_pages_metadata(missing)
+                for page in missing:
+                    page["metadata"] = metadata[page["page"]]
+                stats["metadata_calls"] += len(missing)
+                await checkpoints.save_metadata(missing)
+                add_stage_time(stage_timings, "extract", started)
+            await extracted_queue.put(batch)
+        await extracted_queue.put(None)
+
+    async def embed_stage():
+        while (batch := await extracted_queue.get()) is not None:
+            missing = [page for page in batch if page["embedding"] is None]
+            if missing:
+                started = time.monotonic()
+                embeddings, embedding_stats = await embed_texts(
+                    [page["md"] for page in missing]
+                )
+                for page, embedding in zip(missing, embeddings):
+                    page["embedding"] = embedding
+                for key in ["inputs", "split_pages", "tokens", "embedding_calls"]:
+                    stats[key] = stats.get(key, 0) + embedding_stats[key]
+                await checkpoints.save_embeddings(missing)
+                add_stage_time(stage_timings, "embed", started)
+            await insert_queue.put(batch)
+        await insert_queue.put(None)
+
+    async def insert_stage(collection):
+        first_batch = True
+        while (batch := await insert_queue.get()) is not None:
+            started = time.monotonic()
+            insert_data = build_insert_data(batch, content, content_id)
+            if resumed:
+                page_numbers = [page["page"] for page in batch]
+                await run_in_threadpool(
+                    replace_milvus_pages,
+                    collection,
+                    content_id,
+                    page_numbers,
+                    insert_data,
+                )
+            elif first_batch:
+                await run_in_threadpool(
+                    start_milvus_pages, collection, content_id, insert_data
+                )
+            else:
+                await run_in_threadpool(collection.insert, insert_data)
+            first_batch = False
+            await checkpoints.mark_inserted(batch)
+            add_stage_time(stage_timings, "insert", started)
+            for page in batch:
+                # Stored in postgres and milvus, no reason to keep the vector around
+                page["metadata"] = page["embedding"] = None
+            stats["pages_inserted"] += len(batch)
+            print_log(
+                "parse_contents",
+                "POST",
+                "progress",
+                {
+                    "content_id": content_id,
+                    "pages_inserted": stats["pages_inserted"],
+                    "pages": stats["pages"],
+                },
+            )
+
+    collection = await run_in_threadpool(get_ingestion_collection)
+    tasks = [
+        asyncio.ensure_future(extract_stage()),
+        asyncio.ensure_future(embed_stage()),
+        asyncio.ensure_future(insert_stage(collection)),
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # Finished pages stay checkpointed and hidden, the next parse resumes after them
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return stats
+
+
+async def parse_document(request: IngestContentRequest, file: UploadFile):
+    parsed_documents = None
+    # Imported here, llama_parse pulls in llama_index at import
+    from llama_parse import LlamaParse
+
+    parser = LlamaParse(
+        result_type="markdown",
+        api_key=LLMA_API_KEY,
+        job_timeout_in_seconds=3000,
+        auto_mode=True,
+        auto_mode_trigger_on_table_in_page=True,
+        auto_mode_trigger_on_image_in_page=True,
+        custom_client=get_async_http_client("llama_parse"),
+        **({"base_url": LLAMA_CLOUD_BASE_URL} if LLAMA_CLOUD_BASE_URL else {}),
     )
+    if file:
+        print("file: ", file)
+
+        # temp_input_path = "/tmp/input.pdf"
+
+        # with open(temp_input_path, "wb") as buffer:
+        #     buffer.write(await file.read())
+
+        # print("parsing started in file........................")
+        # parsed_documents = parser.load_data(file_path="/tmp/input.pdf")
+        # print("parsing ended in file........................")
+    elif request.url:
+        print("pasring started in url........................")
+        file_ext = get_file_extension(request.url)
+
+        job_id = None
+        if file_ext == "html":
+            text = await download_file(request.url)
+            job_id = await parser._create_job(
+                file_input=text.encode(),  # Convert text to bytes
+                extra_info={"file_name": "content.txt"},  # Pretend it's a text file
+            )
+        else:
+            job_id = await parser._create_job(file_input=request.url)
 
-    return json.loads(response.choices[0].message.content)
+        if job_id:
+            parsed_documents = await parser._get_job_result(
+                job_id=job_id, result_type="json"
+            )
+            parsed_documents = parsed_documents["pages"]
+
+        print("pasring ended in url........................")
 
+    return parsed_documents
 
-async def parse_contents(request: ParseContentRequest, file: UploadFile):
+
+async def parse_contents(
+    request: IngestContentRequest,
+    file: UploadFile,
+    db: AsyncSession,
+    stage_timings: dict = None,
+):
     """Parses documents, generates embeddings, and stores them in Milvus."""
-    db, engine, parsed_documents = None, None, None
+    # Filled in as stages finish, the ingestion worker keeps them even on failure
+    stage_timings = {} if stage_timings is None else stage_timings
     try:
         print_log("parse_contents", "POST", "entry", request)
 
-        # db connection and content validation
-        db, engine = get_db_engine()
+        # content validation
         contents_table = metadataCollection.tables[CONTENTS_TABLE_NAME]
         content_filters = [
             contents_table.c.is_deleted == False,
@@ -120,7 +448,7 @@ async def parse_contents(request: ParseContentRequest, file: UploadFile):
                 *content_filters,
             )
         )
-        content_data = db.execute(content_query).mappings().fetchall()
+        content_data = (await db.execute(content_query)).mappings().fetchall()
 
         if not content_data:
             raise HTTPException(
@@ -130,147 +458,68 @@ async def parse_contents(request: ParseContentRequest, file: UploadFile):
 
         content_data = content_data[0]
 
-        content_title, content_topic_ids, content_version, content_tags = (
-            content_data["title"],
-            content_data["topic_ids"],
-            content_data["version"],
-            content_data["tags"],
-        )
-
-        parser = LlamaParse(
-            result_type="markdown",
-            api_key=LLMA_API_KEY,
-            job_timeout_in_seconds=3000,
-            auto_mode=True,
-            auto_mode_trigger_on_table_in_page=True,
-            auto_mode_trigger_on_image_in_page=True,
-        )
-        if file:
-            print("file: ", file)
-
-            # temp_input_path = "/tmp/input.pdf"
-
-            # with open(temp_input_path, "wb") as buffer:
-            #     buffer.write(await file.read())
-
-            # print("parsing started in file........................")
-            # parsed_documents = parser.load_data(file_path="/tmp/input.pdf")
-            # print("parsing ended in file........................")
-        elif request.url:
-            print("pasring started in url........................")
-            file_ext = get_file_extension(request.url)
-
-            job_id = None
-            if file_ext == "html":
-                text = await download_file(request.url)
-                job_id = await parser._create_job(
-                    file_input=text.encode(),  # Convert text to bytes
-                    extra_info={"file_name": "content.txt"},  # Pretend it's a text file
-                )
-            else:
-                job_id = await parser._create_job(file_input=request.url)
-
-            if job_id:
-                parsed_documents = await parser._get_job_result(
-                    job_id=job_id, result_type="json"
-                )
-                parsed_documents = parsed_documents["pages"]
-
-            print("pasring ended in url........................")
+        checkpoints = IngestionCheckpoints(db, request.content_id)
+        pages = await checkpoints.load()
+        resumed = len(pages) > 0
+        if resumed:
+            # An earlier parse failed part way, LlamaParse is not called again
+            print_log(
+                "parse_contents",
+                "POST",
+                "resume",
+                {"content_id": request.content_id, "pages": len(pages)},
+            )
+        else:
+            started = time.monotonic()
+            parsed_documents = await parse_document(request, file)
+            add_stage_time(stage_timings, "parse", started)
+            if parsed_documents:
+                # Only page numbers and markdown are kept, the layout data is dropped
+                pages = [
+                    {
+                        "page": record["page"],
+                        "md": record["md"],
+                        "metadata": None,
+                        "embedding": None,
+                        "inserted": False,
+                    }
+                    for record in parsed_documents
+                    if record["md"] != "NO_CONTENT_HERE"
+                ]
+                parsed_documents = None
+                if pages:
+                    await checkpoints.save_pages(pages)
 
-        results = {}
         print("document parsing started............")
-        if parsed_documents and len(parsed_documents) > 0:
-            parsed_documents = [
-                record
-                for record in parsed_documents
-                if record["md"] != "NO_CONTENT_HERE"
-            ]
-
-            for doc in parsed_documents:
-                doc_page = doc["page"]
-                doc_text = doc["md"]
-
-                results[doc_page] = process_document(doc_text)
-
-            print("document parsing ended............")
-            # Transform dictionary results into a list with the required format
-            formatted_results = []
-            print("document formation started............")
-            for doc in parsed_documents:
-                doc_page = doc["page"]
-                doc_text = doc["md"]
-
-                if doc_page in results:
-                    formatted_results.append(
-                        {
-                            "text": doc_text,
-                            "summary": results[doc_page]["summary"],
-                            "topics": results[doc_page]["topics"],
-                            "questions": results[doc_page]["questions"],
-                            "named_entities": results[doc_page]["named_entities"],
-                            "topic_ids": content_topic_ids,
-                            "content_id": request.content_id,
-                            "is_deleted": False,
-                            "metadata": {
-                                "page": doc_page,
-                                "title": content_title,
-                                "version": content_version,
-                                "tags": content_tags,
-                            },
-                        }
-                    )
-
-            print("document formation ended............")
-            # Initialize LlamaIndex with OpenAI Embedding & Milvus
-            embed_model = OpenAIEmbedding(
-                model=EMBEDDING_MODEL_NAME, api_key=OPEN_API_KEY
+        if pages:
+            ingestion_stats = await ingest_pages(
+                pages,
+                content_data,
+                request.content_id,
+                checkpoints,
+                resumed,
+                stage_timings,
+            )
+            print_log(
+                "parse_contents",
+                "POST",
+                "ingestion",
+                {"content_id": request.content_id, **ingestion_stats},
             )
 
-            # Insert Data into Milvus
-            create_or_load_db(MILVUS_DATABASE_NAME)
-            collection = create_or_load_collection(MILVUS_CONTENT_COLLECTION_NAME)
-            insert_data = [[] for _ in range(10)]
-
-            print("document embedding started............")
-            for doc in formatted_results:
-                print("document embedding in loop")
-                embedding = embed_model.get_text_embedding(doc["text"])
-
-                insert_data[0].append(truncate_text(doc["text"], MAX_LENGTHS["text"]))
-                insert_data[1].append(embedding)
-                insert_data[2].append(
-                    truncate_text(doc["summary"], MAX_LENGTHS["summary"])
-                )
-                insert_data[3].append(
-                    truncate_list(doc["topics"], MAX_LENGTHS["topics"])
-                )
-                insert_data[4].append(
-                    truncate_list(doc["questions"], MAX_LENGTHS["questions"])
-                )
-                insert_data[5].append(
-                    truncate_list(doc["named_entities"], MAX_LENGTHS["named_entities"])
-                )
-                insert_data[6].append(doc["metadata"])
-                insert_data[7].append(doc["topic_ids"])
-                insert_data[8].append(doc["content_id"])
-                insert_data[9].append(doc["is_deleted"])
-
-            print("document embedding ended............")
-            # Milvus db connection and process
-            collection.insert(insert_data)
-            print("data inserted embedding............")
-
+            # Searchable in the same step that marks the content STORED
+            await run_in_threadpool(publish_milvus_pages, request.content_id)
             update_data_for_content = {
                 "stored_in_kb": "STORED",
             }
             print("update_data_for_content::", update_data_for_content)
-            db.execute(
+            await db.execute(
                 contents_table.update()
                 .where(contents_table.c.id == int(request.content_id))
                 .values(update_data_for_content)
             )
-            db.commit()
+            await checkpoints.clear()
+            await db.commit()
 
         print_log("parse_contents", "POST", "exit", "data parsed successfully")
 
@@ -285,7 +534,5 @@ async def parse_contents(request: ParseContentRequest, file: UploadFile):
             "error",
             f"Error occurred while parsing content: {e}",
         )
-        if db:
-            db.rollback()
-        close_connection(db, engine)
+        await db.rollback()
         return {"data": None, "error": str(e)}
@@ -0,0 +1,126 @@
+from connection.postgres import async_engine_pool, check_connection
+from connection.milvus import connect_milvus, ping_milvus
+from connection.llm import get_llm, get_embed_model
+from services.search_service import (
+    generate_embedding,
+    get_content_collection,
+    search_milvus,
+)
+from helpers.service import print_log
+from config.constants import (
+    WARMUP_ENABLED,
+    WARMUP_POOL_CONNECTIONS,
+    WARMUP_EMBEDDING,
+    READY_CHECK_TIMEOUT_SECONDS,
+)
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+import asyncio
+import time
+
+# Filled by warm_up, /ready reports it and stays 503 until warmed_up is set
+readiness = {"warmed_up": False, "warmup": {}}
+
+
+async def _timed(results: dict, name: str, func, *args):
+    started = time.perf_counter()
+    try:
+        value = await func(*args)
+        results[name] = {"ok": True}
+        return value
+    except Exception as e:
+        results[name] = {"ok": False, "error": str(e) or type(e).__name__}
+        print_log("warm_up", "LIFESPAN", "error", f"{name} failed: {e}")
+        return None
+    finally:
+        # A cancelled step (shutdown during warm-up) has no result to time
+        if name in results:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            results[name]["latency_ms"] = round(elapsed_ms, 1)
+
+
+async def _select_one(timeout: float = None):
+    async with async_engine_pool.connect() as connection:
+        if timeout:
+            # Ends the query on the server too, not only the wait for it here
+            await connection.execute(
+                text(f"SET LOCAL statement_timeout = {int(timeout * 1000)}")
+            )
+        await connection.execute(text("SELECT 1"))
+
+
+async def warm_postgres():
+    # Concurrent checkouts so the pool really opens this many connections
+    await asyncio.gather(
+        *[_select_one() for _ in range(max(1, WARMUP_POOL_CONNECTIONS))]
+    )
+    if not await run_in_threadpool(check_connection):
+        raise RuntimeError("sync pool could not connect")
+
+
+async def warm_clients():
+    await run_in_threadpool(get_llm)
+    await run_in_threadpool(get_embed_model)
+
+
+async def warm_search(query_embedding):
+    collection = await run_in_threadpool(get_content_collection)
+    if query_embedding is None:
+        # No embedding call configured, any vector of the right size exercises the index
+        dim = next(
+            field.params["dim"]
+            for field in collection.schema.fields
+            if field.name == "embedding"
+        )
+        query_embedding = [0.0] * dim
+    await run_in_threadpool(search_milvus, query_embedding, "is_deleted == false")
+
+
+async def warm_up():
+    results = readiness["warmup"]
+    print_log("warm_up", "LIFESPAN", "entry", {"enabled": WARMUP_ENABLED})
+
+    await _timed(results, "postgres", warm_postgres)
+    if WARMUP_ENABLED:
+        await _timed(results, "openai_clients", warm_clients)
+        query_embedding = None
+        if WARMUP_EMBEDDING:
+            query_embedding = await _timed(
+                results, "embedding", run_in_threadpool, generate_embedding, "warm-up"
+            )
+        await _timed(results, "milvus", warm_search, query_embedding)
+    else:
+        await _timed(results, "milvus", run_in_threadpool, connect_milvus)
+
+    readiness["warmed_up"] = True
+    print_log("warm_up", "LIFESPAN", "exit", results)
+
+
+async def check_readiness():
+    # Live checks of the dependencies a request cannot work without
+    dependencies = {}
+    timeout = READY_CHECK_TIMEOUT_SECONDS
+    await asyncio.gather(
+        _timed(
+            dependencies,
+            "postgres",
+            asyncio.wait_for,
+            _select_one(timeout),
+            timeout,
+        ),
+        _timed(
+            dependencies,
+            "milvus",
+            asyncio.wait_for,
+            run_in_threadpool(ping_milvus, timeout),
+            timeout,
+        ),
+    )
+    ready = readiness["warmed_up"] and all(
+        dependency["ok"] for dependency in dependencies.values()
+    )
+    return {
+        "ready": ready,
+        "warmup": readiness["warmup"],
+        "dependencies": dependencies,
+    }
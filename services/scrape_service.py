@@ -1,20 +1,12 @@
 from request_types.contents import ScrapeDataRequest
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from botocore.exceptions import NoCredentialsError
 from urllib.parse import urljoin
 from bs4 import BeautifulSoup
 import uuid
 import re
-import boto3
 import os
 import tempfile
-import requests
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 from config.constants import (
     ALLOWED_EXTENSIONS,
     GOOGLE_MIME_TYPES,
@@ -22,18 +14,21 @@ from config.constants import (
     GOOGLE_API_KEY,
     S3_BUCKET_NAME,
 )
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
-from google.oauth2.credentials import Credentials
-
-
-s3_client = boto3.client("s3")
+from connection.clients import get_http_client, get_boto3_client
 
 
 # Website Url scrape data service
 
 
 def fetch_html_with_selenium(url: str):
+    # selenium and webdriver_manager are only needed here, import them on first use
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from webdriver_manager.chrome import ChromeDriverManager
+
     options = Options()
     options.add_argument("--headless")
     options.add_argument("--disable-gpu")
@@ -81,7 +76,9 @@ def clean_html(html_content: str, final_url: str):
 
 async def scrape_content_data(request: ScrapeDataRequest):
     try:
-        html_content, final_url = fetch_html_with_selenium(request.url)
+        html_content, final_url = await run_in_threadpool(
+            fetch_html_with_selenium, request.url
+        )
         cleaned_html = clean_html(html_content, final_url)
         soup = BeautifulSoup(cleaned_html, "html5lib")
 
@@ -123,6 +120,9 @@ def get_google_drive_file_id(url: str):
 
 
 def get_google_drive_service(user_drive_token: str):
+    from googleapiclient.discovery import build
+    from google.oauth2.credentials import Credentials
+
     credentials = Credentials(token=user_drive_token)  # Convert string to Credentials
     return build("drive", "v3", credentials=credentials)
 
@@ -136,7 +136,7 @@ def sanitize_filename(file_name):
 
 def get_google_drive_file_metadata(file_id: str):
     metadata_url = f"https://www.googleapis.com/drive/v3/files/{file_id}?fields=name,mimeType&key={GOOGLE_API_KEY}"
-    response = requests.get(metadata_url)
+    response = get_http_client("google").get(metadata_url, follow_redirects=True)
 
     if response.status_code in [403, 404]:
         raise HTTPException(
@@ -207,6 +207,8 @@ def private_get_google_drive_file_metadata(file_id: str, user_drive_token: str):
 
 
 def private_download_google_drive_file(file_id: str, user_drive_token: str):
+    from googleapiclient.http import MediaIoBaseDownload
+
     try:
         file_name, mime_type, file_ext = private_get_google_drive_file_metadata(
             file_id, user_drive_token
@@ -285,14 +287,15 @@ def download_google_drive_file(file_id: str):
     temp_file_path = f"/tmp/{uuid.uuid4().hex}{file_ext}"
 
     try:
-        response = requests.get(download_url, stream=True)
+        with get_http_client("google").stream(
+            "GET", download_url, follow_redirects=True
+        ) as response:
+            if response.status_code != 200:
+                raise ValueError("Failed to download Google Drive file.")
 
-        if response.status_code != 200:
-            raise ValueError("Failed to download Google Drive file.")
-
-        with open(temp_file_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+            with open(temp_file_path, "wb") as f:
+                for chunk in response.iter_bytes(chunk_size=8192):
+                    f.write(chunk)
 
         return temp_file_path, base_name, file_ext
     except Exception as e:
@@ -304,6 +307,9 @@ def download_google_drive_file(file_id: str):
 async def upload_to_s3(
     file_path: str, file_name: str, unique_id: str, file_ext: str, config
 ):
+    from botocore.exceptions import NoCredentialsError
+
+    s3_client = get_boto3_client("s3")
     s3_bucket_name = S3_BUCKET_NAME
 
     safe_file_name = re.sub(r"[\/\s]+", "_", file_name)
@@ -320,7 +326,8 @@ async def upload_to_s3(
         content_type = "application/octet-stream"
 
     try:
-        s3_client.upload_file(
+        await run_in_threadpool(
+            s3_client.upload_file,
             file_path,
             s3_bucket_name,
             s3_filename,
@@ -347,8 +354,8 @@ async def scrape_cloud_data(request):
                 raise HTTPException(status_code=400, detail="Invalid Google Drive URL")
 
             # Download the file
-            local_file_path, file_name, file_ext = private_download_google_drive_file(
-                file_id, request.token
+            local_file_path, file_name, file_ext = await run_in_threadpool(
+                private_download_google_drive_file, file_id, request.token
             )
         else:
             file_id = get_google_drive_file_id(drive_url)
@@ -356,7 +363,9 @@ async def scrape_cloud_data(request):
                 raise HTTPException(status_code=400, detail="Invalid Google Drive URL")
 
             # Download the file
-            local_file_path, file_name, file_ext = download_google_drive_file(file_id)
+            local_file_path, file_name, file_ext = await run_in_threadpool(
+                download_google_drive_file, file_id
+            )
 
         # Upload to S3
         unique_id = uuid.uuid4().hex
@@ -391,7 +400,7 @@ def get_dropbox_file_id(url: str):
 def get_dropbox_file_metadata(url: str):
     metadata_url = url.replace("www.dropbox.com", "dl.dropboxusercontent.com")
 
-    response = requests.head(metadata_url)
+    response = get_http_client("dropbox").head(metadata_url)
 
     if response.status_code != 200:
         raise HTTPException(status_code=400, detail="Invalid Dropbox file URL")
@@ -416,13 +425,15 @@ def download_dropbox_file(file_url: str, file_name: str, file_ext: str):
     temp_file_path = f"/tmp/{uuid.uuid4().hex}{file_ext}"
 
     try:
-        response = requests.get(file_url, stream=True)
-        if response.status_code != 200:
-            raise ValueError("Failed to download Dropbox file.")
+        with get_http_client("dropbox").stream(
+            "GET", file_url, follow_redirects=True
+        ) as response:
+            if response.status_code != 200:
+                raise ValueError("Failed to download Dropbox file.")
 
-        with open(temp_file_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+            with open(temp_file_path, "wb") as f:
+                for chunk in response.iter_bytes(chunk_size=8192):
+                    f.write(chunk)
 
         return temp_file_path, file_name, file_ext
     except Exception as e:
@@ -434,6 +445,9 @@ def download_dropbox_file(file_url: str, file_name: str, file_ext: str):
 async def upload_to_s3_dropbox(
     file_path: str, file_name: str, unique_id: str, file_ext: str, config
 ):
+    from botocore.exceptions import NoCredentialsError
+
+    s3_client = get_boto3_client("s3")
     s3_bucket_name = S3_BUCKET_NAME
     safe_file_name = re.sub(r"[\/\s]+", "_", file_name)
 
@@ -450,7 +464,8 @@ async def upload_to_s3_dropbox(
         content_type = "application/octet-stream"
 
     try:
-        s3_client.upload_file(
+        await run_in_threadpool(
+            s3_client.upload_file,
             file_path,
             s3_bucket_name,
             s3_filename,
@@ -469,11 +484,13 @@ async def upload_to_s3_dropbox(
 async def scrape_dropbox_data(request):
     try:
         dropbox_url = request.url
-        file_url, file_name, file_ext = get_dropbox_file_metadata(dropbox_url)
+        file_url, file_name, file_ext = await run_in_threadpool(
+            get_dropbox_file_metadata, dropbox_url
+        )
 
         # Download the file
-        local_file_path, file_name, file_ext = download_dropbox_file(
-            file_url, file_name, file_ext
+        local_file_path, file_name, file_ext = await run_in_threadpool(
+            download_dropbox_file, file_url, file_name, file_ext
         )
 
         # Upload to S3
@@ -1,14 +1,21 @@
-from connection.postgres import close_connection, get_db_engine, load_all_tables
+from connection.postgres import load_all_tables
 from connection.milvus import create_or_load_db, create_or_load_collection
 from helpers.service import print_log
+from helpers.singleflight import get_singleflight, make_flight_key
+from helpers.rate_limiter import (
+    llm_scheduler,
+    embedding_scheduler,
+    estimate_tokens,
+    PRIORITY_SEARCH,
+    PRIORITY_TITLE,
+)
+from helpers.resilience import get_hedger, get_circuit_breaker
 from request_types.search import SearchKnowledgeBaseRequest
-from llama_index.core import Settings
-from llama_index.llms.openai import OpenAI
-from llama_index.embeddings.openai import OpenAIEmbedding
+from connection.llm import get_llm, get_embed_model
 from sqlalchemy import func
 from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
 from config.constants import (
-    OPEN_API_KEY,
     MILVUS_DATABASE_NAME,
     MILVUS_CONTENT_COLLECTION_NAME,
     LLM_MODEL_NAME,
@@ -17,20 +24,77 @@ from config.constants import (
     USER_CHAT_HISTORY_TABLE_NAME,
     USER_CONVERSATION_TABLE_NAME,
     CHAT_HISTORY_SIZE,
+    LLM_COMPLETION_TOKEN_ESTIMATE,
+    LLM_FALLBACK_MODEL_NAME,
 )
 from helpers.prompts import search_prompt, conversation_title_prompt
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+import threading
 
 metadataCollection = load_all_tables()
-Settings.llm = OpenAI(model=LLM_MODEL_NAME, temperature=0.7, api_key=OPEN_API_KEY)
+
+# Identical concurrent prompts/texts share a single upstream call
+llm_flight = get_singleflight("llm_completion")
+embedding_flight = get_singleflight("embedding")
+
+# Slow calls are hedged, and a provider brownout opens the circuit instead of stalling workers
+llm_hedgers = {
+    PRIORITY_SEARCH: get_hedger("llm_answer"),
+    PRIORITY_TITLE: get_hedger("llm_title"),
+}
+embedding_hedger = get_hedger("embedding")
+llm_breaker = get_circuit_breaker("llm")
+embedding_breaker = get_circuit_breaker("embedding")
+
+
+def complete_with_model(model_name: str, prompt: str, priority: int):
+    response = llm_scheduler.call(
+        priority,
+        estimate_tokens(prompt, LLM_COMPLETION_TOKEN_ESTIMATE),
+        get_llm(model_name).complete,
+        prompt,
+    )
+    return response.text.strip()
+
+
+def complete_prompt(prompt: str, priority: int = PRIORITY_SEARCH):
+    def complete_with_fallback_model():
+        return complete_with_model(LLM_FALLBACK_MODEL_NAME, prompt, priority)
+
+    fallback = complete_with_fallback_model if LLM_FALLBACK_MODEL_NAME else None
+
+    return llm_breaker.call(
+        llm_hedgers[priority].call,
+        complete_with_model,
+        LLM_MODEL_NAME,
+        prompt,
+        priority,
+        fallback=fallback,
+    )
+
+
+def embed_text(text: str, priority: int = PRIORITY_SEARCH):
+    # No fallback model here, vectors from another model would not match the collection
+    return embedding_breaker.call(
+        embedding_hedger.call,
+        embedding_scheduler.call,
+        priority,
+        estimate_tokens(text),
+        get_embed_model().get_text_embedding,
+        text,
+    )
 
 
 def generate_conversation_title(question: str):
     try:
         question_prompt = conversation_title_prompt(question=question)
-        response = Settings.llm.complete(question_prompt)
-
-        return response.text.strip()
+        return llm_flight.do(
+            make_flight_key(LLM_MODEL_NAME, question_prompt),
+            complete_prompt,
+            question_prompt,
+            PRIORITY_TITLE,
+        )
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
@@ -44,23 +108,67 @@ def generate_llm_response(user_query, context_texts, chat_history_data):
             chat_history_data=chat_history_data,
         )
 
-        response = Settings.llm.complete(prompt_template)
-
-        return response.text.strip()
+        return llm_flight.do(
+            make_flight_key(LLM_MODEL_NAME, prompt_template),
+            complete_prompt,
+            prompt_template,
+        )
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 def generate_embedding(text: str):
-    embed_model = OpenAIEmbedding(model_name=EMBEDDING_MODEL_NAME, api_key=OPEN_API_KEY)
-    return embed_model.get_text_embedding(text)
+    return embedding_flight.do(
+        make_flight_key(EMBEDDING_MODEL_NAME, text), embed_text, text
+    )
+
+
+_collection_lock = threading.Lock()
+_content_collection = None
+
+
+# Index and load once per process, from the warm-up or the first search
+def get_content_collection():
+    global _content_collection
+    if _content_collection is None:
+        with _collection_lock:
+            if _content_collection is None:
+                create_or_load_db(MILVUS_DATABASE_NAME)
+                collection = create_or_load_collection(MILVUS_CONTENT_COLLECTION_NAME)
+                index_params = {
+                    "index_type": "IVF_FLAT",
+                    "metric_type": "L2",
+                    "params": {"nlist": 128},
+                }
+                collection.create_index(
+                    field_name="embedding", index_params=index_params
+                )
+                collection.load()
+                _content_collection = collection
+    return _content_collection
+
+
+def search_milvus(query_embedding, expr_condition: str):
+    collection = get_content_collection()
 
+    search_params = {"metric_type": "L2", "params": {"nprobe": 10}}
 
-def search_knowledge_base(request: SearchKnowledgeBaseRequest):
-    db, engine = None, None
+    # Search Relvant documents in Milvus
+    return collection.search(
+        data=[query_embedding],
+        anns_field="embedding",
+        param=search_params,
+        limit=3,
+        output_fields=["text", "topic_ids"],
+        expr=expr_condition,
+    )
+
+
+async def search_knowledge_base(
+    request: SearchKnowledgeBaseRequest, db: AsyncSession
+):
     try:
         print_log("search_knowledge_base", "POST", "entry", request)
-        db, engine = get_db_engine()
         """Get old chat history with the conversation"""
         user_conversation_table = metadataCollection.tables[
             USER_CONVERSATION_TABLE_NAME
@@ -72,38 +180,45 @@ def search_knowledge_base(request: SearchKnowledgeBaseRequest):
         """Create conversation if it's first time"""
         conversation_id = None
         chat_history_data = []
-        conversation_title = generate_conversation_title(question=request.search_key)
+        conversation_title = await run_in_threadpool(
+            generate_conversation_title, question=request.search_key
+        )
         if not request.con_id:
-            result = db.execute(
-                user_conversation_table.insert()
-                .values(
-                    {
-                        "username": request.username,
-                        "name": conversation_title or request.search_key,
-                        "updated_at": func.now(),
-                    }
+            result = (
+                await db.execute(
+                    user_conversation_table.insert()
+                    .values(
+                        {
+                            "username": request.username,
+                            "name": conversation_title or request.search_key,
+                            "updated_at": func.now(),
+                        }
+                    )
+                    .returning(user_conversation_table.c.id)
                 )
-                .returning(user_conversation_table.c.id)
             ).scalar()
-            db.commit()
+            await db.commit()
 
             conversation_id = str(result)
             chat_history_data = []
         elif request.con_id:
             conversation_id = request.con_id
             chat_history_data = (
-                db.execute(
-                    user_chat_history_table.select()
-                    .with_only_columns(
-                        user_chat_history_table.c.question,
-                        user_chat_history_table.c.answer,
-                    )
-                    .where(
-                        user_chat_history_table.c.conversation_id == conversation_id,
-                        user_chat_history_table.c.is_deleted == False,
+                (
+                    await db.execute(
+                        user_chat_history_table.select()
+                        .with_only_columns(
+                            user_chat_history_table.c.question,
+                            user_chat_history_table.c.answer,
+                        )
+                        .where(
+                            user_chat_history_table.c.conversation_id
+                            == int(conversation_id),
+                            user_chat_history_table.c.is_deleted == False,
+                        )
+                        .order_by(user_chat_history_table.c.created_at.desc())
+                        .limit(CHAT_HISTORY_SIZE)
                     )
-                    .order_by(user_chat_history_table.c.created_at.desc())
-                    .limit(CHAT_HISTORY_SIZE)
                 )
                 .mappings()
                 .fetchall()
@@ -115,7 +230,8 @@ def search_knowledge_base(request: SearchKnowledgeBaseRequest):
             chat_history_data = []
 
         context_texts = []
-        response = generate_llm_response(
+        response = await run_in_threadpool(
+            generate_llm_response,
             user_query=request.search_key,
             context_texts=context_texts,
             chat_history_data=[],
@@ -130,34 +246,22 @@ def search_knowledge_base(request: SearchKnowledgeBaseRequest):
                 "answer": response,
                 "model_name": LLM_MODEL_NAME,
                 "topic_id": request.topic_id,
-                "conversation_id": conversation_id,
+                "conversation_id": int(conversation_id),
                 "is_deleted": False,
                 "updated_at": func.now(),
             }
 
             print("request_data_for_search::::", request_data_for_search)
-            db.execute(user_chat_history_table.insert().values(request_data_for_search))
-            db.commit()
+            await db.execute(
+                user_chat_history_table.insert().values(request_data_for_search)
+            )
+            await db.commit()
             return {"data": response, "conversation_id": conversation_id, "error": None}
 
-        """Milvus connection"""
-        create_or_load_db(MILVUS_DATABASE_NAME)
-        collection = create_or_load_collection(MILVUS_CONTENT_COLLECTION_NAME)
-
         """Query embedding"""
-        query_embedding = generate_embedding(request.search_key)
-
-        """search in milvus"""
-        index_params = {
-            "index_type": "IVF_FLAT",
-            "metric_type": "L2",
-            "params": {"nlist": 128},
-        }
-
-        collection.create_index(field_name="embedding", index_params=index_params)
-        collection.load()
-
-        search_params = {"metric_type": "L2", "params": {"nprobe": 10}}
+        query_embedding = await run_in_threadpool(
+            generate_embedding, request.search_key
+        )
 
         delete_condition = "is_deleted == false"
         expr_condition = delete_condition
@@ -179,7 +283,7 @@ def search_knowledge_base(request: SearchKnowledgeBaseRequest):
                     topics_table.c.facility.in_(["ALL"]),
                 )
             )
-            result = db.execute(query_check).mappings().fetchall()
+            result = (await db.execute(query_check)).mappings().fetchall()
             if result:
                 topic_ids_data = [int(obj.id) for obj in result]
                 if topic_ids_data:
@@ -213,7 +317,7 @@ def search_knowledge_base(request: SearchKnowledgeBaseRequest):
                 """If only l2 is provided, match only tenant"""
                 query_check = query_check.where(topics_table.c.tenant.in_(l2_list))
 
-            result = db.execute(query_check).mappings().fetchall()
+            result = (await db.execute(query_check)).mappings().fetchall()
             if result:
                 topic_ids_data = [int(obj.id) for obj in result]
                 if topic_ids_data:
@@ -228,14 +332,8 @@ def search_knowledge_base(request: SearchKnowledgeBaseRequest):
         if topic_id_condition:
             expr_condition = f"({topic_id_condition}) and ({delete_condition})"
 
-        """Search Relvant documents in Milvus"""
-        results = collection.search(
-            data=[query_embedding],
-            anns_field="embedding",
-            param=search_params,
-            limit=3,
-            output_fields=["text", "topic_ids"],
-            expr=expr_condition,
+        results = await run_in_threadpool(
+            search_milvus, query_embedding, expr_condition
         )
 
         matches = []
@@ -250,16 +348,16 @@ def search_knowledge_base(request: SearchKnowledgeBaseRequest):
                 "answer": "No relevant information found.",
                 "model_name": LLM_MODEL_NAME,
                 "topic_id": request.topic_id,
-                "conversation_id": conversation_id,
+                "conversation_id": int(conversation_id),
                 "is_deleted": False,
                 "updated_at": func.now(),
             }
 
             print("request_data_for_search_2::::", request_data_for_search_2)
-            db.execute(
+            await db.execute(
                 user_chat_history_table.insert().values(request_data_for_search_2)
             )
-            db.commit()
+            await db.commit()
             return {
                 "data": "No relevant information found.",
                 "conversation_id": conversation_id,
@@ -269,7 +367,8 @@ def search_knowledge_base(request: SearchKnowledgeBaseRequest):
         context_texts = [res["text"] for res in matches]
 
         """generate llm response based on question and context"""
-        response = generate_llm_response(
+        response = await run_in_threadpool(
+            generate_llm_response,
             user_query=request.search_key,
             context_texts=context_texts,
             chat_history_data=chat_history_data,
@@ -281,14 +380,16 @@ def search_knowledge_base(request: SearchKnowledgeBaseRequest):
             "answer": response,
             "model_name": LLM_MODEL_NAME,
             "topic_id": request.topic_id,
-            "conversation_id": str(conversation_id),
+            "conversation_id": int(conversation_id),
             "is_deleted": False,
             "updated_at": func.now(),
         }
 
         print("request_data_for_search_3::::", request_data_for_search_3)
-        db.execute(user_chat_history_table.insert().values(request_data_for_search_3))
-        db.commit()
+        await db.execute(
+            user_chat_history_table.insert().values(request_data_for_search_3)
+        )
+        await db.commit()
 
         print_log("search_knowledge_base", "POST", "exit", "search successfull")
         return {
@@ -303,7 +404,5 @@ def search_knowledge_base(request: SearchKnowledgeBaseRequest):
             "error",
             f"Error occurred while searching knowledge base: {e}",
         )
-        if db:
-            db.rollback()
-        close_connection(db, engine)
+        await db.rollback()
         return {"data": None, "conversation_id": None, "error": str(e)}
@@ -1,43 +1,51 @@
 import hashlib
-from sqlalchemy import desc
 from request_types.topics import AddTopicRequest, EditTopicRequest, GetTopicRequest
-from connection.postgres import (
-    close_connection,
-    get_db_engine,
-    load_all_tables,
+from connection.postgres import load_all_tables
+from connection.milvus import (
+    create_or_load_db,
+    create_or_load_collection,
+    upsert_partial,
 )
-from sqlalchemy import func
+from sqlalchemy import func, select
 from config.constants import (
     TOPICS_TABLE_NAME,
-    GLOBAL_DATABASE_NAME,
     LEVEL_NAMES,
     CONTENTS_TABLE_NAME,
-    AWS_REGION,
-    COGNITO_POOL_ID,
+    MILVUS_DATABASE_NAME,
+    MILVUS_CONTENT_COLLECTION_NAME,
+    MILVUS_UPDATE_BATCH_SIZE,
+    TOPIC_LIST_CACHE_SECONDS,
+    TOPIC_LIST_CACHE_SIZE,
 )
-from helpers.service import get_result_in_json, print_log
-from sqlalchemy.sql.expression import nulls_last
+from helpers.service import (
+    get_result_in_json,
+    print_log,
+    keyset_order_by,
+    keyset_after,
+    encode_cursor,
+)
+from helpers.response_cache import (
+    get_response_cache,
+    get_cache_version,
+    bump_cache_version,
+)
+from helpers.user_profiles import get_created_updated_users
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import update
-import boto3
+from sqlalchemy.ext.asyncio import AsyncSession
 
 metadataCollection = load_all_tables()
 
-cognito_client = boto3.client("cognito-idp", region_name=AWS_REGION)
+# Serialized get-topics pages, every topic mutation bumps the topics version
+topic_list_cache = get_response_cache(
+    "topic_list", TOPIC_LIST_CACHE_SECONDS, TOPIC_LIST_CACHE_SIZE
+)
 
 
-def create_topics(request: AddTopicRequest):
-    db, engine = None, None
+async def create_topics(request: AddTopicRequest, db: AsyncSession):
     try:
         print_log("create_topics", "POST", "entry", request)
-        db, engine = get_db_engine()
-
-        if db is None:
-            print(f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.",
-            )
 
         collection_name = hashlib.md5(request.title.lower().encode()).hexdigest()[:16]
         topics_table = metadataCollection.tables[TOPICS_TABLE_NAME]
@@ -58,10 +66,9 @@ def create_topics(request: AddTopicRequest):
             else:
                 request_data_for_topic[key_name] = "ALL"
 
-        db.execute(topics_table.insert().values(request_data_for_topic))
-        db.commit()
-
-        close_connection(db, engine)
+        await db.execute(topics_table.insert().values(request_data_for_topic))
+        await bump_cache_version(db, TOPICS_TABLE_NAME)
+        await db.commit()
 
         print_log("create_topics", "POST", "exit", request)
 
@@ -73,24 +80,13 @@ def create_topics(request: AddTopicRequest):
         print_log(
             "create_topics", "POST", "error", f"Error occured while creating topic: {e}"
         )
-        if db:
-            db.rollback()
-        close_connection(db, engine)
+        await db.rollback()
         return {"data": None, "error": str(e)}
 
 
-def edit_topics(request: EditTopicRequest):
-    db, engine = None, None
+async def edit_topics(request: EditTopicRequest, db: AsyncSession):
     try:
         print_log("edit_topics", "POST", "entry", request)
-        db, engine = get_db_engine()
-
-        if db is None:
-            print(f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.",
-            )
 
         topics_table = metadataCollection.tables[TOPICS_TABLE_NAME]
 
@@ -109,14 +105,14 @@ def edit_topics(request: EditTopicRequest):
             else:
                 request_data_for_topic[key_name] = "ALL"
 
-        db.execute(
+        await db.execute(
             topics_table.update()
             .where(topics_table.c.id == int(request.id))
             .values(request_data_for_topic)
         )
-        db.commit()
+        await bump_cache_version(db, TOPICS_TABLE_NAME)
+        await db.commit()
 
-        close_connection(db, engine)
         print_log("edit_topics", "POST", "exit", "Topic updated successfully")
         return {
             "data": "Topic updated successfully",
@@ -126,27 +122,30 @@ def edit_topics(request: EditTopicRequest):
         print_log(
             "edit_topics", "POST", "error", f"Error occured while updating topic: {e}"
         )
-        if db:
-            db.rollback()
-        close_connection(db, engine)
+        await db.rollback()
         return {
             "data": None,
             "error": "Error occured while updating topic:" + str(e),
         }
 
 
-def get_topics_list(request: GetTopicRequest):
-    db, engine = None, None
+async def get_topics_list_version(db: AsyncSession):
     try:
-        print_log("get_topics_list", "POST", "entry", request)
-        db, engine = get_db_engine()
+        return {"data": await get_cache_version(db, TOPICS_TABLE_NAME), "error": None}
+    except Exception as e:
+        print_log(
+            "get_topics_list_version",
+            "POST",
+            "error",
+            f"Error occurred while reading the topics version: {e}",
+        )
+        await db.rollback()
+        return {"data": None, "error": str(e)}
 
-        if db is None:
-            print(f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.",
-            )
+
+async def get_topics_list(request: GetTopicRequest, db: AsyncSession):
+    try:
+        print_log("get_topics_list", "POST", "entry", request)
 
         topics_table = metadataCollection.tables[TOPICS_TABLE_NAME]
         # Extract relevant filters dynamically based on LEVEL_NAMES
@@ -164,25 +163,29 @@ def get_topics_list(request: GetTopicRequest):
                 else:
                     filters.append(topics_table.c[level] == "ALL")
 
-        # Build query dynamically based on filters
-        query = topics_table.select()
-
-        if filters:
-            query = query.where(
-                *filters,
-            )
+        if request.cursor:
+            filters.append(keyset_after(topics_table, request.cursor))
 
-        # Order by updated_at DESC
-        query = query.order_by(nulls_last(desc(topics_table.c.updated_at)))
+        # Order by updated_at DESC, one extra row tells whether there is a next page
+        query = (
+            topics_table.select()
+            .where(*filters)
+            .order_by(*keyset_order_by(topics_table))
+            .limit(request.limit + 1)
+        )
 
-        topic_list_data = db.execute(query).fetchall()
+        topic_list_data = (await db.execute(query)).mappings().fetchall()
+        topic_list_data = [dict(row) for row in topic_list_data]
 
-        topic_list_data = get_result_in_json(topics_table, topic_list_data)
+        next_cursor = None
+        if len(topic_list_data) > request.limit:
+            topic_list_data = topic_list_data[: request.limit]
+            next_cursor = encode_cursor(topic_list_data[-1])
 
-        close_connection(db, engine)
         print_log("get_topics_list", "POST", "exit", "topic list fetched successfully")
         return {
             "data": topic_list_data,
+            "next_cursor": next_cursor,
             "error": None,
         }
 
@@ -193,87 +196,115 @@ def get_topics_list(request: GetTopicRequest):
             "error",
             f"Error occurred while getting topics: {e}",
         )
-        if db:
-            db.rollback()
-        close_connection(db, engine)
+        await db.rollback()
         return {"data": None, "error": str(e)}
 
 
-def delete_topic(id: str):
-    db, engine = None, None
+def remove_topic_from_milvus(topic_id: int, content_ids):
+    create_or_load_db(MILVUS_DATABASE_NAME)
+    collection = create_or_load_collection(MILVUS_CONTENT_COLLECTION_NAME)
+
+    # Partial upsert rewrites only topic_ids, text and embeddings stay untouched
+    updated_pages = 0
+    for start in range(0, len(content_ids), MILVUS_UPDATE_BATCH_SIZE):
+        batch_ids = content_ids[start : start + MILVUS_UPDATE_BATCH_SIZE]
+        iterator = collection.query_iterator(
+            batch_size=MILVUS_UPDATE_BATCH_SIZE,
+            expr=f"content_id in {[str(content_id) for content_id in batch_ids]}",
+            output_fields=["topic_ids"],
+        )
+        try:
+            while pages := iterator.next():
+                rows = [
+                    {
+                        "id": page["id"],
+                        "topic_ids": [
+                            tid for tid in page["topic_ids"] if tid != topic_id
+                        ],
+                    }
+                    for page in pages
+                ]
+                upsert_partial(collection, rows)
+                updated_pages += len(rows)
+        finally:
+            iterator.close()
+
+    print(f"Removed topic {topic_id} from {updated_pages} milvus pages")
+
+
+async def delete_topic(id: str, db: AsyncSession):
     try:
         print_log("delete_topic", "DELETE", "entry", id)
-        db, engine = get_db_engine()
-
-        if db is None:
-            print(f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.",
-            )
 
         topics_table = metadataCollection.tables[TOPICS_TABLE_NAME]
         contents_table = metadataCollection.tables[CONTENTS_TABLE_NAME]
-
-        # Check if the topic exists
-        query_check = topics_table.select().where(
-            topics_table.c.id == int(id), topics_table.c.is_deleted == False
+        topic_id = int(id)
+
+        # Check if the topic exists, the row stays locked until the commit
+        query_check = (
+            topics_table.select()
+            .with_only_columns(topics_table.c.id)
+            .where(topics_table.c.id == topic_id, topics_table.c.is_deleted == False)
+            .with_for_update()
         )
-        result = db.execute(query_check).fetchone()
+        result = (await db.execute(query_check)).fetchone()
         if not result:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Topic with id {id} does not exist.",
             )
 
-        content_filters = [contents_table.c.is_deleted == False]
-        if id:
-            content_filters.append(contents_table.c.topic_ids.contains([int(id)]))
-
-        content_data_based_on_topic_query = contents_table.select().where(
-            *content_filters
-        )
-        content_list_data = (
-            db.execute(content_data_based_on_topic_query).mappings().fetchall()
-        )
+        content_filters = [
+            contents_table.c.is_deleted == False,
+            contents_table.c.topic_ids.contains([topic_id]),
+        ]
 
-        has_single_content = any(
-            len(item["topic_ids"]) == 1 for item in content_list_data
-        )
+        only_topic_count = (
+            await db.execute(
+                select(func.count()).where(
+                    *content_filters,
+                    func.cardinality(contents_table.c.topic_ids) == 1,
+                )
+            )
+        ).scalar()
 
-        if has_single_content:
+        if only_topic_count:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="This topic is used in some content as the only topic and cannot be removed.",
             )
 
-        query = (
+        await db.execute(
             topics_table.update()
-            .where(
-                topics_table.c.id == int(id),
-            )
+            .where(topics_table.c.id == topic_id)
             .values(is_deleted=True)
         )
 
-        db.execute(query)
-        db.commit()
-
         # remove from content
-        for row in content_list_data:
-            updated_topics = [tid for tid in row["topic_ids"] if tid != int(id)]
-
-            # Update database record
-            update_query = (
+        content_ids = (
+            await db.execute(
                 update(contents_table)
-                .where(contents_table.c.id == row["id"])
-                .values(topic_ids=updated_topics)
+                .where(*content_filters)
+                .values(
+                    topic_ids=func.array_remove(contents_table.c.topic_ids, topic_id)
+                )
+                .returning(contents_table.c.id)
             )
-            db.execute(update_query)
-            db.commit()
+        ).scalars().all()
+
+        # Milvus goes first, if it fails nothing is committed in postgres
+        if content_ids:
+            await run_in_threadpool(remove_topic_from_milvus, topic_id, content_ids)
 
-        close_connection(db, engine)
+        await bump_cache_version(db, TOPICS_TABLE_NAME)
+        await db.commit()
 
-        print_log("delete_topic", "DELETE", "exit", f"Topic {id} deleted successfully")
+        print_log(
+            "delete_topic",
+            "DELETE",
+            "exit",
+            f"Topic {id} deleted successfully, removed from {len(content_ids)} contents",
+        )
 
         return {
             "data": "Topic deleted successfully",
@@ -286,36 +317,25 @@ def delete_topic(id: str):
             "error",
             f"Error occurred while deleting topic: {e}",
         )
-        if db:
-            db.rollback()
-        close_connection(db, engine)
+        await db.rollback()
         return {"data": None, "error": str(e)}
 
 
-def view_topic(id: str):
-    db, engine = None, None
+async def view_topic(id: str, db: AsyncSession):
     try:
         print_log("view_topic", "GET", "entry", id)
-        db, engine = get_db_engine()
-
-        if db is None:
-            print(f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Failed to connect to database '{GLOBAL_DATABASE_NAME}'.",
-            )
 
         topics_table = metadataCollection.tables[TOPICS_TABLE_NAME]
         topic_filters = [
             topics_table.c.is_deleted == False,
-            topics_table.c.id == id,
+            topics_table.c.id == int(id),
         ]
 
         # Build query dynamically based on filters
         topic_query = topics_table.select().where(
             *topic_filters,
         )
-        topic_data = db.execute(topic_query).fetchall()
+        topic_data = (await db.execute(topic_query)).fetchall()
         topic_data = get_result_in_json(topics_table, topic_data)
 
         user_details = None
@@ -323,44 +343,12 @@ def view_topic(id: str):
         if len(topic_data) > 0:
             topic_data = topic_data[0]
 
-            if topic_data["created_by"]:
-                try:
-                    response = cognito_client.admin_get_user(
-                        UserPoolId=COGNITO_POOL_ID,
-                        Username=topic_data["created_by"],
-                    )
-
-                    user_details = {
-                        attr["Name"].replace("custom:", ""): attr["Value"]
-                        for attr in response["UserAttributes"]
-                    }
-                except Exception as e:
-                    print("cognito user::", str(e))
-
-            if (
-                topic_data["updated_by"] is not None
-                and topic_data["created_by"] != topic_data["updated_by"]
-            ):
-                if topic_data["updated_by"]:
-                    try:
-                        response_2 = cognito_client.admin_get_user(
-                            UserPoolId=COGNITO_POOL_ID,
-                            Username=topic_data["updated_by"],
-                        )
-
-                        update_user_details = {
-                            attr2["Name"].replace("custom:", ""): attr2["Value"]
-                            for attr2 in response_2["UserAttributes"]
-                        }
-                    except Exception as e:
-                        print("cognito user::", str(e))
-            elif topic_data["created_by"] == topic_data["updated_by"]:
-                update_user_details = user_details
-
+            user_details, update_user_details = await get_created_updated_users(
+                topic_data
+            )
         else:
             return {"data": None, "error": None}
 
-        close_connection(db, engine)
         print_log("view_topic", "GET", "exit", {"id": id})
 
         return {
@@ -379,7 +367,5 @@ def view_topic(id: str):
             "error",
             f"Error occurred while view topic: {e}",
         )
-        if db:
-            db.rollback()
-        close_connection(db, engine)
+        await db.rollback()
         return {"data": None, "error": str(e)}
@@ -0,0 +1,39 @@
+"""Shared setup for the database tests.
+
+The tests run against a disposable Postgres instance described by the
+config.ini that KB_CONFIG_PATH points to (same format as config/config.ini).
+Without KB_CONFIG_PATH every test module that needs the database is skipped.
+
+    KB_CONFIG_PATH=/tmp/test-config.ini python -m pytest -q tests
+"""
+
+from pathlib import Path
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+# Settings config.constants requires at import, none of them are contacted here
+for name, value in {
+    "ENVIRONMENT": "dev",
+    "KB_LLM_SERVICE_URL": "http://127.0.0.1:9000",
+    "OPEN_API_KEY": "test",
+    "LLMA_API_KEY": "test",
+    "AWS_REGION": "us-east-1",
+    "COGNITO_POOL_ID": "us-east-1_test",
+    "GOOGLE_API_KEY": "test",
+    "S3_BUCKET_NAME": "test-bucket",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+def require_database():
+    # Called at module level, before the module imports connection.postgres
+    if not os.environ.get("KB_CONFIG_PATH"):
+        pytest.skip(
+            "KB_CONFIG_PATH does not point to a test database",
+            allow_module_level=True,
+        )
@@ -0,0 +1,81 @@
+"""Request scoped sessions must hand their connection back to the shared pool.
+
+Sends concurrent requests through get_db and get_async_db and compares the
+pool checkouts with the physical connections that were opened for them.
+"""
+
+import asyncio
+
+from conftest import require_database
+
+require_database()
+
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+import httpx
+
+from connection.postgres import (
+    async_engine_pool,
+    get_async_db,
+    get_db,
+    get_pool_stats,
+)
+
+REQUESTS = 200
+
+app = FastAPI()
+
+
+@app.get("/sync")
+def sync_route(db: Session = Depends(get_db)):
+    return {"value": db.execute(text("SELECT 1")).scalar()}
+
+
+@app.get("/async")
+async def async_route(db: AsyncSession = Depends(get_async_db)):
+    return {"value": (await db.execute(text("SELECT 1"))).scalar()}
+
+
+async def send_concurrent_requests(path: str):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(*[client.get(path) for _ in range(REQUESTS)])
+    assert all(response.json() == {"value": 1} for response in responses)
+
+
+def run_requests(path: str, pool_name: str):
+    before = get_pool_stats()[pool_name]
+
+    async def run():
+        try:
+            await send_concurrent_requests(path)
+        finally:
+            # asyncpg connections belong to this loop, do not keep them pooled
+            await async_engine_pool.dispose()
+
+    asyncio.run(run())
+    after = get_pool_stats()[pool_name]
+    return {
+        "checkouts": after["checkouts"] - before["checkouts"],
+        "connections_opened": after["connections_opened"]
+        - before["connections_opened"],
+        "checked_out": after["checked_out"],
+    }
+
+
+def assert_connections_reused(stats):
+    assert stats["checkouts"] >= REQUESTS
+    assert stats["checkouts"] > stats["connections_opened"]
+    # Overflow connections are closed on return, the rest serve several requests
+    assert stats["connections_opened"] <= REQUESTS // 2
+    assert stats["checked_out"] == 0
+
+
+def test_get_db_reuses_pooled_connections():
+    assert_connections_reused(run_requests("/sync", "sync"))
+
+
+def test_get_async_db_reuses_pooled_connections():
+    assert_connections_reused(run_requests("/async", "async"))
@@ -0,0 +1,298 @@
+"""Metadata and topic updates of content pages keep the pages themselves.
+
+The updates send only the changed fields with a partial upsert to the
+auto_id content collection. Runs against a Milvus Lite file (pip install
+milvus-lite) with the collection schema of the app, and checks that each page
+keeps its pk, text and embedding and that no page is added. An edit whose
+Postgres commit fails must leave the pages as they were, and ingested pages
+stay out of search until they are published.
+"""
+
+import asyncio
+
+import pytest
+
+from conftest import require_database
+
+# The services import connection.postgres, which reads the test config
+require_database()
+pytest.importorskip("milvus_lite")
+
+from pymilvus import CollectionSchema, connections
+
+from config.constants import (
+    CONTENTS_TABLE_NAME,
+    MILVUS_CONTENT_COLLECTION_NAME,
+    MILVUS_DATABASE_NAME,
+)
+import connection.milvus as milvus_connection
+from connection.milvus import create_or_load_db, create_or_load_collection
+from connection.postgres import (
+    async_engine_pool,
+    AsyncSessionLocal,
+    load_all_tables,
+    upgrade_database,
+)
+from request_types.contents import EditContentRequest
+from schemas.milvus_all_schemas import mv_content_fields
+from services.content_service import edit_content, update_milvus_content
+from services.parsing_service import (
+    build_insert_data,
+    ingest_pages,
+    publish_milvus_pages,
+)
+from services.topics_service import remove_topic_from_milvus
+
+DIM = 1536
+
+
+def page(content_id: str, page_no: int, topic_ids):
+    return {
+        "text": f"content {content_id} page {page_no}",
+        "embedding": [float(page_no + 1)] + [0.0] * (DIM - 1),
+        "summary": "",
+        "topics": [],
+        "questions": [],
+        "named_entities": [],
+        "metadata": {"page": page_no, "title": f"content {content_id}"},
+        "topic_ids": topic_ids,
+        "content_id": content_id,
+        "is_deleted": False,
+    }
+
+
+def all_pages(collection):
+    pages = collection.query(
+        expr="id >= 0",
+        output_fields=["text", "embedding", "metadata", "topic_ids", "content_id"],
+    )
+    return {
+        row["id"]: {**row, "embedding": [float(x) for x in row["embedding"]]}
+        for row in pages
+    }
+
+
+@pytest.fixture
+def collection(monkeypatch, tmp_path):
+    connections.connect(uri=str(tmp_path / "milvus.db"))
+    monkeypatch.setattr(milvus_connection, "_connected", True)
+    try:
+        create_or_load_db(MILVUS_DATABASE_NAME)
+        collection = create_or_load_collection(
+            MILVUS_CONTENT_COLLECTION_NAME, CollectionSchema(fields=mv_content_fields)
+        )
+        collection.create_index(
+            field_name="embedding",
+            index_params={"index_type": "FLAT", "metric_type": "L2", "params": {}},
+        )
+        collection.load()
+        collection.insert(
+            [page("a", n, [1, 2]) for n in range(3)]
+            + [page("b", 0, [2]), page("c", 0, [2, 3])]
+        )
+        yield collection
+    finally:
+        connections.disconnect("default")
+
+
+def test_removing_a_topic_keeps_pk_text_and_embedding(collection):
+    before = all_pages(collection)
+
+    remove_topic_from_milvus(2, ["a", "b"])
+
+    after = all_pages(collection)
+    assert after.keys() == before.keys()
+    for pk, row in after.items():
+        expected = before[pk]
+        assert row["text"] == expected["text"]
+        assert row["embedding"] == expected["embedding"]
+        assert row["metadata"] == expected["metadata"]
+        if row["content_id"] == "c":
+            assert row["topic_ids"] == [2, 3]
+        else:
+            assert row["topic_ids"] == [t for t in expected["topic_ids"] if t != 2]
+
+
+def assert_pages_kept(before, after):
+    assert after.keys() == before.keys()
+    for pk, row in after.items():
+        assert row["text"] == before[pk]["text"]
+        assert row["embedding"] == before[pk]["embedding"]
+
+
+def test_editing_content_updates_only_metadata_and_topic_ids(collection):
+    before = all_pages(collection)
+
+    update_milvus_content("a", {"title": "renamed", "tags": "a,b"}, [4])
+
+    after = all_pages(collection)
+    assert_pages_kept(before, after)
+    for pk, row in after.items():
+        if row["content_id"] == "a":
+            assert row["metadata"] == {
+                **before[pk]["metadata"],
+                "title": "renamed",
+                "tags": "a,b",
+            }
+            assert row["topic_ids"] == [4]
+        else:
+            assert row["metadata"] == before[pk]["metadata"]
+            assert row["topic_ids"] == before[pk]["topic_ids"]
+
+
+async def failing_commit():
+    raise RuntimeError("commit failed")
+
+
+def test_a_failed_edit_commit_reverts_the_milvus_pages(collection):
+    upgrade_database()
+    contents_table = load_all_tables().tables[CONTENTS_TABLE_NAME]
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            content_id = (
+                await db.execute(
+                    contents_table.insert()
+                    .values(
+                        title="content",
+                        description="Created by tests",
+                        tags="x",
+                        version="1",
+                        status="ACCEPTED",
+                        stored_in_kb="STORED",
+                        topic_ids=[1, 2],
+                        created_by="tests",
+                        is_deleted=False,
+                    )
+                    .returning(contents_table.c.id)
+                )
+            ).scalar()
+            await db.commit()
+        try:
+            collection.insert(
+                [
+                    {
+                        **page(str(content_id), n, [1, 2]),
+                        "metadata": {"page": n, "title": "content", "tags": "x"},
+                    }
+                    for n in range(2)
+                ]
+            )
+            before = all_pages(collection)
+
+            async with AsyncSessionLocal() as db:
+                db.commit = failing_commit
+                result = await edit_content(
+                    EditContentRequest(
+                        id=str(content_id),
+                        title="renamed",
+                        description="Created by tests",
+                        tags="y",
+                        version="1",
+                        topic_ids="3",
+                        status="ACCEPTED",
+                        updated_by="tests",
+                    ),
+                    db,
+                )
+            return result, before
+        finally:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    contents_table.delete().where(contents_table.c.id == content_id)
+                )
+                await db.commit()
+            await async_engine_pool.dispose()
+
+    result, before = asyncio.run(run())
+    assert result == {"data": None, "error": "commit failed"}
+    after = all_pages(collection)
+    assert_pages_kept(before, after)
+    for pk, row in after.items():
+        assert row["metadata"] == before[pk]["metadata"]
+        assert row["topic_ids"] == before[pk]["topic_ids"]
+
+
+INGESTED_CONTENT = {"title": "content", "version": "1", "tags": "x", "topic_ids": [1]}
+
+
+def parsed_pages(count: int, text: str = "page"):
+    # Metadata and embedding already set, as for pages checkpointed by those stages
+    return [
+        {
+            "page": n,
+            "md": f"{text} {n}",
+            "embedding": [float(n + 1)] + [0.0] * (DIM - 1),
+            "metadata": {
+                "summary": "",
+                "topics": [],
+                "questions": [],
+                "named_entities": [],
+            },
+            "inserted": False,
+        }
+        for n in range(count)
+    ]
+
+
+def visible(collection, content_id):
+    return collection.query(
+        expr=f"content_id == '{content_id}' and is_deleted == false",
+        output_fields=["text"],
+    )
+
+
+def hidden(collection, content_id):
+    return collection.query(
+        expr=f"content_id == '{content_id}' and is_deleted == true",
+        output_fields=["text"],
+    )
+
+
+class InsertedPages:
+    """Stands in for IngestionCheckpoints, every stage output is already set."""
+
+    async def mark_inserted(self, pages):
+        pass
+
+
+def test_ingested_pages_are_hidden_until_published(collection):
+    pages = parsed_pages(3)
+    collection.insert(build_insert_data(pages, INGESTED_CONTENT, "d"))
+    collection.insert(build_insert_data(pages[:1], INGESTED_CONTENT, "e"))
+
+    assert visible(collection, "d") == [] and visible(collection, "e") == []
+    before = all_pages(collection)
+
+    assert publish_milvus_pages("d") == 3
+
+    assert len(visible(collection, "d")) == 3
+    assert visible(collection, "e") == []
+    assert_pages_kept(before, all_pages(collection))
+
+
+def test_reingesting_stored_content_replaces_its_pages(collection):
+    # Left hidden by an earlier run of content a that went dead
+    collection.insert(build_insert_data(parsed_pages(1, "dead"), INGESTED_CONTENT, "a"))
+    old_texts = sorted(row["text"] for row in visible(collection, "a"))
+
+    asyncio.run(
+        ingest_pages(
+            parsed_pages(2, "new"),
+            INGESTED_CONTENT,
+            "a",
+            InsertedPages(),
+            resumed=False,
+            stage_timings={},
+        )
+    )
+
+    # Search keeps the stored pages while the new ones are ingested
+    assert sorted(row["text"] for row in visible(collection, "a")) == old_texts
+    assert sorted(row["text"] for row in hidden(collection, "a")) == ["new 0", "new 1"]
+
+    assert publish_milvus_pages("a") == 2
+
+    assert sorted(row["text"] for row in visible(collection, "a")) == ["new 0", "new 1"]
+    assert hidden(collection, "a") == []
+    assert len(visible(collection, "b")) == 1
@@ -0,0 +1,141 @@
+"""The hot queries must be able to use the indexes added by the migrations.
+
+Runs EXPLAIN (FORMAT JSON) for the query shapes of get-contents, get-topics,
+delete-topic, list-chat-threads and get-conversation-history on the migrated
+test database. Sequential scans are disabled for the check, so an empty
+database still shows whether an index is usable for a query.
+"""
+
+import json
+
+import pytest
+
+from conftest import require_database
+
+require_database()
+
+from sqlalchemy import select, text
+
+from config.constants import (
+    LEVEL_NAMES,
+    TOPICS_TABLE_NAME,
+    CONTENTS_TABLE_NAME,
+    USER_CHAT_HISTORY_TABLE_NAME,
+    USER_CONVERSATION_TABLE_NAME,
+)
+from connection.postgres import engine_pool, upgrade_database
+from helpers.service import keyset_order_by
+from schemas.all_schemas import metadata
+
+
+def hot_queries():
+    # (name, query, expected index, keyset paginated: the index must supply the order)
+    topics = metadata.tables[TOPICS_TABLE_NAME]
+    contents = metadata.tables[CONTENTS_TABLE_NAME]
+    history = metadata.tables[USER_CHAT_HISTORY_TABLE_NAME]
+    conversations = metadata.tables[USER_CONVERSATION_TABLE_NAME]
+    page = 51
+    return [
+        (
+            "get-contents topic filter",
+            select(contents.c.id).where(contents.c.topic_ids.overlap([1, 2, 3])),
+            "ix_contents_topic_ids",
+            False,
+        ),
+        (
+            "get-contents keyset order",
+            contents.select()
+            .where(contents.c.is_deleted == False)
+            .order_by(*keyset_order_by(contents))
+            .limit(page),
+            "ix_contents_updated_at_id",
+            True,
+        ),
+        (
+            "delete-topic contents lookup",
+            select(contents.c.id).where(contents.c.topic_ids.contains([1])),
+            "ix_contents_topic_ids",
+            False,
+        ),
+        (
+            "get-topics scope filter",
+            topics.select().where(
+                topics.c.is_deleted == False,
+                *[topics.c[level] == "ALL" for level in LEVEL_NAMES],
+            ),
+            f"ix_topics_{'_'.join(LEVEL_NAMES)}_is_deleted",
+            False,
+        ),
+        (
+            "list-chat-threads",
+            conversations.select()
+            .where(conversations.c.username == "someone")
+            .order_by(*keyset_order_by(conversations, "created_at"))
+            .limit(page),
+            "ix_user_conversation_username_created_at_id",
+            True,
+        ),
+        (
+            "get-conversation-history",
+            history.select()
+            .where(history.c.conversation_id == 1, history.c.is_deleted == False)
+            .order_by(*keyset_order_by(history, "created_at"))
+            .limit(page),
+            "ix_user_chat_history_conversation_id_created_at_id",
+            True,
+        ),
+    ]
+
+
+def used_indexes(plan):
+    indexes = set()
+    if "Index Name" in plan:
+        indexes.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        indexes |= used_indexes(child)
+    return indexes
+
+
+def node_types(plan):
+    types = {plan["Node Type"]}
+    for child in plan.get("Plans", []):
+        types |= node_types(child)
+    return types
+
+
+def explain(connection, query):
+    compiled = query.compile(
+        dialect=connection.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    result = connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled.string}", compiled.params
+    )
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+@pytest.fixture(scope="module")
+def connection():
+    upgrade_database()
+    with engine_pool.connect() as connection, connection.begin() as transaction:
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        yield connection
+        transaction.rollback()
+
+
+@pytest.mark.parametrize(
+    "query, expected_index, keyset",
+    [(query, index, keyset) for _, query, index, keyset in hot_queries()],
+    ids=[name for name, *_ in hot_queries()],
+)
+def test_hot_query_uses_index(connection, query, expected_index, keyset):
+    plan = explain(connection, query)
+    indexes = used_indexes(plan)
+    assert expected_index in indexes, (
+        f"expected {expected_index}, plan uses {sorted(indexes) or 'no index'}"
+    )
+    if keyset:
+        # A Sort on top of the scan reads and sorts every matching row per page
+        assert "Sort" not in node_types(plan), f"plan sorts: {sorted(node_types(plan))}"
@@ -0,0 +1,97 @@
+"""Cached get-topics pages must follow topic writes made by any worker.
+
+The topic is written the way create_topics commits it on another worker: the
+row and the topics version bump in one transaction, without touching the
+cache of this process.
+"""
+
+import asyncio
+import json
+import uuid
+
+from conftest import require_database
+
+require_database()
+
+from sqlalchemy import func
+
+from config.constants import LEVEL_NAMES, TOPICS_TABLE_NAME
+from connection.postgres import (
+    async_engine_pool,
+    AsyncSessionLocal,
+    load_all_tables,
+    upgrade_database,
+)
+from controllers.topics_controller import get_topics_controller
+from helpers.response_cache import bump_cache_version
+from request_types.topics import GetTopicRequest
+from services.topics_service import topic_list_cache
+
+
+async def get_topics(if_none_match=None):
+    async with AsyncSessionLocal() as db:
+        return await get_topics_controller(
+            GetTopicRequest(is_all=True, limit=200), db, if_none_match
+        )
+
+
+async def create_topic_on_other_worker(title: str):
+    topics_table = load_all_tables().tables[TOPICS_TABLE_NAME]
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            topics_table.insert().values(
+                title=title,
+                description="Created by tests",
+                collection_name=uuid.uuid4().hex[:16],
+                level="l1",
+                is_deleted=False,
+                created_by="tests",
+                updated_at=func.now(),
+                **{level: "ALL" for level in LEVEL_NAMES},
+            )
+        )
+        await bump_cache_version(db, TOPICS_TABLE_NAME)
+        await db.commit()
+
+
+async def delete_test_topics():
+    topics_table = load_all_tables().tables[TOPICS_TABLE_NAME]
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            topics_table.delete().where(topics_table.c.created_by == "tests")
+        )
+        await bump_cache_version(db, TOPICS_TABLE_NAME)
+        await db.commit()
+
+
+def titles(response):
+    return [topic["title"] for topic in json.loads(response.body)["data"]]
+
+
+def test_topic_writes_change_the_etag_and_the_cached_page():
+    upgrade_database()
+
+    async def run():
+        try:
+            first = await get_topics()
+            etag = first.headers["ETag"]
+            hits = topic_list_cache.get_stats()["hits"]
+
+            # Unchanged topics, served from the cache and revalidated by the ETag
+            assert (await get_topics()).headers["ETag"] == etag
+            assert topic_list_cache.get_stats()["hits"] == hits + 1
+            assert (await get_topics(etag)).status_code == 304
+
+            title = f"Cache test {uuid.uuid4().hex[:8]}"
+            await create_topic_on_other_worker(title)
+
+            changed = await get_topics(etag)
+            assert changed.status_code == 200
+            assert changed.headers["ETag"] != etag
+            assert title in titles(changed)
+            assert (await get_topics(changed.headers["ETag"])).status_code == 304
+        finally:
+            await delete_test_topics()
+            await async_engine_pool.dispose()
+
+    asyncio.run(run())
@@ -0,0 +1,185 @@
+"""User profile cache: TTLs, negative caching and one Cognito call per user.
+
+AdminGetUser is served by a local stub and the cache reads a fake clock, so
+these tests need neither Cognito nor a database.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+from helpers import user_profiles as user_profiles_module
+from helpers.user_profiles import (
+    UserProfileCache,
+    enrich_with_user_profiles,
+    get_created_updated_users,
+)
+
+TTL_SECONDS = 300
+NEGATIVE_TTL_SECONDS = 60
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class StubCognito:
+    """admin_get_user for a fixed set of users, counting calls per username."""
+
+    def __init__(self, users, delay_seconds: float = 0.05):
+        self.users = users
+        self.delay_seconds = delay_seconds
+        self.calls = {}
+        self.fail_with = None
+        self._lock = threading.Lock()
+
+    def admin_get_user(self, UserPoolId, Username):
+        with self._lock:
+            self.calls[Username] = self.calls.get(Username, 0) + 1
+        # Keeps the call in flight long enough for concurrent callers to pile up
+        time.sleep(self.delay_seconds)
+        if self.fail_with:
+            raise ClientError(
+                {"Error": {"Code": self.fail_with, "Message": self.fail_with}},
+                "AdminGetUser",
+            )
+        if Username not in self.users:
+            raise ClientError(
+                {"Error": {"Code": "UserNotFoundException", "Message": "no user"}},
+                "AdminGetUser",
+            )
+        return {
+            "Username": Username,
+            "UserAttributes": [
+                {"Name": name, "Value": value}
+                for name, value in self.users[Username].items()
+            ],
+        }
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    # Only the cache's clock, the event loop keeps the real one
+    monkeypatch.setattr(user_profiles_module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cognito(monkeypatch):
+    cognito = StubCognito(
+        {
+            "alice": {"name": "Alice", "custom:tenantId": "t1"},
+            "bob": {"name": "Bob"},
+        }
+    )
+    monkeypatch.setattr(user_profiles_module, "get_boto3_client", lambda _: cognito)
+    return cognito
+
+
+@pytest.fixture
+def cache(monkeypatch, clock, cognito):
+    cache = UserProfileCache(TTL_SECONDS, NEGATIVE_TTL_SECONDS, 100, 4)
+    # The row helpers use the module level cache
+    monkeypatch.setattr(user_profiles_module, "user_profiles", cache)
+    return cache
+
+
+def test_profiles_are_cached_until_the_ttl_expires(cache, clock, cognito):
+    async def run():
+        first = await cache.get("alice")
+        clock.advance(TTL_SECONDS - 1)
+        second = await cache.get("alice")
+        clock.advance(2)
+        third = await cache.get("alice")
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first == {"name": "Alice", "tenantId": "t1"}
+    assert second == first and third == first
+    assert cognito.calls == {"alice": 2}
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_missing_users_are_cached_for_the_negative_ttl(cache, clock, cognito):
+    async def run():
+        results = [await cache.get("ghost")]
+        clock.advance(NEGATIVE_TTL_SECONDS - 1)
+        results.append(await cache.get("ghost"))
+        assert cognito.calls == {"ghost": 1}
+        clock.advance(2)
+        results.append(await cache.get("ghost"))
+        return results
+
+    assert asyncio.run(run()) == [None, None, None]
+    assert cognito.calls == {"ghost": 2}
+    assert cache.get_stats()["not_found"] == 2
+
+
+def test_other_cognito_errors_are_not_cached(cache, cognito):
+    cognito.fail_with = "TooManyRequestsException"
+
+    async def run():
+        return [await cache.get("alice"), await cache.get("alice")]
+
+    assert asyncio.run(run()) == [None, None]
+    assert cognito.calls == {"alice": 2}
+    assert cache.get_stats()["errors"] == 2
+
+
+def test_concurrent_lookups_of_one_user_share_a_call(cache, cognito):
+    async def run():
+        return await asyncio.gather(*[cache.get("alice") for _ in range(10)])
+
+    profiles = asyncio.run(run())
+    assert all(profile == {"name": "Alice", "tenantId": "t1"} for profile in profiles)
+    assert cognito.calls == {"alice": 1}
+
+
+def test_get_many_looks_up_each_distinct_user_once(cache, cognito):
+    profiles = asyncio.run(cache.get_many(["alice", "bob", "alice", None, "", "bob"]))
+    assert profiles == {
+        "alice": {"name": "Alice", "tenantId": "t1"},
+        "bob": {"name": "Bob"},
+    }
+    assert cognito.calls == {"alice": 1, "bob": 1}
+
+
+def test_row_helpers_look_up_each_distinct_user_once(cache, cognito):
+    rows = [
+        {"created_by": "alice", "updated_by": "bob"},
+        {"created_by": "bob", "updated_by": None},
+        {"created_by": "alice", "updated_by": "ghost"},
+    ]
+
+    async def run():
+        enriched = await enrich_with_user_profiles(rows)
+        pair = await get_created_updated_users(
+            {"created_by": "alice", "updated_by": "alice"}
+        )
+        return enriched, pair
+
+    enriched, (creator, updater) = asyncio.run(run())
+    assert [row["create_user_data"]["name"] for row in enriched] == [
+        "Alice",
+        "Bob",
+        "Alice",
+    ]
+    assert [row["update_user_data"] for row in enriched] == [
+        {"name": "Bob"},
+        None,
+        None,
+    ]
+    assert creator == updater == {"name": "Alice", "tenantId": "t1"}
+    # The second call is served from the cache
+    assert cognito.calls == {"alice": 1, "bob": 1, "ghost": 1}
@@ -0,0 +1,104 @@
+"""Ingestion worker, runs the jobs queued by create-content and edit-content.
+
+Claims due jobs from the ingestion_jobs table with FOR UPDATE SKIP LOCKED, so
+any number of workers can run next to each other and next to the API. Runs
+at most INGESTION_WORKER_CONCURRENCY jobs at a time, failed jobs come back
+with exponential backoff until they run out of attempts and are marked dead.
+
+    python worker.py
+"""
+
+from connection.postgres import AsyncSessionLocal, async_engine_pool, engine_pool
+from connection.clients import close_clients
+from config.constants import (
+    INGESTION_WORKER_CONCURRENCY,
+    INGESTION_WORKER_POLL_SECONDS,
+    INGESTION_JOB_LOCK_TIMEOUT_SECONDS,
+)
+from services.ingestion_jobs_service import (
+    claim_ingestion_jobs,
+    recover_stale_ingestion_jobs,
+    process_ingestion_job,
+)
+from helpers.service import print_log
+import asyncio
+import os
+import signal
+import socket
+import time
+
+# Running jobs get this long to finish on SIGTERM, the rest go back to the queue
+SHUTDOWN_GRACE_SECONDS = 30.0
+
+
+async def recover_stale_jobs():
+    async with AsyncSessionLocal() as db:
+        recovered = await recover_stale_ingestion_jobs(db)
+    if recovered:
+        print_log("worker", "WORKER", "recovered", {"job_ids": recovered})
+
+
+async def claim_jobs(worker_id: str, limit: int):
+    async with AsyncSessionLocal() as db:
+        return await claim_ingestion_jobs(db, worker_id, limit)
+
+
+async def run_worker():
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stopping.set)
+
+    print_log(
+        "worker",
+        "WORKER",
+        "entry",
+        {"worker_id": worker_id, "concurrency": INGESTION_WORKER_CONCURRENCY},
+    )
+    running = set()
+    stop_requested = asyncio.ensure_future(stopping.wait())
+    last_recovery = 0.0
+    recovery_interval = INGESTION_JOB_LOCK_TIMEOUT_SECONDS / 2
+    while not stopping.is_set():
+        try:
+            if time.monotonic() - last_recovery > recovery_interval:
+                await recover_stale_jobs()
+                last_recovery = time.monotonic()
+
+            jobs = []
+            free_slots = INGESTION_WORKER_CONCURRENCY - len(running)
+            if free_slots > 0:
+                jobs = await claim_jobs(worker_id, free_slots)
+            for job in jobs:
+                task = asyncio.create_task(process_ingestion_job(job, worker_id))
+                running.add(task)
+                task.add_done_callback(running.discard)
+        except Exception as e:
+            # Database hiccups must not stop the worker, the next poll retries
+            print_log("worker", "WORKER", "error", f"Polling jobs failed: {e}")
+            jobs = []
+
+        if not jobs or len(running) >= INGESTION_WORKER_CONCURRENCY:
+            # Wake up on the next poll, a free slot or shutdown
+            await asyncio.wait(
+                [stop_requested, *running],
+                timeout=INGESTION_WORKER_POLL_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+
+    if running:
+        print_log("worker", "WORKER", "draining", {"running": len(running)})
+        _, unfinished = await asyncio.wait(running, timeout=SHUTDOWN_GRACE_SECONDS)
+        for task in unfinished:
+            task.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+
+    await close_clients()
+    await async_engine_pool.dispose()
+    engine_pool.dispose()
+    print_log("worker", "WORKER", "exit", {"worker_id": worker_id})
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())